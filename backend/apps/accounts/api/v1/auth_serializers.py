@@ -1,13 +1,11 @@
 # backend/apps/accounts/api/v1/auth_serializers.py
 from django.contrib.auth import get_user_model
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-import re
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from apps.accounts.utils.utils import normalize_digits
+from .authentication import RoleRefreshToken
 
 User = get_user_model()
 
-def normalize_digits(s: str) -> str:
-    return re.sub(r"\D+", "", s or "")
-
 def looks_like_cpf(s: str) -> bool:
     return len(normalize_digits(s)) == 11
 
@@ -18,7 +16,9 @@ class EmailOrUsernameOrCpfTokenObtainPairSerializer(TokenObtainPairSerializer):
       - e-mail (User.email, case-insensitive),
       - CPF (PatientUser.cpf) -> mapeia para o username relacionado.
     Aceita CPF com ou sem máscara (ex.: 000.000.000-00).
+    Os tokens emitidos carregam as claims de papel (role, profile_id, role_version).
     """
+    token_class = RoleRefreshToken
 
     def validate(self, attrs):
         login_raw = (attrs.get(self.username_field) or "").strip()
@@ -53,3 +53,8 @@ class EmailOrUsernameOrCpfTokenObtainPairSerializer(TokenObtainPairSerializer):
                     credentials[self.username_field] = login_raw
 
         return super().validate(credentials)
+
+
+class RoleTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refresh que recalcula as claims de papel a partir do banco."""
+    token_class = RoleRefreshToken
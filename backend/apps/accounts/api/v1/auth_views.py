@@ -1,8 +1,9 @@
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from django.contrib.auth.models import User
 from apps.accounts.api.v1.serializers import UserSerializer
-from apps.accounts.models import ManagerUser, ProfessionalUser, PatientUser
+from apps.accounts.utils.utils import get_request_profiles
 from rest_framework_simplejwt.views import TokenObtainPairView
 from .auth_serializers import EmailOrUsernameOrCpfTokenObtainPairSerializer
 
@@ -10,17 +11,21 @@ class EmailOrUsernameOrCpfTokenObtainPairView(TokenObtainPairView):
     serializer_class = EmailOrUsernameOrCpfTokenObtainPairSerializer
 
 
-def _roles_for(user):
+def _roles_for(request):
+    profiles = get_request_profiles(request) #* uma única query para os três perfis
     roles = []
-    if ManagerUser.objects.filter(user=user).exists(): roles.append("MANAGER")
-    if ProfessionalUser.objects.filter(user=user).exists(): roles.append("PROFESSIONAL")
-    if PatientUser.objects.filter(user=user).exists(): roles.append("PATIENT")
+    if "manager" in profiles: roles.append("MANAGER")
+    if "professional" in profiles: roles.append("PROFESSIONAL")
+    if "patient" in profiles: roles.append("PATIENT")
     return roles
 
 class MeView(APIView):
     permission_classes = [IsAuthenticated]
     def get(self, request):
+        user = request.user
+        if getattr(user, "_from_claims", False): #* o User montado pelas claims não tem nome/e-mail
+            user = User.objects.get(pk=user.pk)
         return Response({
-            "user": UserSerializer(request.user).data,
-            "roles": _roles_for(request.user)
+            "user": UserSerializer(user).data,
+            "roles": _roles_for(request)
         })
@@ -0,0 +1,108 @@
+# backend/apps/accounts/api/v1/authentication.py
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.accounts.utils.utils import (
+    get_role_version, ensure_role_version, seed_role_version, get_user_profile, get_user_profiles,
+)
+
+User = get_user_model()
+
+def _profile_models():
+    from apps.accounts.models import PatientUser, ProfessionalUser, ManagerUser
+    return {"patient": PatientUser, "professional": ProfessionalUser, "manager": ManagerUser}
+
+
+def set_role_claims(token, user):
+    """Grava no token o papel, o id do perfil e a versão das claims vigentes para o user."""
+    role, profile = get_user_profile(user)
+    token["role"] = role
+    token["profile_id"] = profile.pk if profile is not None else None
+    token["role_version"] = ensure_role_version(user.pk)
+    token["username"] = user.get_username()
+    token["is_staff"] = user.is_staff
+    token["is_superuser"] = user.is_superuser
+
+
+def build_claims_user(validated_token):
+    """
+    Monta um User leve (não salvo) a partir das claims, sem tocar no banco.
+    Tem apenas pk, username e flags; serve para checagens de permissão, filtros
+    (filter(patient=profile)) e atribuição de FKs como created_by. Quem precisar
+    dos demais campos (nome, e-mail) deve recarregar o User do banco.
+    """
+    user = User(
+        pk=validated_token[api_settings.USER_ID_CLAIM],
+        username=validated_token.get("username", ""),
+        is_staff=validated_token.get("is_staff", False),
+        is_superuser=validated_token.get("is_superuser", False),
+        is_active=True,
+    )
+
+    profiles = {}
+    role, profile_id = validated_token.get("role"), validated_token.get("profile_id")
+    model = _profile_models().get(role)
+    if model is not None and profile_id is not None:
+        profiles[role] = model(pk=profile_id, user=user)
+
+    user._profiles_cache = profiles
+    user._from_claims = True
+    return user
+
+
+class RoleRefreshToken(RefreshToken):
+    """RefreshToken que embute as claims de papel e as recalcula a cada refresh."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        set_role_claims(token, user)
+        token._claims_fresh = True
+        return token
+
+    @property
+    def access_token(self):
+        #* No refresh o papel é relido do banco, então o access (e o refresh rotacionado) saem atualizados
+        if not getattr(self, "_claims_fresh", False):
+            user_id = self.payload.get(api_settings.USER_ID_CLAIM)
+            user = User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+            if user is not None:
+                set_role_claims(self, user)
+            self._claims_fresh = True
+        return super().access_token
+
+
+class RoleClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Autenticação JWT que confia nas claims de papel enquanto a versão do token
+    for a mesma do contador em cache. Com versão diferente (papel alterado) ou
+    ausente, cai no caminho normal: carrega o User e os perfis do banco.
+    Sem cache compartilhado (SHARED_CACHE) a troca de versão só chegaria ao
+    processo que fez a escrita, então as claims nunca são aceitas sozinhas.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        token_version = validated_token.get("role_version")
+        shared = settings.SHARED_CACHE
+
+        if shared and token_version is not None and token_version == get_role_version(user_id):
+            return build_claims_user(validated_token)
+
+        user = super().get_user(validated_token)
+        user._profiles_cache = get_user_profiles(user)
+        role, profile = get_user_profile(user)
+
+        #* Claims conferidas com o banco e cache sem versão (expirada ou outro processo): reaproveita a do token
+        claims_match = (
+            validated_token.get("role") == role
+            and validated_token.get("profile_id") == (profile.pk if profile is not None else None)
+            and validated_token.get("is_superuser") == user.is_superuser
+            and validated_token.get("is_staff") == user.is_staff
+        )
+        if shared and token_version is not None and claims_match and get_role_version(user_id) is None:
+            seed_role_version(user_id, token_version)
+
+        return user
@@ -1,16 +1,11 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from apps.accounts.models import PatientUser, ProfessionalUser, ManagerUser
-import re
+from apps.accounts.utils.utils import normalize_digits
 
 User = get_user_model()
 
 
-def normalize_digits(s: str) -> str:
-    """Remove todos os caracteres não numéricos"""
-    return re.sub(r"\D+", "", s or "")
-
-
 def looks_like_cpf(s: str) -> bool:
     """Verifica se a string parece um CPF (11 dígitos)"""
     return len(normalize_digits(s)) == 11
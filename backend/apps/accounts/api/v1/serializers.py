@@ -1,3 +1,4 @@
+from django.db.models import Exists, OuterRef
 from rest_framework import serializers
 from drf_spectacular.utils import extend_schema_field
 from apps.accounts.models import *
@@ -34,6 +35,16 @@ class UserSerializer(BaseSerializer):
         user.save()
         return user
 
+def with_patient_relations(queryset):
+    """
+    Plano de carregamento do PatientUserSerializer: user/endereço/condições via JOIN e outras DCNTs via EXISTS,
+    para que uma lista de pacientes (ou de agendamentos/alertas com o paciente completo) custe um número fixo de queries.
+    """
+    from apps.conditions.models import OtherDCNT
+    return queryset.select_related('user', 'address', 'has', 'dm', 'micro_area').annotate(
+        has_other_dcnt=Exists(OtherDCNT.objects.filter(patient=OuterRef('pk')))
+    )
+
 class PatientUserSerializer(BaseSerializer):
     user = UserSerializer()
     conditions = serializers.SerializerMethodField()
@@ -41,7 +52,10 @@ class PatientUserSerializer(BaseSerializer):
 
     class Meta(BaseSerializer.Meta):
         model = PatientUser
-        fields = '__all__'
+        fields = None
+        exclude = ['search_name', 'search_phone'] #* colunas internas da busca
+        method_field_sources = {'conditions': ()} #* Lê só has/dm (select_related) e a anotação has_other_dcnt
+        cache_dependencies = ('conditions.HAS', 'conditions.DM', 'conditions.OtherDCNT') #* Lidos por conditions
 
     def validate_cpf(self, value):
         """Valida se o CPF já está em uso por outro paciente"""
@@ -88,8 +102,12 @@ class PatientUserSerializer(BaseSerializer):
         except:
             pass
         
+        #* has_other_dcnt vem anotado pelo queryset da listagem; fora dele cai na query avulsa
+        has_other = getattr(obj, "has_other_dcnt", None)
         try:
-            if obj.otherdcnt_set.exists():
+            if has_other is None:
+                has_other = obj.otherdcnt_set.exists()
+            if has_other:
                 conditions.append("OUTRAS DCNTs")
         except:
             pass
@@ -131,3 +149,32 @@ class ManagerUserSerializer(BaseSerializer):
         manager = ManagerUser.objects.create(user=user, **validated_data)
 
         return manager
+
+
+#Resumos=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+#* Representações compactas usadas nas listagens de outros recursos (agendamentos, alertas)
+class PatientSummarySerializer(serializers.ModelSerializer):
+    name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PatientUser
+        fields = ["id", "name", "cpf"]
+
+    @extend_schema_field(serializers.CharField())
+    def get_name(self, obj):
+        return obj.user.get_full_name()
+
+class PatientSearchSerializer(PatientSummarySerializer):
+    class Meta(PatientSummarySerializer.Meta):
+        fields = ["id", "name", "cpf", "sus", "phone", "birth_date", "micro_area"]
+
+class ProfessionalSummarySerializer(serializers.ModelSerializer):
+    name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProfessionalUser
+        fields = ["id", "name", "role"]
+
+    @extend_schema_field(serializers.CharField())
+    def get_name(self, obj):
+        return obj.user.get_full_name()
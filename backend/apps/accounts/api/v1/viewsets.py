@@ -1,20 +1,38 @@
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.conf import settings
 from django.contrib.auth.models import User
 from apps.accounts.models import PatientUser, ProfessionalUser, ManagerUser
 from apps.commons.api.v1.viewsets import BaseModelViewSet
-from .serializers import PatientUserSerializer, ProfessionalUserSerializer, ManagerUserSerializer
+from apps.accounts.imports import ImportFileError, PatientImporter, read_rows
+from apps.accounts.search import search_patients
+from .serializers import (
+    PatientUserSerializer, ProfessionalUserSerializer, ManagerUserSerializer, PatientSearchSerializer, with_patient_relations,
+)
 from .permissions import PatientDataPermission, ProfessionalDataPermission, ManagerDataPermission
-from apps.accounts.utils.utils import get_user_profile
+from apps.accounts.utils.utils import get_request_profile, normalize_digits
 
 @extend_schema(tags=['Accounts - Patient'])
 class PatientUserViewset(BaseModelViewSet):
     queryset = PatientUser.all_objects
     serializer_class = PatientUserSerializer    
     permission_classes = [IsAuthenticated, PatientDataPermission]
+    filter_fields = BaseModelViewSet.filter_fields + ('micro_area', 'gender')
+    search_fields = ('user__first_name', 'user__last_name', 'cpf__startswith', 'sus__startswith')
+
+    SEARCH_DEFAULT_LIMIT = 10
+    SEARCH_MAX_LIMIT = 50
+
+    @property
+    def cache_responses(self):
+        #* Ficha do paciente: invalida com User, endereço e condições (ver PatientUserSerializer.Meta). Dado clínico
+        #* só vai para o cache se ele for compartilhado; com cache local outro worker serviria a ficha antiga
+        return settings.SHARED_CACHE
 
     @action(detail=False, methods=['get'], url_path='check-cpf')
     def check_cpf(self, request):
@@ -26,45 +44,103 @@ class PatientUserViewset(BaseModelViewSet):
                 {"error": "CPF não fornecido"},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        # Verifica se existe um User com esse username (CPF)
-        user_exists = User.objects.filter(username=cpf).exists()
-        
-        # Verifica se existe um PatientUser com esse CPF
-        patient_exists = PatientUser.objects.filter(cpf=cpf).exists()
-        
-        exists = user_exists or patient_exists
-        
+
+        digits = normalize_digits(cpf) or cpf
+
+        #* Uma query pelo paciente (já trazendo o nome); o User por username só é consultado se não houver paciente
+        patient = PatientUser.objects.select_related('user').only(
+            'id', 'user__first_name', 'user__last_name'
+        ).filter(cpf=digits).first()
+        user = None
+        if patient is None:
+            user = User.objects.only('id', 'first_name', 'last_name').filter(username__in={cpf, digits}).first()
+
+        exists = patient is not None or user is not None
+
         response_data = {
             "cpf": cpf,
             "exists": exists,
             "message": "CPF já cadastrado no sistema" if exists else "CPF disponível"
         }
-        
-        if exists:
-            # Busca informações do paciente
-            try:
-                patient = PatientUser.objects.get(cpf=cpf)
-                response_data["patient"] = {
-                    "id": patient.id,
-                    "name": patient.user.get_full_name(),
-                }
-            except PatientUser.DoesNotExist:
-                # Pode ser que o User exista mas não o PatientUser
-                try:
-                    user = User.objects.get(username=cpf)
-                    response_data["user"] = {
-                        "id": user.id,
-                        "name": user.get_full_name(),
-                    }
-                except User.DoesNotExist:
-                    pass
+
+        if patient is not None:
+            response_data["patient"] = {"id": patient.id, "name": patient.user.get_full_name()}
+        elif user is not None: # Pode ser que o User exista mas não o PatientUser
+            response_data["user"] = {"id": user.id, "name": user.get_full_name()}
         
         return Response(response_data, status=status.HTTP_200_OK)
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter('q', str, description="Nome (sem diferenciar acentos), CPF, cartão SUS ou telefone."),
+            OpenApiParameter('limit', int, description="Quantidade máxima de resultados (padrão 10, máximo 50)."),
+        ],
+        responses=PatientSearchSerializer(many=True),
+    )
+    @action(detail=False, methods=['get'], url_path='search')
+    def search(self, request):
+        """Busca rápida de pacientes ativos, retornando os k melhores resultados"""
+        query = request.query_params.get('q', '').strip()
+
+        if not query:
+            return Response(
+                {"error": "Parâmetro q não fornecido"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            limit = int(request.query_params.get('limit', self.SEARCH_DEFAULT_LIMIT))
+        except ValueError:
+            limit = self.SEARCH_DEFAULT_LIMIT
+        limit = max(1, min(limit, self.SEARCH_MAX_LIMIT))
+
+        #* Mesmas regras de acesso da listagem; só o User é carregado (é o que o PatientSearchSerializer lê)
+        queryset = self.get_queryset().filter(is_deleted=False).select_related(None).select_related('user')
+
+        results = search_patients(queryset, query, limit)
+        return Response({"results": PatientSearchSerializer(results, many=True).data})
+
+    @extend_schema(
+        request={'multipart/form-data': {
+            'type': 'object',
+            'properties': {
+                'file': {'type': 'string', 'format': 'binary'},
+                'generate_passwords': {'type': 'boolean'},
+            },
+            'required': ['file'],
+        }},
+        responses=OpenApiTypes.OBJECT,
+    )
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_patients(self, request):
+        """Importa pacientes de um CSV/XLSX em lotes, retornando os erros por linha"""
+        role, profile = get_request_profile(request)
+
+        if not request.user.is_superuser and role != 'manager':
+            return Response(
+                {"detail": "Apenas gestores podem importar pacientes."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"error": "Arquivo não fornecido"}, status=status.HTTP_400_BAD_REQUEST)
+
+        importer = PatientImporter(
+            created_by=request.user,
+            generate_passwords=str(request.data.get('generate_passwords', '')).lower() in ('1', 'true'),
+        )
+        try:
+            report = importer.run(read_rows(upload, upload.name))
+        except ImportFileError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(report, status=status.HTTP_201_CREATED if report['created'] else status.HTTP_200_OK)
+
     def get_queryset(self):
-        queryset = super().get_queryset()
-        role, profile = get_user_profile(self.request.user)
+        #* Mesmo número de queries independente da quantidade de pacientes (ver with_patient_relations)
+        queryset = with_patient_relations(super().get_queryset())
+        role, profile = get_request_profile(self.request)
 
         if not self.request.user.is_authenticated:
             return queryset.none()
@@ -83,10 +159,12 @@ class ProfessionalUserViewset(BaseModelViewSet):
     permission_classes = [IsAuthenticated, ProfessionalDataPermission]
     queryset = ProfessionalUser.all_objects
     serializer_class = ProfessionalUserSerializer
+    filter_fields = BaseModelViewSet.filter_fields + ('role',)
+    search_fields = ('user__first_name', 'user__last_name')
 
     def get_queryset(self):
         queryset = super().get_queryset()
-        role, profile = get_user_profile(self.request.user)
+        role, profile = get_request_profile(self.request)
 
         if not self.request.user.is_authenticated:
             return queryset.none()
@@ -107,7 +185,7 @@ class ManagerUserViewset(BaseModelViewSet):
 
     def get_queryset(self):
         queryset = super().get_queryset()
-        role, profile = get_user_profile(self.request.user)
+        role, profile = get_request_profile(self.request)
 
         if not self.request.user.is_authenticated:
             return queryset.none()
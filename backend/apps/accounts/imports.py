@@ -0,0 +1,347 @@
+import csv
+import io
+import re
+import secrets
+import string
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from itertools import islice
+
+import django
+from django.apps import apps as django_apps
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import DatabaseError, transaction
+
+from apps.accounts.models import PatientUser
+from apps.accounts.utils.utils import fold_text, normalize_digits
+from apps.locations.models import Address, MicroArea, UF_CHOICE
+
+#* Cabeçalhos aceitos (já sem acento, minúsculos e com _) -> campo interno
+COLUMN_ALIASES = {
+    'nome': 'full_name', 'nome_completo': 'full_name', 'full_name': 'full_name',
+    'first_name': 'first_name', 'primeiro_nome': 'first_name',
+    'last_name': 'last_name', 'sobrenome': 'last_name',
+    'cpf': 'cpf',
+    'sus': 'sus', 'cartao_sus': 'sus', 'cns': 'sus',
+    'data_nascimento': 'birth_date', 'data_de_nascimento': 'birth_date', 'nascimento': 'birth_date', 'birth_date': 'birth_date',
+    'genero': 'gender', 'sexo': 'gender', 'gender': 'gender',
+    'telefone': 'phone', 'celular': 'phone', 'phone': 'phone',
+    'whatsapp': 'whatsapp',
+    'email': 'email', 'e_mail': 'email',
+    'micro_area': 'micro_area', 'microarea': 'micro_area',
+    'uf': 'uf', 'estado': 'uf',
+    'cidade': 'city', 'municipio': 'city', 'city': 'city',
+    'bairro': 'district', 'district': 'district',
+    'rua': 'street', 'logradouro': 'street', 'street': 'street',
+    'numero': 'number', 'number': 'number',
+    'complemento': 'complement', 'complement': 'complement',
+    'cep': 'zipcode', 'zipcode': 'zipcode',
+    'senha': 'password', 'password': 'password',
+}
+ADDRESS_FIELDS = ('uf', 'city', 'district', 'street', 'number', 'complement', 'zipcode')
+REQUIRED_ADDRESS_FIELDS = ('uf', 'city', 'district', 'street', 'number')
+VALID_UFS = {uf for uf, label in UF_CHOICE}
+TRUE_TEXT = {'sim', 's', 'true', '1', 'x'}
+ZIPCODE_PATTERN = re.compile(r'^\d{5}-?\d{3}$') #* O mesmo do Address.clean
+MAX_ADDRESS_NUMBER = 2147483647 #* PositiveIntegerField
+
+#* (campo, model, nome no relatório): o bulk_create não valida o model, então o tamanho das colunas é
+#* conferido aqui; no PostgreSQL um texto maior que a coluna derrubaria o lote inteiro com DataError
+LENGTH_CHECKS = (
+    ('email', User, 'email'),
+    ('sus', PatientUser, 'sus'),
+    ('phone', PatientUser, 'telefone'),
+    ('gender', PatientUser, 'genero'),
+    ('city', Address, 'cidade'),
+    ('district', Address, 'bairro'),
+    ('street', Address, 'rua'),
+    ('complement', Address, 'complemento'),
+    ('zipcode', Address, 'cep'),
+)
+
+POOL_MIN_PASSWORDS = 32 #* Abaixo disso abrir processos custa mais que hashear direto
+
+
+class ImportFileError(Exception):
+    """Arquivo ilegível ou sem as colunas mínimas (nome e CPF)."""
+
+
+#Leitura=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+def _map_header(header):
+    columns = [COLUMN_ALIASES.get(fold_text(str(name or '')).replace(' ', '_').replace('-', '_')) for name in header]
+    present = set(columns)
+    if 'cpf' not in present or not present & {'full_name', 'first_name'}:
+        raise ImportFileError("O arquivo precisa das colunas 'nome' e 'cpf'.")
+    return columns
+
+
+def _rows_from(iterator):
+    try:
+        header = next(iterator)
+    except StopIteration:
+        raise ImportFileError("Arquivo vazio.")
+    columns = _map_header(header)
+
+    for number, values in enumerate(iterator, start=2): #* Linha 1 é o cabeçalho
+        if not any(value not in (None, '') for value in values):
+            continue
+        yield number, {column: value for column, value in zip(columns, values) if column}
+
+
+def read_csv(stream):
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    sample = text.read(4096)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=';,\t')
+    except csv.Error:
+        dialect = csv.excel
+    return _rows_from(csv.reader(text, dialect))
+
+
+def read_xlsx(stream):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFileError("Importação de XLSX requer o pacote openpyxl.")
+
+    try:
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+    except Exception:
+        raise ImportFileError("Não foi possível ler a planilha XLSX.")
+    return _rows_from(workbook.active.iter_rows(values_only=True))
+
+
+def read_rows(stream, filename):
+    """Lê o arquivo aos poucos, devolvendo (número da linha, {campo: valor}) sem carregar tudo na memória."""
+    if filename.lower().endswith('.xlsx'):
+        return read_xlsx(stream)
+    return read_csv(stream)
+
+
+#Validação=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer(): #* Planilhas guardam CPF/telefone como número
+        value = int(value)
+    return str(value).strip()
+
+
+def _parse_birth_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    for fmt in ('%d/%m/%Y', '%Y-%m-%d', '%d-%m-%Y'):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def generate_simple_password(): #* Mesmo formato do frontend (lib/pacientes/utils.ts): 2 letras + 5 dígitos + #
+    letters = ''.join(secrets.choice(string.ascii_lowercase) for _ in range(2))
+    digits = ''.join(secrets.choice(string.digits) for _ in range(5))
+    return f'{letters}{digits}#'
+
+
+def _init_worker(): #* Com start method "spawn" o processo filho precisa configurar o Django
+    if not django_apps.ready:
+        django.setup()
+
+
+class PatientImporter:
+    """
+    Importa pacientes em lotes: valida cada lote contra conjuntos de CPF/SUS/username carregados
+    uma única vez, hasheia as senhas em um pool de processos e grava User, Address e PatientUser
+    com bulk_create dentro de uma transação por lote. Erros são reportados por linha.
+
+    Sem coluna de senha o usuário é criado com senha inutilizável (o paciente define a sua pela
+    recuperação de senha por CPF); com generate_passwords=True uma senha é gerada e devolvida no relatório.
+    """
+
+    def __init__(self, created_by=None, chunk_size=1000, workers=None, generate_passwords=False):
+        self.created_by = created_by
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.generate_passwords = generate_passwords
+        self.pool = None
+
+    def preload(self):
+        self.usernames = set(User.objects.values_list('username', flat=True))
+        self.cpfs = set(PatientUser.objects.exclude(cpf=None).values_list('cpf', flat=True))
+        self.sus = set(PatientUser.objects.exclude(sus=None).values_list('sus', flat=True))
+        self.micro_areas = {}
+        for pk, name in MicroArea.objects.values_list('pk', 'name'):
+            self.micro_areas[str(pk)] = pk
+            self.micro_areas[fold_text(name)] = pk
+
+    def run(self, rows):
+        started = time.monotonic()
+        self.report = {'rows': 0, 'created': 0, 'errors': [], 'passwords': []}
+        self.preload()
+
+        try:
+            rows = iter(rows)
+            while True:
+                chunk = list(islice(rows, self.chunk_size))
+                if not chunk:
+                    break
+                self.report['rows'] += len(chunk)
+                self.process_chunk(chunk)
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
+                self.pool = None
+
+        self.report['duration_seconds'] = round(time.monotonic() - started, 3)
+        return self.report
+
+    def validate(self, raw):
+        errors = {}
+        data = {field: _text(raw.get(field)) for field in COLUMN_ALIASES.values() if field != 'birth_date'}
+
+        first_name, last_name = data['first_name'], data['last_name']
+        if data['full_name'] and not first_name:
+            first_name, _, last_name = data['full_name'].partition(' ')
+        if not first_name:
+            errors['nome'] = 'Nome é obrigatório.'
+        data['first_name'], data['last_name'] = first_name[:150], last_name.strip()[:150]
+
+        data['cpf'] = normalize_digits(data['cpf'])
+        if len(data['cpf']) != 11:
+            errors['cpf'] = 'CPF deve ter 11 dígitos.'
+        elif data['cpf'] in self.cpfs or data['cpf'] in self.usernames:
+            errors['cpf'] = 'Este CPF já está cadastrado (no sistema ou em outra linha do arquivo).'
+
+        data['sus'] = normalize_digits(data['sus']) or None
+        if data['sus'] and data['sus'] in self.sus:
+            errors['sus'] = 'Este cartão SUS já está cadastrado (no sistema ou em outra linha do arquivo).'
+
+        data['birth_date'] = None
+        raw_birth_date = raw.get('birth_date')
+        if raw_birth_date not in (None, ''):
+            data['birth_date'] = _parse_birth_date(raw_birth_date if isinstance(raw_birth_date, date) else _text(raw_birth_date))
+            if data['birth_date'] is None:
+                errors['data_nascimento'] = 'Use o formato DD/MM/AAAA.'
+
+        data['micro_area_id'] = None
+        if data['micro_area']:
+            data['micro_area_id'] = self.micro_areas.get(data['micro_area']) or self.micro_areas.get(fold_text(data['micro_area']))
+            if data['micro_area_id'] is None:
+                errors['micro_area'] = f"Micro-área '{data['micro_area']}' não encontrada."
+
+        data['whatsapp'] = fold_text(data['whatsapp']) in TRUE_TEXT if data['whatsapp'] else None
+
+        data['has_address'] = any(data[field] for field in ADDRESS_FIELDS)
+        if data['has_address']:
+            missing = [field for field in REQUIRED_ADDRESS_FIELDS if not data[field]]
+            if missing:
+                errors['endereco'] = f"Campos de endereço faltando: {', '.join(missing)}."
+            data['uf'] = data['uf'].upper()
+            if data['uf'] and data['uf'] not in VALID_UFS:
+                errors['uf'] = f"UF inválida. Opções: {', '.join(sorted(VALID_UFS))}."
+            number = normalize_digits(data['number'])
+            if data['number'] and not number:
+                errors['numero'] = 'Número do endereço deve ser numérico.'
+            data['number'] = int(number) if number else None
+            if data['number'] is not None and data['number'] > MAX_ADDRESS_NUMBER:
+                errors['numero'] = 'Número do endereço muito grande.'
+            if data['zipcode'] and not ZIPCODE_PATTERN.match(data['zipcode']):
+                errors['cep'] = 'CEP deve estar no formato 00000-000'
+
+        if data['email']:
+            try:
+                validate_email(data['email'])
+            except ValidationError:
+                errors['email'] = 'E-mail inválido.'
+
+        for field, model, label in LENGTH_CHECKS:
+            max_length = model._meta.get_field(field).max_length
+            if data[field] and len(data[field]) > max_length and label not in errors:
+                errors[label] = f'Máximo de {max_length} caracteres.'
+
+        return data, errors
+
+    def hash_passwords(self, passwords):
+        if len(passwords) < POOL_MIN_PASSWORDS or self.workers == 1:
+            return [make_password(password) for password in passwords]
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        return list(self.pool.map(make_password, passwords, chunksize=max(1, len(passwords) // 32)))
+
+    def process_chunk(self, chunk):
+        valid = []
+        for number, raw in chunk:
+            data, errors = self.validate(raw)
+            if errors:
+                self.report['errors'].append({'row': number, 'errors': errors})
+                continue
+            #* Reserva já na validação: duplicatas dentro do próprio arquivo também viram erro de linha
+            self.cpfs.add(data['cpf'])
+            self.usernames.add(data['cpf'])
+            if data['sus']:
+                self.sus.add(data['sus'])
+            valid.append((number, data))
+
+        if not valid:
+            return
+
+        generated = {}
+        to_hash = []
+        for number, data in valid:
+            if not data['password'] and self.generate_passwords:
+                data['password'] = generated[number] = generate_simple_password()
+            if data['password']:
+                to_hash.append(data['password'])
+        hashes = iter(self.hash_passwords(to_hash))
+        for number, data in valid:
+            data['password'] = next(hashes) if data['password'] else make_password(None)
+
+        try:
+            with transaction.atomic():
+                self.insert([data for number, data in valid])
+        except DatabaseError as exc: #* IntegrityError (corrida com outro cadastro) ou DataError: o lote vira erro de linha
+            for number, data in valid:
+                self.report['errors'].append({'row': number, 'errors': {'lote': f'Falha ao gravar o lote: {exc}'}})
+            return
+
+        self.report['created'] += len(valid)
+        self.report['passwords'] += [
+            {'row': number, 'cpf': data['cpf'], 'password': generated[number]}
+            for number, data in valid if number in generated
+        ]
+
+    def insert(self, rows):
+        users = User.objects.bulk_create([
+            User(username=row['cpf'], first_name=row['first_name'], last_name=row['last_name'],
+                 email=row['email'], password=row['password'])
+            for row in rows
+        ])
+
+        address_rows = [row for row in rows if row['has_address']]
+        addresses = Address.objects.bulk_create([
+            Address(uf=row['uf'], city=row['city'], district=row['district'], street=row['street'],
+                    number=row['number'], complement=row['complement'] or None, zipcode=row['zipcode'] or None,
+                    created_by=self.created_by)
+            for row in address_rows
+        ])
+        address_by_row = {id(row): address for row, address in zip(address_rows, addresses)}
+
+        #* bulk_create não chama save(): as colunas normalizadas e de busca são preenchidas aqui
+        PatientUser.objects.bulk_create([
+            PatientUser(
+                user=user, address=address_by_row.get(id(row)), cpf=row['cpf'], sus=row['sus'],
+                birth_date=row['birth_date'], gender=row['gender'] or None, phone=row['phone'] or None,
+                whatsapp=row['whatsapp'], micro_area_id=row['micro_area_id'], created_by=self.created_by,
+                search_name=fold_text(f"{row['first_name']} {row['last_name']}"),
+                search_phone=normalize_digits(row['phone']),
+            )
+            for row, user in zip(rows, users)
+        ])
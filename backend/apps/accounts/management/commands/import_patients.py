@@ -0,0 +1,54 @@
+import csv
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from apps.accounts.imports import ImportFileError, PatientImporter, read_rows
+
+
+class Command(BaseCommand):
+    help = "Importa pacientes de um arquivo CSV ou XLSX em lotes (bulk_create), reportando os erros por linha."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Arquivo .csv (separado por ; ou ,) ou .xlsx com cabeçalho.")
+        parser.add_argument('--chunk-size', type=int, default=1000, help="Linhas validadas e gravadas por transação.")
+        parser.add_argument('--workers', type=int, default=None, help="Processos para hashear senhas (padrão: nº de CPUs).")
+        parser.add_argument('--generate-passwords', action='store_true',
+                            help="Gera senha para linhas sem senha (mais lento: cada senha é hasheada).")
+        parser.add_argument('--passwords-out', help="CSV onde gravar as senhas geradas (linha, cpf, senha).")
+        parser.add_argument('--created-by', help="Username registrado como created_by dos registros.")
+
+    def handle(self, *args, **options):
+        created_by = None
+        if options['created_by']:
+            created_by = User.objects.filter(username=options['created_by']).first()
+            if created_by is None:
+                raise CommandError(f"Usuário '{options['created_by']}' não encontrado.")
+
+        importer = PatientImporter(
+            created_by=created_by, chunk_size=options['chunk_size'], workers=options['workers'],
+            generate_passwords=options['generate_passwords'],
+        )
+
+        try:
+            with open(options['path'], 'rb') as stream:
+                report = importer.run(read_rows(stream, options['path']))
+        except (OSError, ImportFileError) as exc:
+            raise CommandError(str(exc))
+
+        for error in report['errors']:
+            details = '; '.join(f'{field}: {message}' for field, message in error['errors'].items())
+            self.stderr.write(f"Linha {error['row']}: {details}")
+
+        if report['passwords']:
+            if options['passwords_out']:
+                with open(options['passwords_out'], 'w', newline='', encoding='utf-8') as output:
+                    writer = csv.DictWriter(output, fieldnames=['row', 'cpf', 'password'])
+                    writer.writeheader()
+                    writer.writerows(report['passwords'])
+            else:
+                self.stderr.write(self.style.WARNING("Senhas geradas não foram salvas; use --passwords-out."))
+
+        rate = report['created'] / report['duration_seconds'] if report['duration_seconds'] else report['created']
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['created']} de {report['rows']} pacientes importados em {report['duration_seconds']}s "
+            f"({rate:.0f}/s); {len(report['errors'])} linha(s) com erro."
+        ))
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:35
+
+import re
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+#* Cópia congelada de normalize_digits (apps/accounts/utils/utils.py): a migração não deve mudar se o app mudar
+def normalize_digits(value):
+    return re.sub(r"\D+", "", value or "")
+
+
+def blank_documents_to_null(apps, schema_editor):
+    #* CPFs vazios passam a ser NULL antes da constraint de unicidade (o model faz o mesmo no save)
+    PatientUser = apps.get_model("accounts", "PatientUser")
+    PatientUser._base_manager.filter(cpf="").update(cpf=None)
+
+    #* Pacientes ativos com o mesmo CPF fariam a constraint falhar no meio da migração (ou na 0009, que tira
+    #* a máscara: "123.456.789-00" e "12345678900" são o mesmo CPF). Não dá para escolher sozinho qual
+    #* registro fica, então a migração para com a lista, comparando só os dígitos, para a correção manual
+    patients = defaultdict(list)
+    rows = PatientUser._base_manager.filter(is_deleted=False, cpf__isnull=False).order_by("pk").values_list("pk", "cpf")
+    for pk, cpf in rows.iterator():
+        digits = normalize_digits(cpf)
+        if digits:
+            patients[digits].append(pk)
+    duplicates = sorted((digits, ids) for digits, ids in patients.items() if len(ids) > 1)
+    if duplicates:
+        lines = [f"  CPF {digits}: pacientes {', '.join(str(pk) for pk in ids)}" for digits, ids in duplicates]
+        raise RuntimeError(
+            "Há pacientes ativos com CPF repetido; exclua ou corrija os registros antes de migrar:\n" + "\n".join(lines)
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0006_alter_professionaluser_role"),
+        ("locations", "0002_alter_address_options_alter_institution_options_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="patientuser",
+            name="sus",
+            field=models.CharField(
+                blank=True, max_length=20, null=True, verbose_name="Cartão SUS"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="patientuser",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["created_at", "id"],
+                name="patient_active_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="professionaluser",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["created_at", "id"],
+                name="professional_active_idx",
+            ),
+        ),
+        migrations.RunPython(blank_documents_to_null, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="patientuser",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("is_deleted", False)),
+                fields=("cpf",),
+                name="unique_active_patient_cpf",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="patientuser",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("is_deleted", False)),
+                fields=("sus",),
+                name="unique_active_patient_sus",
+            ),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+#* O ?search= usa istartswith, que no PostgreSQL vira UPPER(coluna) LIKE 'X%'. O auth_user não é
+#* nosso, então os índices de expressão para nome/sobrenome são criados aqui, apenas no PostgreSQL.
+USER_NAME_INDEXES = {
+    "auth_user_first_name_upper_idx": "first_name",
+    "auth_user_last_name_upper_idx": "last_name",
+}
+
+
+def create_user_name_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, column in USER_NAME_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" ON "auth_user" (UPPER("{column}"::text) text_pattern_ops)'
+        )
+
+
+def drop_user_name_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name in USER_NAME_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0007_patientuser_sus_and_indexes"),
+        ("locations", "0002_alter_address_options_alter_institution_options_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="patientuser",
+            index=models.Index(
+                fields=["cpf"],
+                name="patient_cpf_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="patientuser",
+            index=models.Index(
+                fields=["sus"],
+                name="patient_sus_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ),
+        migrations.RunPython(create_user_name_indexes, drop_user_name_indexes),
+    ]
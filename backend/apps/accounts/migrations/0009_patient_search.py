@@ -0,0 +1,134 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:40
+
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import DatabaseError, migrations, models
+
+BATCH_SIZE = 2000
+SAMPLE_SIZE = 20
+
+
+#* Cópias congeladas de normalize_digits/fold_text (apps/accounts/utils/utils.py): a migração não deve mudar se o app mudar
+def normalize_digits(value):
+    return re.sub(r"\D+", "", value or "")
+
+
+def fold_text(value):
+    decomposed = unicodedata.normalize("NFKD", value or "")
+    return " ".join("".join(char for char in decomposed if not unicodedata.combining(char)).lower().split())
+
+
+def backfill_search_columns(apps, schema_editor):
+    """Preenche as colunas de busca e deixa CPF/SUS só com dígitos, em lotes; informa o que ficou com máscara."""
+    PatientUser = apps.get_model("accounts", "PatientUser")
+    manager = PatientUser._base_manager
+    taken = {
+        field: dict(manager.exclude(**{f"{field}__isnull": True}).values_list(field, "pk"))
+        for field in ("cpf", "sus")
+    }
+    kept = []
+
+    batch = []
+    for patient in manager.select_related("user").iterator(chunk_size=BATCH_SIZE):
+        patient.search_name = fold_text(f"{patient.user.first_name} {patient.user.last_name}")
+        patient.search_phone = normalize_digits(patient.phone)
+        for field in ("cpf", "sus"):
+            value = getattr(patient, field)
+            digits = normalize_digits(value)
+            if not value or digits == value:
+                continue
+            if not digits:
+                setattr(patient, field, None)
+            elif digits in taken[field]: #* Não cria duplicatas ao tirar a máscara: fica como está e vai para o relatório
+                kept.append((patient.pk, field, value, taken[field][digits]))
+            else:
+                taken[field][digits] = patient.pk
+                setattr(patient, field, digits)
+
+        batch.append(patient)
+        if len(batch) >= BATCH_SIZE:
+            manager.bulk_update(batch, ["search_name", "search_phone", "cpf", "sus"])
+            batch = []
+    if batch:
+        manager.bulk_update(batch, ["search_name", "search_phone", "cpf", "sus"])
+
+    if kept:
+        #* Sem a máscara eles repetiriam o documento de outro paciente; a busca e o check-cpf, que comparam
+        #* só dígitos, não os encontram até alguém corrigir ou excluir um dos dois
+        print(f"\n  {len(kept)} documento(s) ficaram com máscara porque os dígitos já pertencem a outro paciente:")
+        for pk, field, value, holder in kept[:SAMPLE_SIZE]:
+            print(f"    paciente {pk} {field}: {value!r} (dígitos já usados pelo paciente {holder})")
+
+
+#* Índice trigram para a busca por trecho do nome (LIKE '%termo%'). Só existe no PostgreSQL;
+#* no SQLite a busca continua funcionando, mas por varredura. A extensão pg_trgm é "trusted" a partir
+#* do PostgreSQL 13 (o dono do banco pode criá-la); antes disso, ou sem permissão, um superusuário
+#* precisa rodar CREATE EXTENSION pg_trgm antes da migração.
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        installed = cursor.fetchone() is not None
+    if not installed:
+        try:
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        except DatabaseError as exc:
+            raise RuntimeError(
+                "Sem permissão para criar a extensão pg_trgm. Peça a um superusuário do banco para rodar "
+                "CREATE EXTENSION pg_trgm; e rode a migração de novo."
+            ) from exc
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS "patient_name_trgm_idx" '
+        'ON "accounts_patientuser" USING gin ("search_name" gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute('DROP INDEX IF EXISTS "patient_name_trgm_idx"')
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0008_search_indexes"),
+        ("locations", "0002_alter_address_options_alter_institution_options_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="patientuser",
+            name="search_name",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=301
+            ),
+        ),
+        migrations.AddField(
+            model_name="patientuser",
+            name="search_phone",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=40
+            ),
+        ),
+        migrations.RunPython(backfill_search_columns, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="patientuser",
+            index=models.Index(
+                fields=["search_name"],
+                name="patient_name_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="patientuser",
+            index=models.Index(
+                fields=["search_phone"],
+                name="patient_phone_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
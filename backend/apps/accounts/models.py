@@ -1,8 +1,10 @@
 from django.db import models
 from django.contrib.auth.models import User
-from apps.commons.models import BaseModel
+from apps.commons.models import ActiveManager, AllManager, BaseModel, SoftDeleteQuerySet
 from django.core.exceptions import ValidationError
-from apps.accounts.utils.utils import get_creator_profile, SingleProfileMixin
+from apps.accounts.utils.utils import (
+    get_creator_profile, SingleProfileMixin, normalize_digits, fold_text, bump_role_versions,
+)
 
 from apps.accounts.data.patient import LifeStyle, SocialdemographicData, PsychosocialRisks, EnvironmentalRisks, PhysicalMotorRisks, ClassificationConducmMultiProfessional
 from apps.accounts.models_password_reset import PasswordResetToken
@@ -20,17 +22,69 @@ ROLE_CHOICES = [
     ("Nutricionista", "Nutricionista"),
 ]
 
+#Profiles=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+class ProfileQuerySet(SoftDeleteQuerySet): #* Excluir/restaurar perfis em lote muda o papel dos users (ver signals.py)
+    ROLE_FIELDS = {'is_deleted', 'user', 'user_id'}
+
+    def update(self, **kwargs):
+        user_ids = []
+        if self.ROLE_FIELDS & set(kwargs):
+            user_ids = list(self.values_list('user_id', flat=True))
+        rows = super().update(**kwargs)
+        if rows and user_ids:
+            bump_role_versions(user_ids)
+        return rows
+
+
+class ProfileManager(ActiveManager):
+    queryset_class = ProfileQuerySet
+
+
+class AllProfileManager(AllManager):
+    queryset_class = ProfileQuerySet
+
 #Patient=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
 class PatientUser(SingleProfileMixin, BaseModel, SocialdemographicData, LifeStyle, PsychosocialRisks,
                 EnvironmentalRisks, PhysicalMotorRisks, ClassificationConducmMultiProfessional):
     class Meta:
         verbose_name = "Paciente"
         verbose_name_plural = 'Pacientes'
+        indexes = [ #* Índice parcial: só pacientes ativos, na ordem da listagem (-created_at, -id)
+            models.Index(fields=['created_at', 'id'], condition=models.Q(is_deleted=False), name='patient_active_idx'),
+            #* Busca por prefixo (?search=) no PostgreSQL: LIKE 'x%' só usa índice com pattern_ops
+            models.Index(fields=['cpf'], opclasses=['varchar_pattern_ops'], name='patient_cpf_prefix_idx'),
+            models.Index(fields=['sus'], opclasses=['varchar_pattern_ops'], name='patient_sus_prefix_idx'),
+            models.Index(fields=['search_name'], opclasses=['varchar_pattern_ops'], name='patient_name_prefix_idx'),
+            models.Index(fields=['search_phone'], opclasses=['varchar_pattern_ops'], name='patient_phone_prefix_idx'),
+        ]
+        constraints = [ #* CPF/SUS únicos entre os pacientes ativos (NULLs e soft deleted não conflitam)
+            models.UniqueConstraint(fields=['cpf'], condition=models.Q(is_deleted=False), name='unique_active_patient_cpf'),
+            models.UniqueConstraint(fields=['sus'], condition=models.Q(is_deleted=False), name='unique_active_patient_sus'),
+        ]
 
     user = models.OneToOneField(User, on_delete=models.CASCADE)
 
+    objects = ProfileManager()
+    all_objects = AllProfileManager()
+
+    #* Registros do paciente que saem junto com ele no soft delete (e voltam no restore)
+    soft_delete_cascade = ('appointment', 'alert', 'medication', 'pendency', 'has', 'dm', 'otherdcnt')
+
+    #* Colunas de busca (/patients/search/): nome sem acentos em minúsculas e telefone só com dígitos
+    search_name = models.CharField(max_length=301, blank=True, default='', editable=False)
+    search_phone = models.CharField(max_length=40, blank=True, default='', editable=False)
+
     def __str__(self):
         return f"Patient: {self.user.get_full_name()}"
+
+    def save(self, *args, **kwargs):
+        #* CPF/SUS guardados só com dígitos; em branco viram NULL, senão colidiriam nas constraints de unicidade
+        self.cpf = normalize_digits(self.cpf) or None
+        self.sus = normalize_digits(self.sus) or None
+        self.search_phone = normalize_digits(self.phone)
+        if self.user_id and kwargs.get('update_fields') is None: #* Saves parciais (ex.: soft delete) não recarregam o user
+            self.search_name = fold_text(self.user.get_full_name())
+        super().save(*args, **kwargs)
     
     def clean(self):
         super().clean()
@@ -48,10 +102,16 @@ class ProfessionalUser(SingleProfileMixin, BaseModel):
     class Meta: 
         verbose_name = "Profissional"
         verbose_name_plural = "Profissionais"
+        indexes = [
+            models.Index(fields=['created_at', 'id'], condition=models.Q(is_deleted=False), name='professional_active_idx'),
+        ]
 
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     role = models.CharField(choices=ROLE_CHOICES, max_length=100)
 
+    objects = ProfileManager()
+    all_objects = AllProfileManager()
+
     def __str__(self):
         return f"{self.role}: {self.user.get_full_name()}"
 
@@ -76,6 +136,9 @@ class ManagerUser(SingleProfileMixin, BaseModel):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     phone = models.CharField(max_length=50)
 
+    objects = ProfileManager()
+    all_objects = AllProfileManager()
+
     def __str__(self):
         return f"Manager: {self.user.get_full_name()}"
     
@@ -0,0 +1,40 @@
+from django.db.models import Q
+from apps.accounts.utils.utils import fold_text, normalize_digits
+
+MIN_DIGITS = 3 #* Menos que isso casaria com boa parte da tabela
+MIN_CONTAINS_LENGTH = 3 #* O índice trigram só ajuda a partir de 3 caracteres
+
+
+def search_patients(queryset, query, limit):
+    """
+    Top-k pacientes para a busca rápida. Consultas só com números procuram por prefixo de CPF,
+    SUS e telefone; as demais procuram pelo nome sem acentos, primeiro por prefixo (quem começa
+    com o termo vem antes) e, se faltar resultado, por trecho do nome (índice trigram no PostgreSQL).
+    """
+    digits = normalize_digits(query)
+    terms = fold_text(query).split()
+
+    if digits and not any(char.isalpha() for char in query):
+        if len(digits) < MIN_DIGITS:
+            return []
+        condition = Q(cpf__startswith=digits) | Q(sus__startswith=digits) | Q(search_phone__startswith=digits)
+        return list(queryset.filter(condition).order_by('search_name')[:limit])
+
+    if not terms:
+        return []
+
+    #* "maria sil" casa com "maria da silva": primeiro termo no início, os outros no início de alguma palavra
+    prefix = Q(search_name__startswith=terms[0])
+    for term in terms[1:]:
+        prefix &= Q(search_name__contains=f' {term}')
+    results = list(queryset.filter(prefix).order_by('search_name')[:limit])
+
+    if len(results) < limit and max(len(term) for term in terms) >= MIN_CONTAINS_LENGTH:
+        contains = Q()
+        for term in terms:
+            contains &= Q(search_name__contains=term)
+        results += queryset.filter(contains).exclude(
+            pk__in=[patient.pk for patient in results]
+        ).order_by('search_name')[:limit - len(results)]
+
+    return results
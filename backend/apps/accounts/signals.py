@@ -0,0 +1,40 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.accounts.models import PatientUser, ProfessionalUser, ManagerUser
+from apps.accounts.utils.utils import bump_role_version, fold_text
+from apps.commons.cache import bump_table_versions
+
+#* Qualquer mudança que altere o papel do user invalida as claims de papel dos tokens já emitidos.
+
+@receiver(post_save, sender=PatientUser)
+@receiver(post_save, sender=ProfessionalUser)
+@receiver(post_save, sender=ManagerUser)
+@receiver(post_delete, sender=PatientUser)
+@receiver(post_delete, sender=ProfessionalUser)
+@receiver(post_delete, sender=ManagerUser)
+def invalidate_profile_role_claims(sender, instance, **kwargs):
+    if instance.user_id:
+        bump_role_version(instance.user_id)
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_role_claims(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'last_login'}: #* login não muda papel
+        return
+    bump_role_version(instance.pk)
+
+@receiver(post_save, sender=User)
+def refresh_patient_search_name(sender, instance, created=False, update_fields=None, **kwargs):
+    #* O nome usado na busca de pacientes vem do User; mantém a coluna desnormalizada em dia
+    if created or (update_fields and not set(update_fields) & {'first_name', 'last_name'}):
+        return
+    PatientUser.all_objects.filter(user=instance).update(search_name=fold_text(instance.get_full_name()))
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_table(sender, instance, update_fields=None, **kwargs):
+    #* User não é BaseModel: as respostas em cache que aninham o user (ex.: pacientes) dependem deste aviso
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    bump_table_versions(User)
@@ -0,0 +1,69 @@
+"""
+Testes para as claims de papel embutidas nos tokens JWT
+"""
+from django.core.cache import cache
+from django.contrib.auth.models import User
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.accounts.models import ManagerUser, ProfessionalUser
+from apps.accounts.utils.utils import ROLE_VERSION_CACHE_KEY
+
+
+@override_settings(SHARED_CACHE=True)
+class RoleClaimsAuthenticationTest(APITestCase):
+    """Testes para a autenticação baseada nas claims de papel"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='manager_jwt', password='senha-forte-123')
+        self.manager = ManagerUser.objects.create(user=self.user, phone='83999999999')
+
+    def login(self):
+        response = self.client.post('/api/token/', {'username': 'manager_jwt', 'password': 'senha-forte-123'})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_token_carries_role_claims(self):
+        """Testa que o access token traz papel e id do perfil"""
+        token = AccessToken(self.login()['access'])
+
+        self.assertEqual(token['role'], 'manager')
+        self.assertEqual(token['profile_id'], self.manager.pk)
+        self.assertIn('role_version', token.payload)
+
+    def test_request_authorized_without_user_or_profile_queries(self):
+        """Testa que a checagem de permissão não consulta User nem perfis"""
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.login()['access']}")
+
+        with self.assertNumQueries(3): #* apenas a ETag da lista, o queryset e o user aninhado do serializer
+            response = self.client.get('/api/v1/accounts/managers/')
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_role_change_invalidates_claims(self):
+        """Testa que uma mudança de papel faz o token antigo voltar a ser conferido no banco"""
+        tokens = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+
+        self.manager.delete()
+        ProfessionalUser.objects.create(user=self.user, role='Enfermeiro')
+
+        response = self.client.get('/api/v1/accounts/managers/')
+        self.assertEqual(response.status_code, 403)
+
+        self.client.credentials()
+        refreshed = self.client.post('/api/token/refresh/', {'refresh': tokens['refresh']})
+        self.assertEqual(refreshed.status_code, 200)
+        self.assertEqual(AccessToken(refreshed.data['access'])['role'], 'professional')
+
+    @override_settings(SHARED_CACHE=False)
+    def test_local_cache_always_checks_database(self):
+        """Testa que, com cache local, o papel vem do banco mesmo com a versão do token ainda no cache"""
+        access = self.login()['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        self.manager.delete()
+        #* Como em outro worker: a troca de versão feita pela exclusão não chegou ao cache deste processo
+        cache.set(ROLE_VERSION_CACHE_KEY.format(self.user.pk), AccessToken(access)['role_version'])
+
+        self.assertEqual(self.client.get('/api/v1/accounts/managers/').status_code, 403)
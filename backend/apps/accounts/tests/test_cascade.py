@@ -0,0 +1,95 @@
+"""
+Testes para a cascata do soft delete a partir do paciente
+"""
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now, timedelta
+from rest_framework.test import APITestCase
+from apps.accounts.models import PatientUser, ProfessionalUser
+from apps.alerts.models import Alert
+from apps.appointments.models import Appointment
+from apps.conditions.models import DM, HAS, OtherDCNT
+from apps.medications.models import Medication
+from apps.pendencies.models import Pendency
+
+
+class PatientCascadeTest(TestCase):
+    """Testes para soft_delete_cascade do PatientUser"""
+
+    def setUp(self):
+        self.professional = ProfessionalUser.objects.create(user=User.objects.create_user(username='prof'), role='Enfermeiro')
+
+    def create_patient(self, username, hour=8):
+        patient = PatientUser.objects.create(user=User.objects.create_user(username=username))
+        Appointment.objects.create(
+            patient=patient, professional=self.professional, risk_level='Seguro', type='Consulta',
+            scheduled_datetime=(now() + timedelta(days=1)).replace(hour=hour, minute=0),
+        )
+        Alert.objects.create(patient=patient, title='Alerta', description='PA elevada')
+        Medication.objects.create(patient=patient, name='Losartana', description='50mg', end_date=now().date())
+        Pendency.objects.create(patient=patient, description='Exame')
+        HAS.objects.create(patient=patient)
+        DM.objects.create(patient=patient)
+        OtherDCNT.objects.create(patient=patient, name='Asma')
+        return patient
+
+    def related_querysets(self, patients):
+        return [model.objects.filter(patient__in=patients) for model in (Appointment, Alert, Medication, Pendency, HAS, DM, OtherDCNT)]
+
+    def test_delete_and_restore_follow_the_patient(self):
+        """Testa que os registros do paciente saem e voltam junto com ele"""
+        patient = self.create_patient('paciente')
+        patient.delete()
+
+        self.assertFalse(any(queryset.exists() for queryset in self.related_querysets([patient])))
+        self.assertEqual(Medication.all_objects.get(patient=patient).deleted_at, PatientUser.all_objects.get(pk=patient.pk).deleted_at)
+
+        patient.restore()
+        self.assertTrue(all(queryset.count() == 1 for queryset in self.related_querysets([patient])))
+
+    def test_restore_keeps_rows_deleted_before(self):
+        """Testa que o restore não traz de volta registros excluídos antes do paciente"""
+        patient = self.create_patient('paciente')
+        Alert.objects.get(patient=patient).delete()
+
+        PatientUser.objects.filter(pk=patient.pk).delete()
+        PatientUser.all_objects.filter(pk=patient.pk).restore()
+
+        self.assertFalse(Alert.objects.filter(patient=patient).exists())
+        self.assertTrue(Medication.objects.filter(patient=patient).exists())
+
+    def test_queryset_cascade_is_set_based(self):
+        """Testa que a cascata custa o mesmo número de queries para 1 ou 3 pacientes"""
+        first = self.create_patient('um')
+        with CaptureQueriesContext(connection) as baseline:
+            PatientUser.objects.filter(pk=first.pk).delete()
+
+        others = [self.create_patient(f'outro{index}', hour=9 + index) for index in range(3)]
+        with CaptureQueriesContext(connection) as grown:
+            PatientUser.objects.filter(pk__in=[patient.pk for patient in others]).delete()
+
+        self.assertEqual(len(grown.captured_queries), len(baseline.captured_queries))
+        self.assertFalse(any(queryset.exists() for queryset in self.related_querysets(others)))
+
+
+class PatientRestoreAPITest(APITestCase):
+    """Testes para o restore do paciente pela API quando a cascata encontra conflito de agenda"""
+
+    def test_conflicting_appointment_returns_400(self):
+        """Testa que o horário remarcado para outro paciente faz o restore voltar 400 e não restaurar nada"""
+        self.client.force_authenticate(User.objects.create_superuser(username='admin', password='123456'))
+        professional = ProfessionalUser.objects.create(user=User.objects.create_user(username='prof'), role='Enfermeiro')
+        scheduled = (now() + timedelta(days=1)).replace(hour=8, minute=0, second=0, microsecond=0)
+        patient, other = (PatientUser.objects.create(user=User.objects.create_user(username=name)) for name in ('um', 'dois'))
+        fields = {'professional': professional, 'scheduled_datetime': scheduled, 'risk_level': 'Seguro', 'type': 'Consulta'}
+        Appointment.objects.create(patient=patient, **fields)
+
+        patient.delete()
+        Appointment.objects.create(patient=other, **fields) #* O horário liberado foi ocupado por outro paciente
+
+        response = self.client.patch(f'/api/v1/accounts/patients/{patient.pk}/restore/')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('já tem um agendamento', response.data['detail'][0])
+        self.assertTrue(PatientUser.all_objects.get(pk=patient.pk).is_deleted)
@@ -0,0 +1,103 @@
+"""
+Testes para a importação em lote de pacientes (CSV)
+"""
+import os
+import tempfile
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from rest_framework.test import APITestCase
+from apps.accounts.models import PatientUser, ProfessionalUser
+from apps.locations.models import MicroArea
+
+CSV_CONTENT = """nome;cpf;cartão sus;data de nascimento;telefone;micro área;uf;cidade;bairro;rua;número;senha
+José Araújo;123.456.789-00;700000000000001;31/12/1960;(83) 99999-0000;Micro-Área 1;PB;Campina Grande;Centro;Rua A;10;
+Maria Souza;98765432100;;1975-05-20;;;;;;;;segredo-123
+João Lima;98765432100;;;;;;;;;;
+Ana Costa;11122233344;;30/02/1980;;;;;;;;
+Pedro Alves;55566677788;;;;Inexistente;PB;Campina Grande;;Rua B;;
+Carla Dias;00011122233;;;;;;;;;;
+"""
+
+
+class PatientImportTest(APITestCase):
+    """Testes para /api/v1/accounts/patients/import/ e o comando import_patients"""
+
+    URL = '/api/v1/accounts/patients/import/'
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', password='123456')
+        self.client.force_authenticate(self.admin)
+        self.micro_area = MicroArea.objects.create(name='Micro-Área 1')
+        PatientUser.objects.create(user=User.objects.create_user(username='00011122233'), cpf='00011122233')
+
+    def upload(self, content=CSV_CONTENT, **data):
+        file = SimpleUploadedFile('pacientes.csv', content.encode('utf-8'), content_type='text/csv')
+        return self.client.post(self.URL, {'file': file, **data}, format='multipart')
+
+    def test_import_creates_valid_rows_and_reports_errors(self):
+        """Testa que as linhas válidas são gravadas e as inválidas reportadas com o número da linha"""
+        response = self.upload()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['rows'], 6)
+        self.assertEqual(response.data['created'], 2)
+        errors = {error['row']: set(error['errors']) for error in response.data['errors']}
+        self.assertEqual(errors, {4: {'cpf'}, 5: {'data_nascimento'}, 6: {'micro_area', 'endereco'}, 7: {'cpf'}})
+
+        jose = PatientUser.objects.select_related('user', 'address').get(cpf='12345678900')
+        self.assertEqual((jose.user.username, jose.user.first_name, jose.user.last_name), ('12345678900', 'José', 'Araújo'))
+        self.assertEqual(jose.micro_area, self.micro_area)
+        self.assertEqual(jose.address.street, 'Rua A')
+        self.assertEqual((jose.search_name, jose.search_phone), ('jose araujo', '83999990000'))
+        self.assertEqual(jose.created_by, self.admin)
+        self.assertFalse(jose.user.has_usable_password())
+
+        maria = User.objects.get(username='98765432100')
+        self.assertTrue(maria.check_password('segredo-123'))
+
+    def test_column_limits_are_reported_per_row(self):
+        """Testa que tamanho das colunas, CEP e e-mail viram erro de linha em vez de derrubar o lote"""
+        content = (
+            "nome;cpf;email;telefone;uf;cidade;bairro;rua;número;cep\n"
+            f"Rui Lima;22233344455;rui@;{'9' * 60};PB;{'C' * 101};Centro;Rua A;10;58400\n"
+            "Lia Lima;22233344466;lia@example.com;83999990000;PB;Campina Grande;Centro;Rua A;10;58400-000\n"
+        )
+        response = self.upload(content)
+
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['errors'], [
+            {'row': 2, 'errors': {'cep': 'CEP deve estar no formato 00000-000', 'email': 'E-mail inválido.',
+                                  'telefone': 'Máximo de 40 caracteres.', 'cidade': 'Máximo de 100 caracteres.'}},
+        ])
+
+    def test_generated_passwords_are_returned(self):
+        """Testa que, com generate_passwords, as senhas geradas voltam no relatório e funcionam"""
+        response = self.upload(generate_passwords='true')
+
+        generated = {entry['cpf']: entry['password'] for entry in response.data['passwords']}
+        self.assertEqual(set(generated), {'12345678900'})
+        self.assertTrue(User.objects.get(username='12345678900').check_password(generated['12345678900']))
+
+    def test_only_managers_can_import(self):
+        """Testa que profissionais não podem importar"""
+        professional = ProfessionalUser.objects.create(user=User.objects.create_user(username='prof'), role='Enfermeiro')
+        self.client.force_authenticate(professional.user)
+        self.assertEqual(self.upload().status_code, 403)
+
+    def test_missing_columns(self):
+        """Testa que um arquivo sem as colunas obrigatórias é recusado"""
+        response = self.upload('nome;telefone\nJosé;8399999\n')
+        self.assertEqual(response.status_code, 400)
+
+    def test_management_command(self):
+        """Testa o comando import_patients com um arquivo em disco"""
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as file:
+            file.write(CSV_CONTENT)
+        self.addCleanup(os.remove, file.name)
+
+        call_command('import_patients', file.name, '--chunk-size', '2', '--workers', '1', stdout=StringIO(), stderr=StringIO())
+
+        self.assertTrue(PatientUser.objects.filter(cpf='98765432100').exists())
+        self.assertEqual(PatientUser.objects.count(), 3)
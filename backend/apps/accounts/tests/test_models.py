@@ -3,7 +3,7 @@ Testes para modelos do app accounts
 """
 from django.test import TestCase
 from django.contrib.auth.models import User
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 from django.core.exceptions import ValidationError
 from apps.accounts.models import PatientUser, ProfessionalUser, ManagerUser
 
@@ -50,7 +50,20 @@ class PatientUserModelTest(TestCase):
         
         with self.assertRaises(IntegrityError):
             PatientUser.objects.create(user=self.user)
-    
+
+    def test_cpf_unique_among_active_patients(self):
+        """Testa que o CPF é único só entre pacientes ativos e que CPFs em branco não conflitam"""
+        patient = PatientUser.objects.create(user=self.user, cpf='12345678900', sus='')
+        other_user = User.objects.create_user(username='patient_test_2')
+
+        self.assertIsNone(patient.sus)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            PatientUser.objects.create(user=other_user, cpf='12345678900')
+
+        PatientUser.objects.create(user=User.objects.create_user(username='patient_test_3'), cpf='', sus='')
+        patient.delete()
+        PatientUser.objects.create(user=other_user, cpf='12345678900')
+
     def test_soft_delete_functionality(self):
         """Testa funcionalidade de soft delete"""
         patient = PatientUser.objects.create(user=self.user)
@@ -0,0 +1,43 @@
+"""
+Testes para a resolução de perfis usada pelas permissões
+"""
+from types import SimpleNamespace
+from django.test import TestCase
+from django.contrib.auth.models import User
+from apps.accounts.models import PatientUser, ManagerUser
+from apps.accounts.utils.utils import get_request_profile, get_request_profiles, get_user_profile
+from apps.commons.api.v1.permissions import BaseRolePermission
+
+
+class RequestProfileResolutionTest(TestCase):
+    """Testes para o cache de perfil por requisição"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='manager_test', password='123456')
+        self.manager = ManagerUser.objects.create(user=self.user, phone='83999999999')
+
+    def test_profile_resolved_with_single_query(self):
+        """Testa que várias checagens de papel custam apenas uma query"""
+        request = SimpleNamespace(user=User.objects.get(pk=self.user.pk))
+        permission = BaseRolePermission()
+
+        with self.assertNumQueries(1):
+            self.assertTrue(permission.is_manager(request))
+            self.assertFalse(permission.is_professional(request))
+            self.assertFalse(permission.is_patient(request))
+            self.assertEqual(get_request_profile(request), ('manager', self.manager))
+            self.assertEqual(list(get_request_profiles(request)), ['manager'])
+
+    def test_soft_deleted_profile_is_ignored(self):
+        """Testa que um perfil soft-deletado não concede papel"""
+        user = User.objects.create_user(username='patient_test')
+        patient = PatientUser.objects.create(user=user)
+        patient.delete()
+
+        self.assertEqual(get_user_profile(user), (None, None))
+
+    def test_superuser_without_profile(self):
+        """Testa que superusuários sem perfil recebem o papel superuser"""
+        admin = User.objects.create_superuser(username='admin', password='123456')
+
+        self.assertEqual(get_user_profile(admin), ('superuser', None))
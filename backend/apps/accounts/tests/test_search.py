@@ -0,0 +1,98 @@
+"""
+Testes para a busca rápida de pacientes e para o check-cpf
+"""
+import importlib
+from contextlib import redirect_stdout
+from io import StringIO
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APITestCase
+from apps.accounts.models import PatientUser
+
+documents_migration = importlib.import_module('apps.accounts.migrations.0007_patientuser_sus_and_indexes')
+search_migration = importlib.import_module('apps.accounts.migrations.0009_patient_search')
+
+
+class PatientSearchTest(APITestCase):
+    """Testes para /api/v1/accounts/patients/search/"""
+
+    URL = '/api/v1/accounts/patients/search/'
+
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_superuser(username='admin', password='123456'))
+        self.jose = self.create_patient('jose', 'José', 'Araújo da Silva', cpf='123.456.789-00', phone='(83) 99876-5432')
+        self.maria = self.create_patient('maria', 'Maria', 'Josefina Souza', cpf='98765432100', sus='700000000000001')
+        self.ana = self.create_patient('ana', 'Ana', 'Silveira', cpf='11122233344')
+
+    def create_patient(self, username, first_name, last_name, **fields):
+        user = User.objects.create_user(username=username, first_name=first_name, last_name=last_name)
+        return PatientUser.objects.create(user=user, **fields)
+
+    def search(self, query):
+        response = self.client.get(self.URL, {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_documents_are_normalized(self):
+        """Testa que CPF/SUS são guardados e buscados só com dígitos"""
+        self.assertEqual(self.jose.cpf, '12345678900')
+        self.assertEqual(self.search('123.456'), [self.jose.id])
+        self.assertEqual(self.search('7000'), [self.maria.id])
+        self.assertEqual(self.search('83 9987'), [self.jose.id])
+
+    def test_accent_folded_names_prefix_first(self):
+        """Testa que a busca ignora acentos e lista primeiro quem começa com o termo"""
+        self.assertEqual(self.search('JOSE'), [self.jose.id, self.maria.id])
+        self.assertEqual(self.search('araujo'), [self.jose.id])
+        self.assertEqual(self.search('jose silva'), [self.jose.id])
+
+    def test_name_change_updates_search(self):
+        """Testa que alterar o nome do User atualiza a coluna de busca"""
+        self.ana.user.first_name = 'Ângela'
+        self.ana.user.save()
+        self.assertEqual(self.search('angela'), [self.ana.id])
+
+    def test_missing_query(self):
+        """Testa que a busca exige o parâmetro q"""
+        self.assertEqual(self.client.get(self.URL).status_code, 400)
+
+    def test_check_cpf_single_lookup(self):
+        """Testa que o check-cpf aceita máscara e resolve o paciente em uma query"""
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/v1/accounts/patients/check-cpf/', {'cpf': '987.654.321-00'})
+
+        self.assertTrue(response.data['exists'])
+        self.assertEqual(response.data['patient'], {'id': self.maria.id, 'name': 'Maria Josefina Souza'})
+
+
+class DocumentMigrationTest(TestCase):
+    """Testes para as migrações que tratam CPF/SUS"""
+
+    def create_patient(self, username, cpf):
+        patient = PatientUser.objects.create(user=User.objects.create_user(username=username))
+        PatientUser.all_objects.filter(pk=patient.pk).update(cpf=cpf) #* Como antes das migrações, sem normalizar
+        return patient
+
+    def test_duplicate_guard_compares_digits(self):
+        """Testa que a 0007 recusa o mesmo CPF com e sem máscara em pacientes ativos"""
+        first, second = self.create_patient('a', '12345678900'), self.create_patient('b', '123.456.789-00')
+        self.create_patient('c', '111.222.333-44')
+
+        with self.assertRaisesMessage(RuntimeError, f'CPF 12345678900: pacientes {first.pk}, {second.pk}'):
+            documents_migration.blank_documents_to_null(apps, None)
+
+    def test_backfill_reports_documents_kept_masked(self):
+        """Testa que a 0009 informa o CPF que ficou com máscara por já pertencer a outro paciente"""
+        holder = self.create_patient('a', '12345678900')
+        holder.delete()
+        masked, other = self.create_patient('b', '123.456.789-00'), self.create_patient('c', '111.222.333-44')
+
+        out = StringIO()
+        with redirect_stdout(out):
+            search_migration.backfill_search_columns(apps, None)
+
+        self.assertEqual(PatientUser.objects.get(pk=other.pk).cpf, '11122233344')
+        self.assertEqual(PatientUser.objects.get(pk=masked.pk).cpf, '123.456.789-00')
+        self.assertIn('1 documento(s) ficaram com máscara', out.getvalue())
+        self.assertIn(f"paciente {masked.pk} cpf: '123.456.789-00' (dígitos já usados pelo paciente {holder.pk})", out.getvalue())
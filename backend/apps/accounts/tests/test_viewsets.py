@@ -0,0 +1,53 @@
+"""
+Testes para as rotas de contas (orçamento de queries das listagens)
+"""
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from apps.accounts.models import PatientUser
+from apps.conditions.models import HAS, DM, OtherDCNT
+from apps.locations.models import Address, MicroArea
+
+
+class PatientListQueryBudgetTest(APITestCase):
+    """Testa que a listagem de pacientes não cresce em queries com o número de linhas"""
+
+    URL = '/api/v1/accounts/patients/'
+
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_superuser(username='admin', password='123456'))
+        self.micro_area = MicroArea.objects.create(name='Micro-Área 1')
+        self.total = 0
+
+    def create_patients(self, amount):
+        for _ in range(amount):
+            self.total += 1
+            user = User.objects.create_user(username=f'paciente{self.total}', first_name='Paciente')
+            address = Address.objects.create(uf='PB', city='Campina Grande', district='Centro', street='Rua A', number=self.total)
+            patient = PatientUser.objects.create(user=user, address=address, micro_area=self.micro_area, cpf=f'{self.total:011d}')
+            HAS.objects.create(patient=patient)
+            DM.objects.create(patient=patient)
+            OtherDCNT.objects.create(patient=patient, name='Asma')
+
+    def count_list_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), self.total)
+        return len(context.captured_queries)
+
+    def test_list_query_count_does_not_grow_with_rows(self):
+        """Testa que 2 e 8 pacientes custam o mesmo número de queries"""
+        self.create_patients(2)
+        baseline = self.count_list_queries()
+
+        self.create_patients(6)
+        self.assertEqual(self.count_list_queries(), baseline)
+
+    def test_conditions_from_annotation(self):
+        """Testa que as condições continuam sendo exibidas a partir do plano de carregamento"""
+        self.create_patients(1)
+        response = self.client.get(self.URL)
+
+        self.assertEqual(response.data['results'][0]['conditions'], 'HAS / DM / OUTRAS DCNTs')
@@ -1,6 +1,18 @@
 
+import re
+import unicodedata
+from uuid import uuid4
+from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 
+def normalize_digits(value): #* Mantém apenas os dígitos (CPF, SUS e telefone com ou sem máscara)
+    return re.sub(r"\D+", "", value or "")
+
+def fold_text(value): #* Minúsculas, sem acentos e com espaços simples: "  José  Araújo" -> "jose araujo"
+    decomposed = unicodedata.normalize("NFKD", value or "")
+    return " ".join("".join(char for char in decomposed if not unicodedata.combining(char)).lower().split())
+
 def get_creator_profile(user):  #* retorna o tipo de user que criou o objeto
         if not user.created_by:
             return None #* se created_by não estiver definino retorna None
@@ -17,21 +29,82 @@ def get_creator_profile(user):  #* retorna o tipo de user que criou o objeto
                 return model.objects.filter(user=user.created_by).first()
         return None
 
-def get_user_profile(user):
-    if hasattr(user, 'patientuser'):
-        return 'patient', user.patientuser  
-    
-    elif hasattr(user, 'professionaluser'):
-        return 'professional', user.professionaluser
-    
-    elif hasattr(user, 'manageruser'):
-        return 'manager', user.manageruser
-    
-    elif user.is_superuser:
+#* Relações one-to-one reversas do User para cada perfil, na ordem de precedência dos papéis
+PROFILE_RELATIONS = (
+    ('patient', 'patientuser'),
+    ('professional', 'professionaluser'),
+    ('manager', 'manageruser'),
+)
+
+def get_user_profiles(user): #* retorna {papel: perfil} com os perfis ativos do user usando uma única query
+    if user is None or not user.is_authenticated or not user.pk:
+        return {}
+
+    preloaded = getattr(user, '_profiles_cache', None) #* Users montados a partir das claims do JWT já trazem os perfis
+    if preloaded is not None:
+        return preloaded
+
+    from django.contrib.auth.models import User
+
+    relations = [relation for _, relation in PROFILE_RELATIONS]
+    loaded = User.objects.select_related(*relations).filter(pk=user.pk).first()
+    if loaded is None:
+        return {}
+
+    profiles = {}
+    for role, relation in PROFILE_RELATIONS:
+        profile = getattr(loaded, relation, None) #* RelatedObjectDoesNotExist também é AttributeError
+        if profile is not None and not profile.is_deleted:
+            profiles[role] = profile
+    return profiles
+
+def _pick_profile(user, profiles):
+    for role, _ in PROFILE_RELATIONS:
+        if role in profiles:
+            return role, profiles[role]
+
+    if getattr(user, 'is_superuser', False):
         return 'superuser', None
-    
+
     return None, None
 
+def get_user_profile(user):
+    return _pick_profile(user, get_user_profiles(user))
+
+def get_request_profiles(request): #* Resolve os perfis uma única vez por requisição e guarda o resultado no request
+    profiles = getattr(request, '_profiles_cache', None)
+    if profiles is None:
+        profiles = get_user_profiles(request.user)
+        request._profiles_cache = profiles
+    return profiles
+
+def get_request_profile(request): #* (papel, perfil) do usuário da requisição, sem queries extras após a primeira
+    return _pick_profile(request.user, get_request_profiles(request))
+
+#* Versão das claims de papel do user. Os tokens carregam a versão vigente quando foram emitidos; qualquer
+#* mudança de papel troca a versão e os tokens antigos deixam de ser confiáveis até o próximo refresh.
+ROLE_VERSION_CACHE_KEY = 'accounts:role_version:{}'
+
+def get_role_version(user_id):
+    return cache.get(ROLE_VERSION_CACHE_KEY.format(user_id))
+
+def ensure_role_version(user_id): #* Retorna a versão atual, criando uma se o cache ainda não tiver nenhuma
+    key = ROLE_VERSION_CACHE_KEY.format(user_id)
+    version = uuid4().hex
+    if cache.add(key, version, settings.ROLE_CLAIMS_VERSION_TIMEOUT):
+        return version
+    return cache.get(key) or version
+
+def seed_role_version(user_id, version): #* Reaproveita a versão de um token já conferido com o banco
+    cache.add(ROLE_VERSION_CACHE_KEY.format(user_id), version, settings.ROLE_CLAIMS_VERSION_TIMEOUT)
+
+def bump_role_version(user_id):
+    cache.set(ROLE_VERSION_CACHE_KEY.format(user_id), uuid4().hex, settings.ROLE_CLAIMS_VERSION_TIMEOUT)
+
+def bump_role_versions(user_ids): #* Versão em lote, para escritas que mudam o papel de vários users de uma vez
+    cache.set_many({ROLE_VERSION_CACHE_KEY.format(user_id): uuid4().hex for user_id in user_ids},
+                   settings.ROLE_CLAIMS_VERSION_TIMEOUT)
+
 class SingleProfileMixin: #* Mixin para permitir apenas a criação de um tipo de perfil por user
 
     def clean(self):
@@ -6,6 +6,6 @@ from apps.alerts.models import Alert
 # Register your models here.
 @admin.register(Alert)
 class AlertAdmin(BaseModelAdmin):
-    list_display = ('id', 'title', 'risk_level', 'is_deleted', 'created_by', 'created_at')
-    list_filter = ('risk_level', 'is_deleted')
+    list_display = ('id', 'title', 'risk_level', 'rule', 'is_deleted', 'created_by', 'created_at')
+    list_filter = ('risk_level', 'rule', 'is_deleted')
     search_fields = ('title', 'description')
\ No newline at end of file
@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from apps.alerts.models import Alert
 from apps.accounts.models import PatientUser
-from apps.accounts.api.v1.serializers import PatientUserSerializer
+from apps.accounts.api.v1.serializers import PatientUserSerializer, PatientSummarySerializer
+from apps.commons.api.v1.serializers import ExpandableFieldsMixin
 
 class AlertSerializer(serializers.ModelSerializer):
     patient = PatientUserSerializer(read_only=True)
@@ -16,13 +17,14 @@ class AlertSerializer(serializers.ModelSerializer):
             "risk_level",
             "title",
             "description",
+            "rule",
             "created_at",
             "created_by",
             "deleted_by",
             "deleted_at",
             "is_deleted"
         ]
-        read_only_fields = ["patient", "created_at", "created_by", "deleted_by", "deleted_at", "is_deleted"]
+        read_only_fields = ["patient", "rule", "created_at", "created_by", "deleted_by", "deleted_at", "is_deleted"]
 
     def create(self, validated_data):
         cpf = validated_data.pop("cpf")
@@ -40,3 +42,11 @@ class AlertSerializer(serializers.ModelSerializer):
         alert = Alert(patient=patient, **validated_data)
         alert.save(user=created_by)
         return alert
+
+
+class AlertListSerializer(ExpandableFieldsMixin, AlertSerializer):
+    """Forma compacta da listagem; ?expand=patient devolve o paciente completo."""
+    patient = PatientSummarySerializer(read_only=True)
+
+    class Meta(AlertSerializer.Meta):
+        expandable_fields = {"patient": PatientUserSerializer}
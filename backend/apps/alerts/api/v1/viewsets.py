@@ -1,34 +1,45 @@
+from django.db.models import Prefetch
 from drf_spectacular.utils import extend_schema
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
+from apps.accounts.api.v1.serializers import with_patient_relations
+from apps.accounts.models import PatientUser
 from apps.alerts.models import Alert
 from apps.commons.api.v1.viewsets import BaseModelViewSet
-from .serializers import AlertSerializer
+from .serializers import AlertSerializer, AlertListSerializer
 from .permissions import AlertDataPermission
-from apps.accounts.utils.utils import get_user_profile
+from apps.accounts.utils.utils import get_request_profile
 
 @extend_schema(tags=['Alerts'])
 class AlertViewset(BaseModelViewSet):
     permission_classes = [IsAuthenticated, AlertDataPermission]
     queryset = Alert.objects
     serializer_class = AlertSerializer
+    list_serializer_class = AlertListSerializer
+    filter_fields = BaseModelViewSet.filter_fields + ('patient', 'risk_level')
+    search_fields = ('patient__user__first_name', 'patient__user__last_name', 'patient__cpf__startswith')
 
     def get_queryset(self):
         queryset = super().get_queryset()
 
+        if self.action == 'list' and not self.get_expand():
+            own_fields = [field.name for field in Alert._meta.concrete_fields]
+            queryset = queryset.select_related('patient__user').only(
+                *own_fields, 'patient__cpf', 'patient__user__first_name', 'patient__user__last_name'
+            )
+        else: #* Paciente completo: uma query a mais, já com a anotação de outras DCNTs (sem N+1)
+            queryset = queryset.prefetch_related(Prefetch('patient', queryset=with_patient_relations(PatientUser.all_objects)))
+
         user = getattr(self.request, "user", None)
         if not user or not user.is_authenticated:
             return queryset.none()
 
-        try:
-            role, profile = get_user_profile(user)
-        except Exception:
-            role, profile = (None, None)
+        role, profile = get_request_profile(self.request)
 
-        if user.is_superuser or hasattr(user, "manageruser") or hasattr(user, "professionaluser"):
+        if role in ('superuser', 'manager', 'professional'):
             return queryset
 
-        if hasattr(user, "patientuser"):
-            return queryset.filter(patient=getattr(user, "patientuser"))
+        if role == 'patient':
+            return queryset.filter(patient=profile)
 
         return queryset.none()
\ No newline at end of file
@@ -0,0 +1,8 @@
+from apps.alerts.rules import evaluate_rules
+from apps.commons.jobs import periodic_job
+
+
+@periodic_job('evaluate_alert_rules', interval=60 * 15)
+def evaluate_alert_rules(moment):
+    """Avaliação incremental das regras de alerta (só os pacientes com HAS/DM alterados)."""
+    return sum(result.created + result.resolved for result in evaluate_rules())
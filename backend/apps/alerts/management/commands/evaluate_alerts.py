@@ -0,0 +1,16 @@
+from time import monotonic
+from django.core.management.base import BaseCommand
+from apps.alerts.rules import evaluate_rules
+
+
+class Command(BaseCommand):
+    help = 'Avalia as regras de alerta sobre HAS/DM, abrindo e resolvendo alertas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Avalia toda a população, não só o que mudou')
+
+    def handle(self, *args, **options):
+        started = monotonic()
+        for result in evaluate_rules(full=options['full']):
+            self.stdout.write(f'{result.name}: {result.created} abertos, {result.resolved} resolvidos')
+        self.stdout.write(f'Concluído em {monotonic() - started:.2f}s.')
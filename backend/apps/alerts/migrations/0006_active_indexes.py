@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0007_patientuser_sus_and_indexes"),
+        ("alerts", "0005_alter_alert_risk_level"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="alert",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["created_at", "id"],
+                name="alert_active_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="alert",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["risk_level", "created_at"],
+                name="alert_risk_active_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0009_patient_search"),
+        ("alerts", "0006_active_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AlertRuleRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("started_at", models.DateTimeField(db_index=True)),
+                ("full", models.BooleanField(default=False)),
+                ("created", models.PositiveIntegerField(default=0)),
+                ("resolved", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Execução das regras de alerta",
+                "verbose_name_plural": "Execuções das regras de alerta",
+                "get_latest_by": "started_at",
+            },
+        ),
+        migrations.AddField(
+            model_name="alert",
+            name="rule",
+            field=models.CharField(
+                blank=True, editable=False, max_length=50, null=True
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="alert",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("is_deleted", False), ("rule__isnull", False)),
+                fields=("rule", "patient"),
+                name="unique_open_rule_alert",
+            ),
+        ),
+    ]
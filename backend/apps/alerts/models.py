@@ -13,15 +13,42 @@ class Alert(BaseModel):
     class Meta:
         verbose_name = "Alerta"
         verbose_name_plural = "Alertas"
+        indexes = [ #* A listagem usa Alert.objects, então os índices só cobrem os alertas em aberto
+            models.Index(fields=['created_at', 'id'], condition=models.Q(is_deleted=False), name='alert_active_idx'),
+            models.Index(fields=['risk_level', 'created_at'], condition=models.Q(is_deleted=False), name='alert_risk_active_idx'),
+        ]
+        constraints = [ #* No máximo um alerta aberto por paciente e regra (ver apps/alerts/rules.py)
+            models.UniqueConstraint(
+                fields=['rule', 'patient'], condition=models.Q(is_deleted=False, rule__isnull=False),
+                name='unique_open_rule_alert',
+            ),
+        ]
     
     patient = models.ForeignKey(PatientUser, on_delete=models.CASCADE, null=True, blank=True)
     title = models.CharField(max_length=150)
     description = models.TextField()
     risk_level = models.CharField(choices=RISK_CHOICES, max_length=20,  default='moderate')
+    rule = models.CharField(max_length=50, null=True, blank=True, editable=False) #* Regra que gerou o alerta; vazio nos criados à mão
 
     def __str__ (self):
         return f"[{self.risk_level}] {self.title}"
     
 #* Sugestão de melhoria futura:
 #* dependendo da necessidade criar dois campos resolved_by e resolved_at, mas acho que pode ser redundante ja que podemos usar o
-#* deleted_at e o deleted_by jutamente com o soft_delete do BaseModel para diferenciar os alertas Pendentes ou Resolvidos.
\ No newline at end of file
+#* deleted_at e o deleted_by jutamente com o soft_delete do BaseModel para diferenciar os alertas Pendentes ou Resolvidos.
+
+
+class AlertRuleRun(models.Model):
+    """Registro de cada avaliação das regras de alerta; a última marca de onde a próxima incremental parte."""
+    class Meta:
+        verbose_name = "Execução das regras de alerta"
+        verbose_name_plural = "Execuções das regras de alerta"
+        get_latest_by = 'started_at'
+
+    started_at = models.DateTimeField(db_index=True)
+    full = models.BooleanField(default=False)
+    created = models.PositiveIntegerField(default=0)
+    resolved = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.started_at:%d/%m/%Y %H:%M} (+{self.created} / -{self.resolved})"
@@ -0,0 +1,100 @@
+from collections import namedtuple
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils.timezone import now
+from apps.alerts.models import Alert, AlertRuleRun
+from apps.conditions.models import DM, HAS
+
+#* Motor de alertas: cada regra é uma condição (Q) sobre HAS ou DM, avaliada pelo banco de uma vez para
+#* toda a população; o Python só compara conjuntos de patient_id. Um alerta de regra fica aberto enquanto
+#* a condição vale (um por paciente e regra, ver unique_open_rule_alert) e é resolvido (soft delete) quando
+#* deixa de valer. Resolver um alerta à mão segura a regra até os dados do paciente mudarem de novo.
+Rule = namedtuple('Rule', 'name model condition title description risk_level')
+
+
+def any_of(fields, lookup, value):
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f'{field}__{lookup}': value})
+    return condition
+
+
+SYSTOLIC = ('BP_assessment1_1', 'BP_assessment2_1')
+DIASTOLIC = ('BP_assessment1_2', 'BP_assessment2_2')
+BP_CRISIS = any_of(SYSTOLIC, 'gte', 180) | any_of(DIASTOLIC, 'gte', 110)
+BP_HIGH = any_of(SYSTOLIC, 'gte', 140) | any_of(DIASTOLIC, 'gte', 90)
+
+RULES = [
+    Rule('has_bp_crisis', HAS, BP_CRISIS, 'Pressão arterial muito elevada',
+         'Aferição com PA ≥ 180/110 mmHg.', 'critical'),
+    Rule('has_bp_high', HAS, BP_HIGH & ~BP_CRISIS, 'Pressão arterial elevada',
+         'Aferição com PA ≥ 140/90 mmHg.', 'moderate'),
+    Rule('has_complication', HAS, Q(any_complications_HBP__isnull=False) & ~Q(any_complications_HBP=''),
+         'Complicação da hipertensão', 'Paciente com complicação relacionada à pressão alta.', 'critical'),
+    Rule('dm_glucose_high', DM, Q(random_glucose__gte=200), 'Glicemia capilar elevada',
+         'Glicemia capilar aleatória ≥ 200 mg/dL.', 'moderate'),
+    Rule('dm_hba1c_high', DM, Q(hba1c__gte=9), 'Hemoglobina glicada elevada',
+         'HbA1c ≥ 9%.', 'critical'),
+    Rule('dm_diabetic_foot', DM, Q(diabetic_foot=True), 'Pé diabético',
+         'Presença de pé diabético registrada.', 'critical'),
+]
+
+RuleResult = namedtuple('RuleResult', 'name created resolved')
+
+
+def matching(rule, patients=None):
+    """Queryset (em SQL) dos registros ativos de pacientes ativos que disparam a regra."""
+    queryset = rule.model.objects.filter(patient__isnull=False, patient__is_deleted=False)
+    if patients is not None:
+        queryset = queryset.filter(patient__in=patients)
+    return queryset.filter(rule.condition)
+
+
+def evaluate_rule(rule, patients=None, batch_size=1000):
+    """Abre os alertas que faltam e resolve os que não valem mais, só entre patients se informado."""
+    open_alerts = Alert.objects.filter(rule=rule.name)
+    if patients is not None:
+        open_alerts = open_alerts.filter(patient__in=patients)
+
+    #* Resolvido à mão depois da última alteração do registro: não reabre
+    dismissed = Alert.all_objects.filter(
+        rule=rule.name, patient=OuterRef('patient'), is_deleted=True, deleted_at__gte=OuterRef('updated_at'),
+    )
+    triggered = set(matching(rule, patients).exclude(Exists(dismissed)).values_list('patient_id', flat=True))
+    missing = triggered - set(open_alerts.values_list('patient_id', flat=True))
+    Alert.objects.bulk_create([
+        Alert(patient_id=patient_id, rule=rule.name, title=rule.title,
+              description=rule.description, risk_level=rule.risk_level)
+        for patient_id in sorted(missing)
+    ], batch_size=batch_size, ignore_conflicts=True) #* Outro worker pode ter aberto o mesmo alerta
+
+    resolved = open_alerts.exclude(patient__in=matching(rule, patients).values('patient_id')).delete()
+    return RuleResult(rule.name, len(missing), resolved)
+
+
+def changed_patients(since):
+    """Pacientes com HAS/DM criados, alterados ou excluídos desde since."""
+    changed = Q(updated_at__gte=since) | Q(deleted_at__gte=since)
+    return (HAS.all_objects.filter(changed, patient__isnull=False).order_by().values_list('patient_id', flat=True)
+            .union(DM.all_objects.filter(changed, patient__isnull=False).order_by().values_list('patient_id', flat=True)))
+
+
+def evaluate_rules(full=False, rules=RULES):
+    """
+    Avalia as regras e registra a execução. Incremental por padrão: só os pacientes cujos HAS/DM mudaram
+    desde o início da última execução; a primeira execução (ou full=True) avalia toda a população.
+    """
+    started_at = now()
+    last = AlertRuleRun.objects.order_by('-started_at').first()
+    patients = None
+    if last is not None and not full:
+        patients = list(changed_patients(last.started_at))
+
+    with transaction.atomic():
+        results = [evaluate_rule(rule, patients) for rule in rules]
+        AlertRuleRun.objects.create(
+            started_at=started_at, full=patients is None,
+            created=sum(result.created for result in results),
+            resolved=sum(result.resolved for result in results),
+        )
+    return results
@@ -0,0 +1,74 @@
+"""
+Testes para o motor de regras de alerta
+"""
+from django.contrib.auth.models import User
+from django.db.models import F
+from django.test import TestCase
+from apps.accounts.models import PatientUser
+from apps.alerts.models import Alert, AlertRuleRun
+from apps.alerts.rules import evaluate_rules
+from apps.conditions.models import DM, HAS
+
+
+class AlertRulesTest(TestCase):
+    """Testes para evaluate_rules"""
+
+    def create_patient(self, username):
+        return PatientUser.objects.create(user=User.objects.create_user(username=username))
+
+    def open_rules(self, patient):
+        return set(Alert.objects.filter(patient=patient).values_list('rule', flat=True))
+
+    def test_thresholds_open_alerts_once(self):
+        """Testa os limiares das regras e que avaliar de novo não duplica alertas"""
+        crisis, high, normal, diabetic = (self.create_patient(name) for name in ('crise', 'alta', 'normal', 'dm'))
+        HAS.objects.create(patient=crisis, BP_assessment1_1=185, BP_assessment1_2=100, any_complications_HBP='AVC')
+        HAS.objects.create(patient=high, BP_assessment2_1=130, BP_assessment2_2=95)
+        HAS.objects.create(patient=normal, BP_assessment1_1=120, BP_assessment1_2=80)
+        DM.objects.create(patient=diabetic, capillary_blood_glucose_random='250', glycated_hemoglobin='9,5', diabetic_foot=True)
+        DM.objects.create(patient=normal, capillary_blood_glucose_random='não medido', glycated_hemoglobin='6.1')
+
+        evaluate_rules()
+        evaluate_rules(full=True)
+
+        self.assertEqual(self.open_rules(crisis), {'has_bp_crisis', 'has_complication'})
+        self.assertEqual(self.open_rules(high), {'has_bp_high'})
+        self.assertEqual(self.open_rules(normal), set())
+        self.assertEqual(self.open_rules(diabetic), {'dm_glucose_high', 'dm_hba1c_high', 'dm_diabetic_foot'})
+        self.assertEqual(Alert.objects.count(), 6)
+        self.assertEqual(Alert.objects.get(patient=crisis, rule='has_bp_crisis').risk_level, 'critical')
+
+    def test_incremental_run_resolves_changed_rows(self):
+        """Testa que a execução incremental olha só os registros alterados e resolve o que normalizou"""
+        patient, untouched = self.create_patient('paciente'), self.create_patient('outro')
+        has = HAS.objects.create(patient=patient, BP_assessment1_1=150)
+        HAS.objects.create(patient=untouched, BP_assessment1_1=150)
+        evaluate_rules()
+
+        has.BP_assessment1_1 = 125
+        has.save()
+        HAS.objects.filter(patient=untouched).update(BP_assessment1_1=125, updated_at=F('updated_at')) #* Como um SQL direto: updated_at fica igual
+        results = evaluate_rules()
+
+        self.assertEqual(sum(result.resolved for result in results), 1)
+        self.assertEqual(self.open_rules(patient), set())
+        self.assertEqual(self.open_rules(untouched), {'has_bp_high'})
+
+        evaluate_rules(full=True)
+        self.assertEqual(self.open_rules(untouched), set())
+        self.assertEqual(list(AlertRuleRun.objects.values_list('full', flat=True).order_by('started_at')), [True, False, True])
+
+    def test_dismissed_alert_is_not_reopened(self):
+        """Testa que um alerta resolvido à mão só volta se os dados mudarem de novo"""
+        patient = self.create_patient('paciente')
+        has = HAS.objects.create(patient=patient, BP_assessment1_1=150)
+        evaluate_rules()
+        Alert.objects.get(patient=patient).delete()
+
+        evaluate_rules(full=True)
+        self.assertEqual(self.open_rules(patient), set())
+
+        has.BP_assessment1_1 = 160
+        has.save()
+        evaluate_rules()
+        self.assertEqual(self.open_rules(patient), {'has_bp_high'})
@@ -15,6 +15,7 @@ class AppointmentAdmin(BaseModelAdmin):
         'colored_risk',
         'status',
         'scheduled_datetime',
+        'duration_minutes',
         'created_by',
         'is_deleted',
     )
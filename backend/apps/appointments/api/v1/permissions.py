@@ -30,11 +30,11 @@ class AppoitmentsDataPermission(BaseRolePermission):
             return True
         
         if self.is_professional(request):
-            return obj.professional == getattr(request.user, 'professionaluser', None)
+            return obj.professional == self.get_profile(request)
 
         
         if self.is_patient(request) and request.method in SAFE_METHODS:
-            return obj.patient == getattr(request.user, 'patientuser', None)
+            return obj.patient == self.get_profile(request)
         
         return False
             
@@ -1,13 +1,18 @@
 from rest_framework import serializers
-from apps.commons.api.v1.serializers import BaseSerializer
+from apps.commons.api.v1.serializers import BaseSerializer, ExpandableFieldsMixin
 from apps.accounts.models import PatientUser, ProfessionalUser
 from apps.locations.models import Institution
 from apps.appointments.models import Appointment
+from apps.appointments.scheduling import (
+    DEFAULT_DURATION, FREE_SLOTS_MAX_DAYS, MAX_DURATION, MIN_DURATION, AppointmentConflict,
+)
 from apps.accounts.api.v1.serializers import (
     PatientUserSerializer,
     ProfessionalUserSerializer,
+    PatientSummarySerializer,
+    ProfessionalSummarySerializer,
 )
-from apps.locations.api.v1.serializers import InstitutionSerializer
+from apps.locations.api.v1.serializers import InstitutionSerializer, InstitutionSummarySerializer
 
 
 class AppointmentSerializer(BaseSerializer):
@@ -49,3 +54,53 @@ class AppointmentSerializer(BaseSerializer):
             "created_by",
             "updated_by",
         ]
+
+    def save(self, **kwargs): #* O conflito de agenda é checado no save do modelo, com a agenda travada
+        try:
+            return super().save(**kwargs)
+        except AppointmentConflict as error:
+            raise serializers.ValidationError({"scheduled_datetime": error.messages}, code="conflict")
+
+
+class AppointmentListSerializer(ExpandableFieldsMixin, AppointmentSerializer):
+    """Forma compacta da listagem; ?expand=patient,professional,local devolve os objetos completos."""
+    professional = ProfessionalSummarySerializer(read_only=True)
+    patient = PatientSummarySerializer(read_only=True)
+    local = InstitutionSummarySerializer(read_only=True)
+
+    class Meta(AppointmentSerializer.Meta):
+        expandable_fields = {
+            "patient": PatientUserSerializer,
+            "professional": ProfessionalUserSerializer,
+            "local": InstitutionSerializer,
+        }
+
+
+class FreeSlotsQuerySerializer(serializers.Serializer):
+    """Parâmetros de /appointments/free-slots/"""
+    professional = serializers.PrimaryKeyRelatedField(queryset=ProfessionalUser.objects.all(), required=False)
+    local = serializers.PrimaryKeyRelatedField(queryset=Institution.objects.all(), required=False)
+    start = serializers.DateField()
+    end = serializers.DateField(required=False)
+    duration = serializers.IntegerField(min_value=MIN_DURATION, max_value=MAX_DURATION, default=DEFAULT_DURATION)
+
+    def validate(self, attrs):
+        if not attrs.get("professional") and not attrs.get("local"):
+            raise serializers.ValidationError("Informe professional e/ou local.")
+
+        attrs.setdefault("end", attrs["start"])
+        if attrs["end"] < attrs["start"]:
+            raise serializers.ValidationError({"end": "A data final deve ser igual ou posterior à inicial."})
+        if (attrs["end"] - attrs["start"]).days >= FREE_SLOTS_MAX_DAYS:
+            raise serializers.ValidationError({"end": f"O intervalo máximo é de {FREE_SLOTS_MAX_DAYS} dias."})
+        return attrs
+
+
+class FreeSlotSerializer(serializers.Serializer):
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+
+
+class FreeSlotDaySerializer(serializers.Serializer):
+    date = serializers.DateField()
+    slots = FreeSlotSerializer(many=True)
@@ -1,11 +1,19 @@
-from drf_spectacular.utils import extend_schema
+from django.db.models import Prefetch
+from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
-from .serializers import AppointmentSerializer
+from rest_framework.response import Response
+from .serializers import (
+    AppointmentSerializer, AppointmentListSerializer, FreeSlotDaySerializer, FreeSlotsQuerySerializer,
+)
+from apps.accounts.api.v1.serializers import with_patient_relations
+from apps.accounts.models import PatientUser
 from apps.appointments.models import Appointment
+from apps.appointments.scheduling import find_free_slots
 from .permissions import AppoitmentsDataPermission
 from apps.commons.api.v1.viewsets import BaseModelViewSet
-from apps.accounts.utils.utils import get_user_profile
+from apps.accounts.utils.utils import get_request_profile
 
 @extend_schema(tags=['Appointments'])
 class AppointmentViewset(BaseModelViewSet):
@@ -13,10 +21,34 @@ class AppointmentViewset(BaseModelViewSet):
 
     queryset = Appointment.all_objects
     serializer_class = AppointmentSerializer
+    list_serializer_class = AppointmentListSerializer
+    filter_fields = BaseModelViewSet.filter_fields + (
+        'patient', 'professional', 'local', 'scheduled_datetime', 'risk_level', 'status', 'type',
+    )
+    search_fields = ('patient__user__first_name', 'patient__user__last_name', 'patient__cpf__startswith')
+    ordering_fields = ('created_at', 'scheduled_datetime')
+
+    #* Colunas lidas pela forma compacta da listagem
+    LIST_ONLY_FIELDS = [
+        'patient__cpf', 'patient__user__first_name', 'patient__user__last_name',
+        'professional__role', 'professional__user__first_name', 'professional__user__last_name',
+        'local__name',
+    ]
 
     def get_queryset(self):
         queryset = super().get_queryset()
-        role, profile = get_user_profile(self.request.user)
+
+        if self.action == 'list' and not self.get_expand():
+            own_fields = [field.name for field in Appointment._meta.concrete_fields]
+            queryset = queryset.select_related(
+                'patient__user', 'professional__user', 'local'
+            ).only(*own_fields, *self.LIST_ONLY_FIELDS)
+        else: #* Paciente completo: uma query a mais, já com a anotação de outras DCNTs (sem N+1)
+            queryset = queryset.select_related('professional__user', 'local').prefetch_related(
+                Prefetch('patient', queryset=with_patient_relations(PatientUser.all_objects))
+            )
+
+        role, profile = get_request_profile(self.request)
 
         if not self.request.user.is_authenticated:
             return queryset.none()
@@ -31,5 +63,31 @@ class AppointmentViewset(BaseModelViewSet):
             return queryset
 
         return queryset.none()
-            
-    
\ No newline at end of file
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter('professional', int, description="Profissional cuja agenda deve estar livre."),
+            OpenApiParameter('local', int, description="Instituição que não pode ter agendamento no horário."),
+            OpenApiParameter('start', str, required=True, description="Data inicial (AAAA-MM-DD)."),
+            OpenApiParameter('end', str, description="Data final (padrão: a inicial; no máximo 31 dias)."),
+            OpenApiParameter('duration', int, description="Duração mínima da janela em minutos (padrão 30)."),
+        ],
+        responses=FreeSlotDaySerializer(many=True),
+    )
+    @action(detail=False, methods=['get'], url_path='free-slots')
+    def free_slots(self, request):
+        """Janelas livres por dia útil, dentro do expediente, para o profissional e/ou a instituição"""
+        params = FreeSlotsQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+
+        days = find_free_slots(
+            data['start'], data['end'], data['duration'],
+            professional_id=data['professional'].pk if data.get('professional') else None,
+            local_id=data['local'].pk if data.get('local') else None,
+        )
+        slots = [
+            {'date': day['date'], 'slots': [{'start': start, 'end': end} for start, end in day['slots']]}
+            for day in days
+        ]
+        return Response({'results': FreeSlotDaySerializer(slots, many=True).data})
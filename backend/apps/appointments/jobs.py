@@ -0,0 +1,8 @@
+from apps.appointments.models import Appointment
+from apps.commons.jobs import periodic_job
+
+
+@periodic_job('finish_past_appointments', interval=60 * 5)
+def finish_past_appointments(moment):
+    """Agendamentos ativos cujo horário já terminou passam a finalizado."""
+    return Appointment.objects.filter(status='ativo', end_datetime__lte=moment).update(status='finalizado')
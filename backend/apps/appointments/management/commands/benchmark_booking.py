@@ -0,0 +1,111 @@
+import random
+import statistics
+import threading
+import time
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, connections
+from django.utils import timezone
+from apps.accounts.models import PatientUser, ProfessionalUser
+from apps.appointments.models import Appointment
+from apps.appointments.scheduling import AppointmentConflict, busy_queryset, day_bounds
+
+BENCH_PREFIX = 'bench-agenda-'
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede a contenção da marcação: vários clientes (threads, cada um com sua conexão) tentam marcar "
+        "os mesmos horários de um profissional ao mesmo tempo. Cria dados próprios e os apaga no final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=20, help="Clientes simultâneos.")
+        parser.add_argument('--attempts', type=int, default=20, help="Tentativas de marcação por cliente.")
+        parser.add_argument('--slots', type=int, default=16, help="Horários disputados (de 30 minutos, no mesmo dia).")
+        parser.add_argument('--keep', action='store_true', help="Mantém os dados criados pelo benchmark.")
+
+    def handle(self, *args, **options):
+        if options['clients'] < 1 or options['attempts'] < 1 or options['slots'] < 1:
+            raise CommandError("--clients, --attempts e --slots devem ser positivos.")
+        if connection.vendor == 'sqlite' and connection.settings_dict['NAME'] in ('', ':memory:'):
+            raise CommandError("O SQLite em memória não é compartilhado entre conexões; use um arquivo ou PostgreSQL.")
+
+        professional, patient = self.create_fixtures()
+        day_start = timezone.localtime().replace(hour=8, minute=0, second=0, microsecond=0) + timedelta(days=365)
+        slots = [day_start + timedelta(minutes=30 * index) for index in range(options['slots'])]
+        results = {'booked': 0, 'conflicts': 0, 'errors': 0, 'latencies': []}
+        lock = threading.Lock()
+        barrier = threading.Barrier(options['clients'])
+
+        def client():
+            barrier.wait() #* Todos começam juntos para maximizar a disputa
+            try:
+                for _ in range(options['attempts']):
+                    slot = random.choice(slots)
+                    duration = random.choice((30, 45, 60)) #* Durações diferentes geram sobreposições parciais
+                    started = time.perf_counter()
+                    outcome = 'booked'
+                    try:
+                        Appointment.objects.create(
+                            patient=patient, professional=professional, scheduled_datetime=slot,
+                            duration_minutes=duration, risk_level='Seguro', type='Consulta', status='ativo',
+                        )
+                    except AppointmentConflict:
+                        outcome = 'conflicts'
+                    except DatabaseError: #* Timeout de lock ou violação da constraint de exclusão
+                        outcome = 'errors'
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        results[outcome] += 1
+                        results['latencies'].append(elapsed)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=client) for _ in range(options['clients'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        total_time = time.perf_counter() - started
+
+        booked_rows, overlaps = self.check_agenda(professional, day_start.date())
+        self.report(options, results, total_time, booked_rows, overlaps)
+
+        if not options['keep']:
+            User.objects.filter(username__startswith=BENCH_PREFIX).delete() #* Remove perfis e agendamentos em cascata
+
+    def create_fixtures(self):
+        suffix = f'{time.time_ns()}'
+        professional = ProfessionalUser.objects.create(
+            user=User.objects.create_user(username=f'{BENCH_PREFIX}prof-{suffix}'), role='Enfermeiro'
+        )
+        patient = PatientUser.objects.create(user=User.objects.create_user(username=f'{BENCH_PREFIX}pac-{suffix}'))
+        return professional, patient
+
+    def check_agenda(self, professional, day):
+        """(agendamentos gravados, quantos começam antes do fim de algum anterior) na agenda do dia."""
+        rows = busy_queryset(*day_bounds(day), professional_id=professional.pk).order_by('scheduled_datetime')
+        overlaps, reach = 0, None
+        for start, end in rows.values_list('scheduled_datetime', 'end_datetime'):
+            overlaps += reach is not None and start < reach
+            reach = end if reach is None else max(reach, end)
+        return len(rows), overlaps
+
+    def report(self, options, results, total_time, booked_rows, overlaps):
+        attempts = options['clients'] * options['attempts']
+        latencies = sorted(results['latencies'])
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) >= 20 else latencies[-1]
+
+        self.stdout.write(f"Banco: {connection.vendor}; {options['clients']} clientes x {options['attempts']} tentativas "
+                          f"em {options['slots']} horários.")
+        self.stdout.write(f"Tempo total: {total_time:.2f}s ({attempts / total_time:.0f} tentativas/s)")
+        self.stdout.write(f"Latência: mediana {statistics.median(latencies) * 1000:.1f}ms, p95 {p95 * 1000:.1f}ms")
+        self.stdout.write(f"Marcados: {results['booked']}; conflitos: {results['conflicts']}; erros: {results['errors']}")
+
+        if overlaps or booked_rows != results['booked']:
+            self.stdout.write(self.style.ERROR(f"Agenda inconsistente: {overlaps} agendamento(s) sobreposto(s)."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Nenhuma marcação dupla na agenda."))
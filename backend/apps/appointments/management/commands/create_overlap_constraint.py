@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
+
+#* Mesmo SQL da migração 0007_appointment_duration, que pula a constraint quando já existem sobreposições
+OVERLAPS_SQL = """
+    SELECT a.id, b.id, a.professional_id, a.scheduled_datetime FROM "appointments_appointment" a
+    JOIN "appointments_appointment" b
+      ON a.professional_id = b.professional_id AND a.id < b.id
+     AND a.scheduled_datetime < b.end_datetime AND b.scheduled_datetime < a.end_datetime
+    WHERE NOT a.is_deleted AND NOT b.is_deleted
+      AND a.status IS DISTINCT FROM 'cancelado' AND b.status IS DISTINCT FROM 'cancelado'
+    ORDER BY a.scheduled_datetime
+"""
+CONSTRAINT_EXISTS_SQL = "SELECT 1 FROM pg_constraint WHERE conname = 'appointment_no_overlap'"
+CREATE_CONSTRAINT_SQL = (
+    'ALTER TABLE "appointments_appointment" ADD CONSTRAINT "appointment_no_overlap" '
+    'EXCLUDE USING gist ("professional_id" WITH =, tstzrange("scheduled_datetime", "end_datetime", \'[)\') WITH &&) '
+    "WHERE (NOT \"is_deleted\" AND \"status\" IS DISTINCT FROM 'cancelado')"
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Cria no PostgreSQL a constraint appointment_no_overlap (mesmo profissional sem agendamentos sobrepostos). "
+        "Lista os pares sobrepostos que impedem a criação; rode de novo depois de corrigi-los."
+    )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("A constraint appointment_no_overlap só existe no PostgreSQL.")
+
+        with connection.cursor() as cursor:
+            cursor.execute(CONSTRAINT_EXISTS_SQL)
+            if cursor.fetchone():
+                self.stdout.write("A constraint appointment_no_overlap já existe.")
+                return
+            cursor.execute(OVERLAPS_SQL)
+            overlaps = cursor.fetchall()
+
+        if overlaps:
+            lines = [
+                f"  agendamentos {first} e {second} (profissional {professional}, {scheduled:%d/%m/%Y %H:%M})"
+                for first, second, professional, scheduled in overlaps
+            ]
+            raise CommandError(
+                f"{len(overlaps)} par(es) de agendamentos sobrepostos; cancele ou remarque antes de criar a constraint:\n"
+                + "\n".join(lines)
+            )
+
+        try:
+            with transaction.atomic():
+                #* btree_gist permite o "=" do professional_id no índice gist. É "trusted" a partir do PostgreSQL 13;
+                #* sem permissão, um superusuário precisa rodar CREATE EXTENSION btree_gist antes
+                with connection.cursor() as cursor:
+                    cursor.execute('CREATE EXTENSION IF NOT EXISTS "btree_gist"')
+                    cursor.execute(CREATE_CONSTRAINT_SQL)
+        except DatabaseError as exc:
+            raise CommandError(f"Não foi possível criar a constraint: {exc}")
+
+        self.stdout.write(self.style.SUCCESS("Constraint appointment_no_overlap criada."))
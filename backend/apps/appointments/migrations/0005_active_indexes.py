@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0007_patientuser_sus_and_indexes"),
+        ("appointments", "0004_alter_appointment_type"),
+        ("locations", "0002_alter_address_options_alter_institution_options_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["created_at", "id"],
+                name="appointment_active_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["professional", "scheduled_datetime"],
+                name="appointment_prof_dt_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["patient", "scheduled_datetime"],
+                name="appointment_patient_dt_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0008_search_indexes"),
+        ("appointments", "0005_active_indexes"),
+        ("locations", "0002_alter_address_options_alter_institution_options_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["status", "scheduled_datetime"],
+                name="appointment_status_dt_idx",
+            ),
+        ),
+    ]
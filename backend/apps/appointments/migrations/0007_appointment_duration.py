@@ -0,0 +1,100 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:12
+
+import datetime
+
+import django.core.validators
+from django.db import DatabaseError, migrations, models, transaction
+from django.db.models import ExpressionWrapper, F
+
+#* Todos os agendamentos existentes recebem a duração padrão (30 minutos)
+DEFAULT_DURATION = datetime.timedelta(minutes=30)
+
+
+def backfill_end_datetime(apps, schema_editor):
+    Appointment = apps.get_model("appointments", "Appointment")
+    Appointment._base_manager.update(
+        end_datetime=ExpressionWrapper(F("scheduled_datetime") + DEFAULT_DURATION, output_field=models.DateTimeField())
+    )
+
+
+OVERLAPS_SQL = """
+    SELECT a.id, b.id FROM "appointments_appointment" a
+    JOIN "appointments_appointment" b
+      ON a.professional_id = b.professional_id AND a.id < b.id
+     AND a.scheduled_datetime < b.end_datetime AND b.scheduled_datetime < a.end_datetime
+    WHERE NOT a.is_deleted AND NOT b.is_deleted
+      AND a.status IS DISTINCT FROM 'cancelado' AND b.status IS DISTINCT FROM 'cancelado'
+    ORDER BY a.id
+"""
+SAMPLE_SIZE = 20
+
+
+#* Garante no banco que o mesmo profissional não tem dois agendamentos sobrepostos. Só existe no
+#* PostgreSQL; nos outros bancos a regra fica com o lock da agenda feito no save (scheduling.lock_agenda).
+#* Quando não dá para criar aqui (dados antigos já sobrepostos ou sem permissão para a extensão btree_gist),
+#* a migração segue sem ela, lista o motivo e o comando create_overlap_constraint cria depois.
+def create_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(OVERLAPS_SQL)
+        overlaps = cursor.fetchall()
+    if overlaps:
+        #* A constraint não pode ser criada sobre dados que já a violam; a aplicação continua protegida pelo lock
+        print(f"\n  {len(overlaps)} par(es) de agendamentos sobrepostos; appointment_no_overlap não foi criada:")
+        for first, second in overlaps[:SAMPLE_SIZE]:
+            print(f"    agendamentos {first} e {second}")
+        print("  Corrija os pares e rode `manage.py create_overlap_constraint`.")
+        return
+
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias): #* Savepoint: a falha não aborta a migração
+            schema_editor.execute('CREATE EXTENSION IF NOT EXISTS "btree_gist"') #* Permite o "=" do professional_id no índice gist
+            schema_editor.execute(
+                'ALTER TABLE "appointments_appointment" ADD CONSTRAINT "appointment_no_overlap" '
+                'EXCLUDE USING gist ("professional_id" WITH =, tstzrange("scheduled_datetime", "end_datetime", \'[)\') WITH &&) '
+                "WHERE (NOT \"is_deleted\" AND \"status\" IS DISTINCT FROM 'cancelado')"
+            )
+    except DatabaseError as exc:
+        print(f"\n  appointment_no_overlap não foi criada ({exc}).")
+        print("  Um superusuário precisa rodar CREATE EXTENSION btree_gist; depois rode `manage.py create_overlap_constraint`.")
+
+
+def drop_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            'ALTER TABLE "appointments_appointment" DROP CONSTRAINT IF EXISTS "appointment_no_overlap"'
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("appointments", "0006_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="appointment",
+            name="duration_minutes",
+            field=models.PositiveSmallIntegerField(
+                default=30,
+                validators=[
+                    django.core.validators.MinValueValidator(5),
+                    django.core.validators.MaxValueValidator(480),
+                ],
+            ),
+        ),
+        migrations.AddField(
+            model_name="appointment",
+            name="end_datetime",
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_end_datetime, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="appointment",
+            name="end_datetime",
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.RunPython(create_exclusion_constraint, drop_exclusion_constraint),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0009_patient_search"),
+        ("appointments", "0007_appointment_duration"),
+        ("locations", "0002_alter_address_options_alter_institution_options_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["local", "scheduled_datetime"], name="appointment_local_dt_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0009_patient_search"),
+        ("appointments", "0008_local_index"),
+        ("locations", "0002_alter_address_options_alter_institution_options_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False), ("status", "ativo")),
+                fields=["end_datetime"],
+                name="appointment_open_end_idx",
+            ),
+        ),
+    ]
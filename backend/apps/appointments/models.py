@@ -1,7 +1,14 @@
+from contextlib import ExitStack
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from apps.accounts.models import *
 from apps.locations.models import Institution
-from apps.commons.models import BaseModel
+from apps.commons.models import ActiveManager, AllManager, BaseModel, SoftDeleteQuerySet
+from apps.appointments.scheduling import (
+    DEFAULT_DURATION, FREE_STATUSES, MAX_DURATION, MIN_DURATION,
+    AppointmentConflict, appointment_end, find_conflict, invalidate_agenda, invalidate_all_agendas,
+    lock_agenda,
+)
 
 # Create your models here.
 RISK_LEVEL = [
@@ -23,23 +30,146 @@ STATUS_CHOICES = [
     ('cancelado', 'Cancelado')
 ]
 
+class AppointmentQuerySet(SoftDeleteQuerySet): #* Escritas em lote não sabem quais dias mudaram: invalidam todas as agendas
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        if rows:
+            invalidate_all_agendas()
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        invalidate_all_agendas()
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        invalidate_all_agendas()
+        return rows
+
+    def hard_delete(self):
+        result = super().hard_delete()
+        invalidate_all_agendas()
+        return result
+
+    def restore(self, user=None):
+        """Restaura em lote sem furar a regra da agenda: recusa se algum restaurado conflitar."""
+        candidates = list(self.filter(is_deleted=True).exclude(status__in=FREE_STATUSES).order_by('scheduled_datetime'))
+        with ExitStack() as stack:
+            for professional_id in sorted({appointment.professional_id for appointment in candidates}):
+                stack.enter_context(lock_agenda(professional_id)) #* Ordem fixa para não haver deadlock
+            reach = {} #* Por profissional: o restaurado já checado que termina mais tarde (candidatos vêm pelo início)
+            for appointment in candidates:
+                start, end = appointment.scheduled_datetime, appointment.end_datetime
+                latest = reach.get(appointment.professional_id)
+                if latest is not None and latest.end_datetime > start: #* Dois restaurados que se sobrepõem
+                    raise AppointmentConflict(latest)
+                conflict = find_conflict(appointment.professional_id, start, end, appointment.pk)
+                if conflict is not None:
+                    raise AppointmentConflict(conflict)
+                if latest is None or end > latest.end_datetime:
+                    reach[appointment.professional_id] = appointment
+            return super().restore(user=user)
+
+
+class AppointmentManager(ActiveManager):
+    queryset_class = AppointmentQuerySet
+
+
+class AllAppointmentManager(AllManager):
+    queryset_class = AppointmentQuerySet
+
+
 class Appointment(BaseModel):
     class Meta:
         verbose_name = "Agendamento"
         verbose_name_plural = "Agendamentos"
+        indexes = [
+            models.Index(fields=['created_at', 'id'], condition=models.Q(is_deleted=False), name='appointment_active_idx'),
+            models.Index(fields=['professional', 'scheduled_datetime'], name='appointment_prof_dt_idx'), #* Agenda do profissional
+            models.Index(fields=['patient', 'scheduled_datetime'], name='appointment_patient_dt_idx'),
+            models.Index(fields=['status', 'scheduled_datetime'], name='appointment_status_dt_idx'),
+            models.Index(fields=['local', 'scheduled_datetime'], name='appointment_local_dt_idx'), #* Horários livres da instituição
+            models.Index(fields=['end_datetime'], condition=models.Q(status='ativo', is_deleted=False),
+                         name='appointment_open_end_idx'), #* Job finish_past_appointments
+        ]
 
     patient = models.ForeignKey(PatientUser, on_delete=models.CASCADE)
     professional = models.ForeignKey(ProfessionalUser, on_delete=models.CASCADE)
     scheduled_datetime = models.DateTimeField()
+    duration_minutes = models.PositiveSmallIntegerField(
+        default=DEFAULT_DURATION, validators=[MinValueValidator(MIN_DURATION), MaxValueValidator(MAX_DURATION)]
+    )
+    end_datetime = models.DateTimeField(editable=False) #* scheduled_datetime + duração, calculado no save
     local = models.ForeignKey(Institution, on_delete=models.SET_NULL, null=True, blank=True)
     risk_level = models.CharField(choices=RISK_LEVEL, max_length=20)
     description = models.TextField(null=True)
     type = models.CharField(choices=TYPE_CHOICES, max_length=20)
     status = models.CharField(choices=STATUS_CHOICES, null=True, blank=True)
 
+    objects = AppointmentManager()
+    all_objects = AllAppointmentManager()
+
+    #* Campos que, se alterados, mudam a ocupação da agenda
+    AGENDA_FIELDS = {'professional', 'local', 'scheduled_datetime', 'duration_minutes', 'status', 'is_deleted'}
+
     def __str__(self):
         return f"{self.patient} - {self.scheduled_datetime.strftime('%d/%m/%Y %H:%M')}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_agenda = instance.agenda_state() #* Para invalidar também o dia antigo ao remarcar
+        return instance
+
+    def agenda_state(self):
+        fields = self.__dict__ #* Campos adiados (.only) não são carregados aqui
+        return (fields.get('professional_id'), fields.get('local_id'),
+                fields.get('scheduled_datetime'), fields.get('end_datetime'))
+
+    def invalidate_agenda(self):
+        states = {self.agenda_state(), getattr(self, '_loaded_agenda', None)} - {None}
+        for professional_id, local_id, start, end in states:
+            if start is not None and end is not None:
+                invalidate_agenda(professional_id, local_id, start, end)
+        self._loaded_agenda = self.agenda_state()
+
+    @property
+    def occupies_agenda(self):
+        return not self.is_deleted and self.status not in FREE_STATUSES
+
+    def clean(self):
+        super().clean()
+        if self.scheduled_datetime and self.duration_minutes and self.professional_id and self.occupies_agenda:
+            end = appointment_end(self.scheduled_datetime, self.duration_minutes)
+            conflict = find_conflict(self.professional_id, self.scheduled_datetime, end, self.pk)
+            if conflict is not None:
+                raise AppointmentConflict(conflict)
+
+    def save(self, *args, **kwargs):
+        self.end_datetime = appointment_end(self.scheduled_datetime, self.duration_minutes)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            if 'scheduled_datetime' in update_fields or 'duration_minutes' in update_fields:
+                kwargs['update_fields'] = {*update_fields, 'end_datetime'}
+            if not self.AGENDA_FIELDS & set(update_fields):
+                return super().save(*args, **kwargs)
+
+        if not self.occupies_agenda:
+            super().save(*args, **kwargs)
+        else:
+            #! Checagem e escrita na mesma transação, com a agenda do profissional travada
+            with lock_agenda(self.professional_id):
+                conflict = find_conflict(self.professional_id, self.scheduled_datetime, self.end_datetime, self.pk)
+                if conflict is not None:
+                    raise AppointmentConflict(conflict)
+                super().save(*args, **kwargs)
+        self.invalidate_agenda()
+
+    def hard_delete(self, keep_parents=False):
+        super().hard_delete(keep_parents=keep_parents)
+        self.invalidate_agenda()
+
 #* Sugestão de melhoria futura:
 #* Se possivel fazer com que o modelo não seja deletado se patient e professional forem deletados para que os dados de que houve uma
 #* consulta ainda persistam.
@@ -0,0 +1,192 @@
+import hashlib
+import heapq
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.utils import timezone
+from apps.commons.cache import bump_versions, get_versions
+
+DEFAULT_DURATION = 30 #* Minutos
+MIN_DURATION = 5
+MAX_DURATION = 8 * 60 #* Limita a janela que a checagem de conflito precisa olhar para trás
+FREE_STATUSES = ('cancelado',) #* Agendamentos cancelados não ocupam a agenda
+FREE_SLOTS_MAX_DAYS = 31 #* Maior intervalo de datas aceito na busca por horários livres
+SLOT_ROUNDING = 5 #* Minutos; hoje, os horários livres começam no próximo múltiplo disso a partir de agora
+
+#* Agendas em cache por recurso ('professional' ou 'local') e dia. Cada dia tem a sua versão, trocada no
+#* save do agendamento; escritas em lote (QuerySet.update, bulk_*) trocam a geração e invalidam todas.
+AGENDA_VERSION_KEY = 'appointments:agenda_version:{}:{}:{}'
+AGENDA_GENERATION_KEY = 'appointments:agenda_generation'
+AGENDA_CACHE_KEY = 'appointments:agenda:{}:{}:{}:{}'
+
+
+class AppointmentConflict(ValidationError):
+    """O horário pedido se sobrepõe a outro agendamento do mesmo profissional."""
+
+    def __init__(self, conflict):
+        self.conflict = conflict
+        start = timezone.localtime(conflict.scheduled_datetime).strftime('%d/%m/%Y %H:%M')
+        end = timezone.localtime(conflict.end_datetime).strftime('%H:%M')
+        super().__init__(
+            f"O profissional já tem um agendamento entre {start} e {end}.", code='conflict'
+        )
+
+
+def appointment_end(start, duration):
+    return start + timedelta(minutes=duration)
+
+
+def day_bounds(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def agenda_days(start, end):
+    """Dias (no fuso local) tocados pelo intervalo [start, end)."""
+    first = timezone.localdate(start)
+    last = timezone.localdate(max(start, end - timedelta(microseconds=1)))
+    return [first + timedelta(days=offset) for offset in range((last - first).days + 1)]
+
+
+def busy_queryset(start, end, exclude_pk=None, **resource):
+    """
+    Agendamentos de um recurso (professional_id=... ou local_id=...) que ocupam parte de [start, end).
+    Como a duração é limitada, basta varrer o índice (recurso, scheduled_datetime) entre
+    start - MAX_DURATION e end.
+    """
+    from apps.appointments.models import Appointment
+
+    queryset = Appointment.objects.filter(
+        **resource,
+        scheduled_datetime__gt=start - timedelta(minutes=MAX_DURATION),
+        scheduled_datetime__lt=end,
+        end_datetime__gt=start,
+    ).exclude(status__in=FREE_STATUSES)
+    if exclude_pk is not None:
+        queryset = queryset.exclude(pk=exclude_pk)
+    return queryset
+
+
+def find_conflict(professional_id, start, end, exclude_pk=None):
+    """
+    Primeiro agendamento do profissional que se sobrepõe a [start, end). É o índice de intervalos da agenda:
+    o índice (professional, scheduled_datetime) limitado por MAX_DURATION dá uma busca O(log n + k),
+    sempre lida do banco dentro do lock_agenda (um índice em memória ou em cache poderia estar velho).
+    """
+    return busy_queryset(start, end, exclude_pk, professional_id=professional_id).order_by('scheduled_datetime').first()
+
+
+@contextmanager
+def lock_agenda(professional_id):
+    """
+    Serializa as marcações na agenda de um profissional: trava a linha do profissional até o fim da
+    transação. No PostgreSQL a constraint de exclusão (migração 0007) ainda garante a regra no banco;
+    no SQLite, que não tem SELECT ... FOR UPDATE, uma escrita sem efeito já pega o lock de escrita.
+    """
+    from apps.accounts.models import ProfessionalUser
+
+    with transaction.atomic():
+        if connection.features.has_select_for_update:
+            list(ProfessionalUser.all_objects.select_for_update().filter(pk=professional_id).values_list('pk'))
+        else:
+            table = connection.ops.quote_name(ProfessionalUser._meta.db_table)
+            with connection.cursor() as cursor:
+                cursor.execute(f"UPDATE {table} SET id = id WHERE id = %s", [professional_id])
+        yield
+
+
+def invalidate_agenda(professional_id, local_id, start, end):
+    """Troca a versão dos dias tocados por [start, end) nas agendas do profissional e do local."""
+    resources = [('professional', professional_id), ('local', local_id)]
+    bump_versions(*(
+        AGENDA_VERSION_KEY.format(kind, resource_id, day)
+        for kind, resource_id in resources if resource_id is not None
+        for day in agenda_days(start, end)
+    ))
+
+
+def invalidate_all_agendas():
+    bump_versions(AGENDA_GENERATION_KEY)
+
+
+def busy_intervals(kind, resource_id, days):
+    """
+    {dia: [(início, fim), ...]} ordenados pelo início, para o profissional ou local. Os dias que não
+    estão no cache vêm de uma única consulta por faixa no índice (recurso, scheduled_datetime).
+    """
+    version_keys = {day: AGENDA_VERSION_KEY.format(kind, resource_id, day) for day in days}
+    versions = get_versions(AGENDA_GENERATION_KEY, *version_keys.values())
+    cache_keys = {
+        day: AGENDA_CACHE_KEY.format(kind, resource_id, day, hashlib.md5(
+            f"{versions[AGENDA_GENERATION_KEY]}:{versions[version_keys[day]]}".encode()
+        ).hexdigest())
+        for day in days
+    }
+    cached = cache.get_many(cache_keys.values())
+    intervals = {day: cached[cache_keys[day]] for day in days if cache_keys[day] in cached}
+
+    missing = [day for day in days if day not in intervals]
+    if missing:
+        fetched = {day: [] for day in missing}
+        rows = busy_queryset(
+            day_bounds(missing[0])[0], day_bounds(missing[-1])[1], **{f'{kind}_id': resource_id}
+        ).order_by('scheduled_datetime').values_list('scheduled_datetime', 'end_datetime')
+        for start, end in rows:
+            for day in agenda_days(start, end):
+                if day in fetched:
+                    fetched[day].append((start, end))
+        cache.set_many({cache_keys[day]: fetched[day] for day in missing}, settings.AGENDA_CACHE_TIMEOUT)
+        intervals.update(fetched)
+    return intervals
+
+
+def free_windows(busy, opening, closing, duration):
+    """Janelas livres de pelo menos duration entre opening e closing, numa passada sobre busy ordenado."""
+    windows = []
+    cursor = opening
+    for start, end in busy:
+        if start >= closing:
+            break
+        if start - cursor >= duration:
+            windows.append((cursor, start))
+        cursor = max(cursor, end)
+    if closing - cursor >= duration:
+        windows.append((cursor, closing))
+    return windows
+
+
+def find_free_slots(date_from, date_to, duration=DEFAULT_DURATION, professional_id=None, local_id=None):
+    """
+    Janelas livres por dia útil em [date_from, date_to], dentro do expediente (settings.AGENDA_*).
+    Com profissional e local, a janela precisa estar livre nos dois.
+    """
+    workdays = set(settings.AGENDA_WORKDAYS)
+    opening_time = time.fromisoformat(settings.AGENDA_OPENING_TIME)
+    closing_time = time.fromisoformat(settings.AGENDA_CLOSING_TIME)
+    days = [
+        date_from + timedelta(days=offset) for offset in range((date_to - date_from).days + 1)
+        if (date_from + timedelta(days=offset)).weekday() in workdays
+    ]
+    current = timezone.localtime()
+    days = [day for day in days if day >= current.date()]
+
+    resources = [(kind, resource_id) for kind, resource_id in (('professional', professional_id), ('local', local_id))
+                 if resource_id is not None]
+    busy = [busy_intervals(kind, resource_id, days) for kind, resource_id in resources] if days else []
+
+    duration = timedelta(minutes=duration)
+    result = []
+    for day in days:
+        opening = timezone.make_aware(datetime.combine(day, opening_time))
+        closing = timezone.make_aware(datetime.combine(day, closing_time))
+        if day == current.date():
+            rounded = current.replace(second=0, microsecond=0)
+            rounded += timedelta(minutes=-rounded.minute % SLOT_ROUNDING)
+            opening = max(opening, rounded)
+
+        merged = heapq.merge(*(agenda[day] for agenda in busy)) #* Junta as agendas sem reordenar tudo
+        result.append({'date': day, 'slots': free_windows(merged, opening, closing, duration)})
+    return result
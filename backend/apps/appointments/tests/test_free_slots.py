@@ -0,0 +1,117 @@
+"""
+Testes para a busca de horários livres das agendas
+"""
+from datetime import datetime, time
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.timezone import timedelta
+from rest_framework.test import APITestCase
+from apps.accounts.models import PatientUser, ProfessionalUser
+from apps.appointments.models import Appointment
+from apps.locations.models import Institution
+
+
+class FreeSlotsTest(APITestCase):
+    """Testes para /api/v1/appointments/appointments/free-slots/"""
+
+    URL = '/api/v1/appointments/appointments/free-slots/'
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(User.objects.create_superuser(username='admin', password='123456'))
+        self.professional = ProfessionalUser.objects.create(user=User.objects.create_user(username='prof'), role='Enfermeiro')
+        self.other = ProfessionalUser.objects.create(user=User.objects.create_user(username='outro'), role='Médico')
+        self.patient = PatientUser.objects.create(user=User.objects.create_user(username='paciente'))
+        self.institution = Institution.objects.create(name='UBS Centro')
+
+        today = timezone.localdate()
+        self.monday = today + timedelta(days=7 - today.weekday()) #* Próxima segunda-feira
+
+    def at(self, hour, minute=0, day=None):
+        return timezone.make_aware(datetime.combine(day or self.monday, time(hour, minute)))
+
+    def book(self, hour, duration=30, professional=None, **fields):
+        return Appointment.objects.create(
+            patient=self.patient, professional=professional or self.professional, scheduled_datetime=self.at(hour),
+            duration_minutes=duration, risk_level='Seguro', type='Consulta', **fields
+        )
+
+    def slots(self, **params):
+        response = self.client.get(self.URL, {'start': self.monday.isoformat(), **params})
+        self.assertEqual(response.status_code, 200)
+        return [
+            (slot['start'], slot['end'])
+            for day in response.data['results'] for slot in day['slots']
+        ]
+
+    def window(self, start, end):
+        return (timezone.localtime(start).isoformat(), timezone.localtime(end).isoformat())
+
+    def test_gaps_between_appointments(self):
+        """Testa as janelas entre agendamentos, ignorando cancelados e respeitando a duração pedida"""
+        self.book(8, duration=60)
+        self.book(9, duration=30)
+        self.book(10, status='cancelado')
+        self.book(12, duration=45)
+
+        self.assertEqual(self.slots(professional=self.professional.id), [
+            self.window(self.at(7), self.at(8)),
+            self.window(self.at(9, 30), self.at(12)),
+            self.window(self.at(12, 45), self.at(17)),
+        ])
+        self.assertEqual(self.slots(professional=self.professional.id, duration=120), [
+            self.window(self.at(9, 30), self.at(12)),
+            self.window(self.at(12, 45), self.at(17)),
+        ])
+
+    def test_professional_and_institution_are_combined(self):
+        """Testa que, com profissional e local, a janela precisa estar livre nos dois"""
+        self.book(8)
+        self.book(14, professional=self.other, local=self.institution)
+
+        self.assertEqual(self.slots(local=self.institution.id), [
+            self.window(self.at(7), self.at(14)), self.window(self.at(14, 30), self.at(17)),
+        ])
+        self.assertEqual(self.slots(professional=self.professional.id, local=self.institution.id), [
+            self.window(self.at(7), self.at(8)),
+            self.window(self.at(8, 30), self.at(14)),
+            self.window(self.at(14, 30), self.at(17)),
+        ])
+
+    def test_weekends_are_skipped(self):
+        """Testa que só dias úteis aparecem no resultado"""
+        response = self.client.get(self.URL, {
+            'professional': self.professional.id, 'start': (self.monday - timedelta(days=2)).isoformat(),
+            'end': self.monday.isoformat(),
+        })
+        self.assertEqual([day['date'] for day in response.data['results']], [self.monday.isoformat()])
+
+    def test_cache_is_invalidated_on_save_and_soft_delete(self):
+        """Testa que a agenda em cache é recalculada ao marcar, remarcar e excluir"""
+        params = {'professional': self.professional.id}
+        self.slots(**params)
+        with self.assertNumQueries(1): #* Só a validação do profissional; a agenda vem do cache
+            self.slots(**params)
+
+        appointment = self.book(8)
+        self.assertEqual(self.slots(**params)[0], self.window(self.at(7), self.at(8)))
+
+        appointment.scheduled_datetime = self.at(9)
+        appointment.save()
+        self.assertEqual(self.slots(**params)[0], self.window(self.at(7), self.at(9)))
+
+        appointment.delete()
+        self.assertEqual(self.slots(**params), [self.window(self.at(7), self.at(17))])
+
+        Appointment.all_objects.filter(pk=appointment.pk).restore()
+        self.assertEqual(self.slots(**params)[0], self.window(self.at(7), self.at(9)))
+
+    def test_invalid_params(self):
+        """Testa que é preciso informar um recurso e um intervalo válido"""
+        self.assertEqual(self.client.get(self.URL, {'start': self.monday.isoformat()}).status_code, 400)
+        response = self.client.get(self.URL, {
+            'professional': self.professional.id, 'start': self.monday.isoformat(),
+            'end': (self.monday + timedelta(days=40)).isoformat(),
+        })
+        self.assertEqual(response.status_code, 400)
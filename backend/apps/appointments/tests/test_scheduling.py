@@ -0,0 +1,136 @@
+"""
+Testes para a duração dos agendamentos e a detecção de conflitos na agenda do profissional
+"""
+import threading
+from unittest import skipUnless
+from django.contrib.auth.models import User
+from django.db import connection, connections
+from django.test import TransactionTestCase
+from django.utils.timezone import now, timedelta
+from rest_framework.test import APITestCase
+from apps.accounts.models import PatientUser, ProfessionalUser
+from apps.appointments.models import Appointment
+from apps.appointments.scheduling import AppointmentConflict
+
+
+class AppointmentConflictTest(APITestCase):
+    """Testes para a checagem de conflito ao marcar e remarcar"""
+
+    URL = '/api/v1/appointments/appointments/'
+
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_superuser(username='admin', password='123456'))
+        self.professional = ProfessionalUser.objects.create(
+            user=User.objects.create_user(username='prof'), role='Enfermeiro'
+        )
+        self.patient = PatientUser.objects.create(user=User.objects.create_user(username='paciente'))
+        self.start = (now() + timedelta(days=1)).replace(hour=10, minute=0, second=0, microsecond=0)
+
+    def book(self, start, duration=30, **fields):
+        return Appointment.objects.create(
+            patient=self.patient, professional=fields.pop('professional', self.professional),
+            scheduled_datetime=start, duration_minutes=duration, risk_level='Seguro', type='Consulta', **fields
+        )
+
+    def post(self, start, duration=30):
+        return self.client.post(self.URL, {
+            'patient_id': self.patient.id, 'professional_id': self.professional.id,
+            'scheduled_datetime': start.isoformat(), 'duration_minutes': duration,
+            'risk_level': 'Seguro', 'type': 'Consulta',
+        }, format='json')
+
+    def test_end_datetime_follows_duration(self):
+        """Testa que end_datetime é calculado a partir da duração"""
+        appointment = self.book(self.start, duration=45)
+        self.assertEqual(appointment.end_datetime, self.start + timedelta(minutes=45))
+
+    def test_overlap_is_rejected_and_adjacent_is_allowed(self):
+        """Testa que a API recusa sobreposição e aceita um horário encostado"""
+        self.book(self.start, duration=60)
+
+        response = self.post(self.start + timedelta(minutes=30))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('scheduled_datetime', response.data)
+
+        self.assertEqual(self.post(self.start + timedelta(minutes=60)).status_code, 201)
+        self.assertEqual(self.post(self.start - timedelta(minutes=30)).status_code, 201)
+
+    def test_other_professional_and_cancelled_do_not_block(self):
+        """Testa que a agenda é por profissional e que cancelados/excluídos liberam o horário"""
+        other = ProfessionalUser.objects.create(user=User.objects.create_user(username='outro'), role='Médico')
+        self.book(self.start, professional=other)
+        cancelled = self.book(self.start, status='cancelado')
+
+        self.book(self.start)
+        with self.assertRaises(AppointmentConflict):
+            cancelled.status = 'ativo'
+            cancelled.save()
+
+    def test_restore_and_reschedule_are_checked(self):
+        """Testa que restaurar ou remarcar para um horário ocupado é recusado"""
+        deleted = self.book(self.start)
+        deleted.delete()
+        self.book(self.start)
+
+        with self.assertRaises(AppointmentConflict):
+            deleted.restore()
+        response = self.client.patch(f'{self.URL}{deleted.id}/restore/')
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(Appointment.all_objects.get(pk=deleted.pk).is_deleted)
+
+        later = self.book(self.start + timedelta(hours=2))
+        response = self.client.patch(f'{self.URL}{later.id}/', {'scheduled_datetime': self.start.isoformat()}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_restore_checks_restored_rows_against_each_other(self):
+        """Testa que o restore em lote recusa dois restaurados sobrepostos e aceita os encostados"""
+        first, second = self.book(self.start, duration=60), self.book(self.start + timedelta(hours=2), duration=60)
+        Appointment.objects.filter(pk__in=[first.pk, second.pk]).delete()
+        Appointment.all_objects.filter(pk=second.pk).update( #* Remarcado enquanto excluído
+            scheduled_datetime=self.start + timedelta(minutes=30), end_datetime=self.start + timedelta(minutes=90),
+        )
+
+        with self.assertRaises(AppointmentConflict):
+            Appointment.all_objects.filter(pk__in=[first.pk, second.pk]).restore()
+        self.assertEqual(Appointment.objects.count(), 0)
+
+        Appointment.all_objects.filter(pk=second.pk).update(
+            scheduled_datetime=self.start + timedelta(minutes=60), end_datetime=self.start + timedelta(minutes=120),
+        )
+        Appointment.all_objects.filter(pk__in=[first.pk, second.pk]).restore()
+        self.assertEqual(Appointment.objects.count(), 2)
+
+
+@skipUnless(connection.vendor == 'postgresql', "O SQLite em memória não é compartilhado entre threads.")
+class ConcurrentBookingTest(TransactionTestCase):
+    """Testes de marcações simultâneas no mesmo horário"""
+
+    def test_only_one_concurrent_booking_wins(self):
+        """Testa que, de vários clientes marcando o mesmo horário ao mesmo tempo, só um consegue"""
+        professional = ProfessionalUser.objects.create(user=User.objects.create_user(username='prof'), role='Enfermeiro')
+        patient = PatientUser.objects.create(user=User.objects.create_user(username='paciente'))
+        start = now() + timedelta(days=1)
+        barrier = threading.Barrier(8)
+        outcomes = []
+
+        def client():
+            barrier.wait()
+            try:
+                Appointment.objects.create(
+                    patient=patient, professional=professional, scheduled_datetime=start,
+                    risk_level='Seguro', type='Consulta',
+                )
+                outcomes.append('booked')
+            except AppointmentConflict:
+                outcomes.append('conflict')
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=client) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(outcomes.count('booked'), 1)
+        self.assertEqual(Appointment.objects.filter(professional=professional).count(), 1)
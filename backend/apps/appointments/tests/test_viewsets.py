@@ -0,0 +1,92 @@
+"""
+Testes para as rotas de agendamentos (forma compacta da listagem)
+"""
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now, timedelta
+from rest_framework.test import APITestCase
+from apps.accounts.models import PatientUser, ProfessionalUser
+from apps.appointments.models import Appointment
+from apps.conditions.models import OtherDCNT
+from apps.locations.models import Institution
+
+
+class AppointmentListTest(APITestCase):
+    """Testes para a listagem compacta de agendamentos"""
+
+    URL = '/api/v1/appointments/appointments/'
+
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_superuser(username='admin', password='123456'))
+        self.institution = Institution.objects.create(name='UBS Centro')
+        self.total = 0
+
+    def create_appointments(self, amount):
+        for _ in range(amount):
+            self.total += 1
+            patient = PatientUser.objects.create(
+                user=User.objects.create_user(username=f'paciente{self.total}', first_name='Maria', last_name='Silva'),
+                cpf=f'{self.total:011d}',
+            )
+            professional = ProfessionalUser.objects.create(
+                user=User.objects.create_user(username=f'prof{self.total}', first_name='João'), role='Enfermeiro'
+            )
+            Appointment.objects.create(
+                patient=patient, professional=professional, local=self.institution,
+                scheduled_datetime=now() + timedelta(days=1), risk_level='Moderado', type='Consulta',
+            )
+
+    def test_list_returns_compact_representation(self):
+        """Testa que a listagem traz apenas id/nome de paciente, profissional e local"""
+        self.create_appointments(1)
+        row = self.client.get(self.URL).data['results'][0]
+
+        self.assertEqual(row['patient'], {'id': row['patient']['id'], 'name': 'Maria Silva', 'cpf': '00000000001'})
+        self.assertEqual(row['professional'], {'id': row['professional']['id'], 'name': 'João', 'role': 'Enfermeiro'})
+        self.assertEqual(row['local'], {'id': self.institution.id, 'name': 'UBS Centro'})
+
+    def test_expand_and_detail_keep_nested_form(self):
+        """Testa que ?expand=patient e a rota de detalhe mantêm o paciente completo"""
+        self.create_appointments(1)
+
+        expanded = self.client.get(self.URL, {'expand': 'patient'}).data['results'][0]
+        self.assertEqual(expanded['patient']['user']['first_name'], 'Maria')
+        self.assertEqual(expanded['professional']['name'], 'João')
+
+        detail = self.client.get(f"{self.URL}{expanded['id']}/").data
+        self.assertEqual(detail['patient']['user']['last_name'], 'Silva')
+
+    def test_list_query_count_does_not_grow_with_rows(self):
+        """Testa que a listagem compacta custa o mesmo número de queries para 1 ou 5 linhas"""
+        self.create_appointments(1)
+        with CaptureQueriesContext(connection) as baseline:
+            self.client.get(self.URL)
+
+        self.create_appointments(4)
+        with CaptureQueriesContext(connection) as grown:
+            response = self.client.get(self.URL)
+
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertEqual(len(grown.captured_queries), len(baseline.captured_queries))
+
+    def test_expanded_list_has_fixed_query_count(self):
+        """Testa que ?expand=patient não consulta outras DCNTs (nem nada mais) linha a linha"""
+        self.create_appointments(5)
+        OtherDCNT.objects.create(patient=PatientUser.objects.first(), name='Asma')
+
+        with self.assertNumQueries(3): #* Sem a anotação eram 7: uma consulta a outras DCNTs por linha
+            response = self.client.get(self.URL, {'expand': 'patient'})
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertIn('OUTRAS DCNTs', {row['patient']['conditions'] for row in response.data['results']})
+
+    def test_expand_respects_sparse_fields(self):
+        """Testa que ?expand= não devolve um campo que o ?fields= (ou ?omit=) tirou"""
+        self.create_appointments(1)
+
+        row = self.client.get(self.URL, {'fields': 'id', 'expand': 'patient'}).data['results'][0]
+        self.assertEqual(set(row), {'id'})
+        row = self.client.get(self.URL, {'omit': 'patient', 'expand': 'patient'}).data['results'][0]
+        self.assertNotIn('patient', row)
+        row = self.client.get(self.URL, {'fields': 'id,patient', 'expand': 'patient'}).data['results'][0]
+        self.assertEqual(row['patient']['user']['first_name'], 'Maria')
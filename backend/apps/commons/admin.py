@@ -1,5 +1,7 @@
-from django.contrib import admin
-from django.contrib.admin.models import LogEntry
+from django.contrib import admin, messages
+from django.contrib.admin.models import CHANGE, DELETION, LogEntry
+from django.core.exceptions import ValidationError
+from django.db import transaction
 
 # Register your models here.
 @admin.register(LogEntry)
@@ -41,20 +43,51 @@ class BaseModelAdmin(admin.ModelAdmin):
         obj.full_clean()
         obj.save(user=request.user)
 
+    #* Actions em lote: um UPDATE/DELETE por bloco de BULK_ACTION_CHUNK_SIZE linhas, todos na mesma transação,
+    #* e os registros de auditoria (LogEntry) gravados com bulk_create.
+    BULK_ACTION_CHUNK_SIZE = 1000
+
+    def _bulk_action(self, request, queryset, action, action_flag, change_message):
+        pks = list(queryset.order_by().values_list('pk', flat=True))
+        total = 0
+        with transaction.atomic():
+            for index in range(0, len(pks), self.BULK_ACTION_CHUNK_SIZE):
+                chunk = self.model.all_objects.filter(pk__in=pks[index:index + self.BULK_ACTION_CHUNK_SIZE])
+                #* select_related() segue as FKs obrigatórias, que é o que os __str__ costumam usar (ex.: user)
+                objects = list(chunk.select_related())
+                LogEntry.objects.log_actions(
+                    user_id=request.user.pk, queryset=objects, action_flag=action_flag, change_message=change_message,
+                )
+                total += action(chunk)
+        return total
+
     @admin.action(description="Soft delete nos selecionados")
     def soft_delete_selected(self, request, queryset):
-        for obj in queryset:
-            obj.delete(user=request.user) #* Action personalizada para fazer soft delete de objetos selecionados.
+        total = self._bulk_action(
+            request, queryset.filter(is_deleted=False), lambda chunk: chunk.delete(user=request.user),
+            CHANGE, "Soft delete em lote.",
+        )
+        self.message_user(request, f"{total} registro(s) excluído(s).", messages.SUCCESS)
 
     @admin.action(description="Restaurar selecionados")
     def restore_selected(self, request, queryset):
-        for obj in queryset:
-            obj.restore(user=request.user) #* Action personalizada para restaurar objetos soft-deletados.
+        try:
+            total = self._bulk_action(
+                request, queryset.filter(is_deleted=True), lambda chunk: chunk.restore(user=request.user),
+                CHANGE, "Restaurado em lote.",
+            )
+        except ValidationError as error: #* Ex.: agendamento restaurado em horário já ocupado
+            self.message_user(request, " ".join(error.messages), messages.ERROR)
+            return
+        self.message_user(request, f"{total} registro(s) restaurado(s).", messages.SUCCESS)
 
     @admin.action(description="Hard delete nos selecionados") 
-    def hard_delete_selected(self, request, queryset):
-        for obj in queryset:
-            obj.hard_delete() #! Action para apagar permanentemente os objetos selecionados.
+    def hard_delete_selected(self, request, queryset): #! Apaga permanentemente os objetos selecionados.
+        total = self._bulk_action(
+            request, queryset, lambda chunk: chunk.hard_delete()[1].get(self.model._meta.label, 0),
+            DELETION, "Hard delete em lote.",
+        )
+        self.message_user(request, f"{total} registro(s) apagado(s) permanentemente.", messages.SUCCESS)
 
 
-    actions = ['soft_delete_selected', 'restore_selected', 'hard_delete_selected']
\ No newline at end of file
+    actions = ['soft_delete_selected', 'restore_selected', 'hard_delete_selected']
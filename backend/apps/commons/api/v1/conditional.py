@@ -0,0 +1,63 @@
+import hashlib
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+#* GET condicional (ETag / Last-Modified) para o BaseModelViewSet. A resposta depende de quem pede
+#* (escopo do papel, o mesmo do cache de respostas) e dos parâmetros (filtros, expand, cursor), então os
+#* dois entram em toda ETag.
+#*   - detalhe: (pk, updated_at) do objeto já carregado pelo get_object. O Last-Modified só vai quando o
+#*     serializer não lê outros models: o updated_at do objeto não muda quando um aninhado muda;
+#*   - lista: Max(updated_at) e Count do queryset filtrado (uma consulta).
+#* As duas levam também as versões das tabelas lidas pelo serializer (ver response_cache.view_dependencies),
+#* que mudam em qualquer escrita, inclusive as em lote e as dos models aninhados (ex.: o User do paciente).
+#* Como essas versões vivem no cache, rotas com models aninhados só têm ETag com settings.SHARED_CACHE
+#* (ver BaseModelViewSet.use_conditional_requests).
+#* A comparação acontece antes de serializar: com If-None-Match/If-Modified-Since batendo, volta 304 vazio.
+
+
+def _digest(*parts):
+    return hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def _request_scope(request, scope, versions):
+    params = sorted((key, value) for key in request.query_params for value in request.query_params.getlist(key))
+    return scope, versions, params
+
+
+def detail_validators(request, instance, scope, versions, embedded=False):
+    """(etag, last_modified) de uma rota de detalhe; embedded: a resposta também lê outros models."""
+    updated_at = getattr(instance, 'updated_at', None)
+    if updated_at is None:
+        return None, None
+    etag = f'W/"{_digest(instance.pk, updated_at.isoformat(), *_request_scope(request, scope, versions))}"'
+    return etag, None if embedded else updated_at.timestamp()
+
+
+def list_validators(request, queryset, scope, versions):
+    """
+    (etag, last_modified) de uma listagem. O Last-Modified vai no cabeçalho mas não é usado na comparação:
+    excluir uma linha tira ela do queryset sem aumentar o Max(updated_at), então só a ETag é confiável.
+    """
+    model = queryset.model
+    if not any(field.name == 'updated_at' for field in model._meta.concrete_fields):
+        return None, None
+    summary = queryset.order_by().aggregate(last=Max('updated_at'), total=Count('pk'))
+    last = summary['last']
+    etag = f'W/"{_digest(last and last.isoformat(), summary["total"], *_request_scope(request, scope, versions))}"'
+    return etag, last and last.timestamp()
+
+
+def not_modified(request, etag, last_modified=None):
+    """Resposta 304 (ou 412) quando as pré-condições da requisição batem; senão None."""
+    if etag is None or request.method not in ('GET', 'HEAD'):
+        return None
+    return get_conditional_response(request._request, etag=etag, last_modified=last_modified and int(last_modified))
+
+
+def set_validators(response, etag, last_modified=None):
+    if etag is not None:
+        response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
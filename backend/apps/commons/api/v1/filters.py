@@ -0,0 +1,237 @@
+from datetime import datetime, time, timedelta
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+RANGE_LOOKUPS = ('gte', 'lte', 'gt', 'lt')
+TEXT_LOOKUPS = ('exact', 'iexact', 'startswith', 'istartswith')
+TRUE_VALUES, FALSE_VALUES = ('true', '1'), ('false', '0')
+NUMERIC_FIELDS = (models.IntegerField, models.DecimalField, models.FloatField)
+
+
+def _parse_ids(name, raw):
+    try:
+        return [int(value) for value in raw.split(',') if value]
+    except ValueError:
+        raise ValidationError({name: 'Informe ids numéricos separados por vírgula.'})
+
+
+def _parse_choices(name, field, raw):
+    values = [value for value in raw.split(',') if value]
+    valid = {str(choice) for choice, label in field.flatchoices}
+    invalid = [value for value in values if value not in valid]
+    if invalid:
+        raise ValidationError({name: f'Valor(es) inválido(s): {", ".join(invalid)}. Opções: {", ".join(sorted(valid))}.'})
+    return values
+
+
+def _parse_bool(name, raw):
+    value = raw.lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValidationError({name: 'Use true ou false.'})
+
+
+def _parse_number(param, field, raw):
+    try:
+        return field.to_python(raw.replace(',', '.'))
+    except DjangoValidationError:
+        raise ValidationError({param: 'Informe um número.'})
+
+
+def _is_numeric(field):
+    return isinstance(field, NUMERIC_FIELDS) and not field.choices
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _date_range_lookup(name, field, lookup, raw):
+    """
+    Converte ?campo__gte=2024-01-31 em um lookup direto na coluna. Em DateTimeField uma data
+    sem hora vira o início do dia (lte/gt usam o dia seguinte), sem __date para não perder o índice.
+    """
+    param = f'{name}__{lookup}'
+    try:
+        parsed = parse_datetime(raw) if 'T' in raw or ' ' in raw else parse_date(raw)
+    except ValueError: #* Formato certo com data que não existe (ex.: 2025-02-30)
+        parsed = None
+    if parsed is None:
+        raise ValidationError({param: 'Use o formato AAAA-MM-DD ou AAAA-MM-DDTHH:MM.'})
+
+    if isinstance(field, models.DateTimeField):
+        if isinstance(parsed, datetime):
+            if timezone.is_naive(parsed):
+                parsed = timezone.make_aware(parsed)
+        else:
+            if lookup in ('lte', 'gt'):
+                parsed += timedelta(days=1)
+                lookup = 'lt' if lookup == 'lte' else 'gte'
+            parsed = _start_of_day(parsed)
+    elif isinstance(parsed, datetime):
+        parsed = parsed.date()
+
+    return {f'{name}__{lookup}': parsed}
+
+
+def get_model_field(model, path):
+    field = None
+    for part in path.split('__'):
+        field = model._meta.get_field(part)
+        model = field.related_model
+    return field
+
+
+class DeclarativeFilterBackend(BaseFilterBackend):
+    """
+    Filtros declarados na viewset, todos traduzidos para WHERE no SQL:
+
+    - filter_fields: campos do model. O tipo do campo define a query string aceita:
+      FK -> ?patient=1,2 | choices -> ?status=ativo,cancelado | bool -> ?is_deleted=false |
+      data/hora -> ?created_at__gte=2024-01-01&created_at__lte=2024-01-31 |
+      número -> ?hba1c__gt=9 (ou ?hba1c=9) | demais -> igualdade.
+    - search_fields: ?search= por prefixo; cada termo precisa casar com algum dos campos.
+      O lookup padrão é istartswith; use 'campo__startswith' para colunas sem caixa (ex.: CPF).
+    """
+    search_param = 'search'
+
+    def get_filters(self, request, model, view):
+        params = request.query_params
+        lookups = {}
+
+        for name in getattr(view, 'filter_fields', ()):
+            field = get_model_field(model, name)
+
+            if isinstance(field, (models.DateField, models.DateTimeField)):
+                for lookup in RANGE_LOOKUPS:
+                    raw = params.get(f'{name}__{lookup}')
+                    if raw:
+                        lookups.update(_date_range_lookup(name, field, lookup, raw))
+                continue
+
+            if _is_numeric(field):
+                for lookup in RANGE_LOOKUPS:
+                    raw = params.get(f'{name}__{lookup}')
+                    if raw:
+                        lookups[f'{name}__{lookup}'] = _parse_number(f'{name}__{lookup}', field, raw)
+
+            raw = params.get(name)
+            if not raw:
+                continue
+
+            if field.many_to_one or field.one_to_one:
+                lookups[f'{name}__in'] = _parse_ids(name, raw)
+            elif field.choices:
+                lookups[f'{name}__in'] = _parse_choices(name, field, raw)
+            elif isinstance(field, models.BooleanField):
+                lookups[name] = _parse_bool(name, raw)
+            elif _is_numeric(field):
+                lookups[name] = _parse_number(name, field, raw)
+            else:
+                lookups[name] = raw
+
+        return lookups
+
+    def get_search_condition(self, request, view):
+        terms = request.query_params.get(self.search_param, '').split()
+        fields = getattr(view, 'search_fields', ())
+        if not terms or not fields:
+            return None
+
+        lookups = [field if field.rsplit('__', 1)[-1] in TEXT_LOOKUPS else f'{field}__istartswith' for field in fields]
+        condition = Q()
+        for term in terms:
+            term_condition = Q()
+            for lookup in lookups:
+                term_condition |= Q(**{lookup: term})
+            condition &= term_condition
+        return condition
+
+    def filter_queryset(self, request, queryset, view):
+        lookups = self.get_filters(request, queryset.model, view)
+        if lookups:
+            queryset = queryset.filter(**lookups)
+
+        condition = self.get_search_condition(request, view)
+        if condition is not None:
+            queryset = queryset.filter(condition)
+
+        return queryset
+
+    def get_schema_operation_parameters(self, view):
+        queryset = getattr(view, 'queryset', None)
+        if queryset is None:
+            return []
+        model = queryset.model
+
+        parameters = []
+        for name in getattr(view, 'filter_fields', ()):
+            try:
+                field = get_model_field(model, name)
+            except FieldDoesNotExist:
+                continue
+
+            if isinstance(field, (models.DateField, models.DateTimeField)):
+                for lookup in RANGE_LOOKUPS:
+                    parameters.append({
+                        'name': f'{name}__{lookup}', 'required': False, 'in': 'query',
+                        'description': f'{field.verbose_name} ({lookup}). Data ou data/hora ISO.',
+                        'schema': {'type': 'string'},
+                    })
+                continue
+
+            if _is_numeric(field):
+                for lookup in RANGE_LOOKUPS:
+                    parameters.append({
+                        'name': f'{name}__{lookup}', 'required': False, 'in': 'query',
+                        'description': f'{field.verbose_name} ({lookup}).', 'schema': {'type': 'number'},
+                    })
+
+            if field.many_to_one or field.one_to_one:
+                description = 'Id(s) separados por vírgula.'
+            elif field.choices:
+                description = 'Opções: ' + ', '.join(str(choice) for choice, label in field.flatchoices)
+            else:
+                description = str(field.verbose_name)
+            parameters.append({
+                'name': name, 'required': False, 'in': 'query', 'description': description,
+                'schema': {'type': 'boolean' if isinstance(field, models.BooleanField) else 'string'},
+            })
+
+        if getattr(view, 'search_fields', ()):
+            parameters.append({
+                'name': self.search_param, 'required': False, 'in': 'query',
+                'description': 'Busca por prefixo em: ' + ', '.join(view.search_fields),
+                'schema': {'type': 'string'},
+            })
+
+        ordering_fields = getattr(view, 'ordering_fields', ())
+        if ordering_fields:
+            parameters.append({
+                'name': 'ordering', 'required': False, 'in': 'query',
+                'description': 'Ordenação (prefixo - para decrescente): ' + ', '.join(ordering_fields),
+                'schema': {'type': 'string'},
+            })
+        return parameters
+
+
+def get_ordering(request, view, default):
+    """Lê ?ordering= aceitando apenas os campos de view.ordering_fields (a paginação usa o resultado)."""
+    raw = request.query_params.get('ordering')
+    if not raw:
+        return default
+
+    allowed = getattr(view, 'ordering_fields', ())
+    ordering = [value.strip() for value in raw.split(',') if value.strip()]
+    invalid = [value for value in ordering if value.lstrip('-') not in allowed]
+    if invalid:
+        raise ValidationError({'ordering': f'Ordenação inválida: {", ".join(invalid)}. Opções: {", ".join(allowed)}.'})
+    return ordering
@@ -0,0 +1,175 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat() #* isoformat mantém os microssegundos, necessários para não pular linhas
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _get_value(obj, path):
+    for attr in path.split('__'):
+        obj = getattr(obj, attr)
+    return obj
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginação por cursor (keyset) sobre (created_at, id), a mesma ordem do BaseModel.Meta.ordering
+    com o id como desempate. Cada página é um range scan no índice, então o custo não cresce com a
+    posição da página nem com o tamanho da tabela. O total (count) só é calculado com ?count=true.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = api_settings.PAGE_SIZE or 50
+    max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', 200)
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Cursor inválido.'
+
+    def get_ordering(self, request, queryset, view):
+        #* Views podem trocar a ordem (ex.: ?ordering=); o id fica sempre como desempate
+        get_ordering = getattr(view, 'get_keyset_ordering', None)
+        ordering = tuple(get_ordering(request)) if get_ordering else self.ordering
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering += ('-id' if ordering[0].startswith('-') else 'id',)
+        return ordering
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            return list(data['v']), bool(data.get('r', False))
+        except (TypeError, ValueError, KeyError, binascii.Error, UnicodeEncodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj, reverse):
+        values = [_encode_value(_get_value(obj, field.lstrip('-'))) for field in self.ordering_fields]
+        data = json.dumps({'v': values, 'r': reverse}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def keyset_filter(self, values, reverse):
+        """(a, b) < (x, y) escrito como a < x OR (a = x AND b < y), com a <= x para o range do índice."""
+        condition = Q()
+        for index, field in enumerate(self.ordering_fields):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') != reverse else 'gt'
+            clause = Q(**{f'{name}__{lookup}': values[index]})
+            for previous, value in zip(self.ordering_fields[:index], values[:index]):
+                clause &= Q(**{previous.lstrip('-'): value})
+            condition |= clause
+
+        first = self.ordering_fields[0]
+        bound = 'lte' if first.startswith('-') != reverse else 'gte'
+        return Q(**{f'{first.lstrip("-")}__{bound}': values[0]}) & condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = remove_query_param(request.build_absolute_uri(), self.cursor_query_param)
+        self.ordering_fields = self.get_ordering(request, queryset, view)
+        self.page_size_value = self.get_page_size(request)
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None and len(cursor[0]) != len(self.ordering_fields):
+            raise NotFound(self.invalid_cursor_message)
+
+        self.count = None
+        if request.query_params.get(self.count_query_param, '').lower() in ('1', 'true'):
+            self.count = queryset.count()
+
+        reverse = cursor is not None and cursor[1]
+        if reverse: #* Página anterior: percorre o índice no sentido contrário e desinverte depois
+            order = [field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering_fields]
+        else:
+            order = list(self.ordering_fields)
+
+        queryset = queryset.order_by(*order)
+        if cursor is not None:
+            queryset = queryset.filter(self.keyset_filter(cursor[0], reverse))
+
+        rows = list(queryset[:self.page_size_value + 1])
+        has_more = len(rows) > self.page_size_value
+        rows = rows[:self.page_size_value]
+
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = rows
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        payload = {}
+        if self.count is not None:
+            payload['count'] = self.count
+        payload['next'] = self.get_next_link()
+        payload['previous'] = self.get_previous_link()
+        payload['results'] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'description': 'Presente apenas com ?count=true.'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param, 'required': False, 'in': 'query',
+                'description': 'Cursor da página (use os links next/previous).',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param, 'required': False, 'in': 'query',
+                'description': f'Itens por página (máximo {self.max_page_size}).',
+                'schema': {'type': 'integer'},
+            },
+            {
+                'name': self.count_query_param, 'required': False, 'in': 'query',
+                'description': 'Inclui o total exato de registros (custa um COUNT).',
+                'schema': {'type': 'boolean'},
+            },
+        ]
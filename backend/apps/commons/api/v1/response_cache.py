@@ -0,0 +1,85 @@
+import hashlib
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import serializers
+from rest_framework.response import Response
+from apps.commons.api.v1.conditional import not_modified, set_validators
+from apps.commons.cache import get_table_versions
+
+#* Cache das respostas de list/retrieve das viewsets com cache_responses = True. A chave junta a rota,
+#* o escopo do papel (get_cache_scope), os parâmetros e as versões das tabelas de que a resposta depende:
+#* o model da viewset, os models aninhados no serializer (recursivamente, inclusive os de ?expand=) e os
+#* declarados em Meta.cache_dependencies. Salvar/excluir/restaurar qualquer um deles troca a versão
+#* (BaseModel, SoftDeleteQuerySet e os signals de quem não é BaseModel, ex.: User), então a entrada antiga
+#* deixa de ser lida. Com vários processos e cache local (settings.SHARED_CACHE = False), cada processo só vê
+#* as próprias escritas e o RESPONSE_CACHE_TIMEOUT limita quanto tempo uma resposta fica velha: por isso, nesse
+#* caso, só os dados de referência (locations) usam o cache; dados clínicos exigem um cache compartilhado.
+RESPONSE_CACHE_KEY = 'commons:response:{}:{}'
+
+_dependencies = {}
+
+
+def _resolve(model):
+    return apps.get_model(model) if isinstance(model, str) else model
+
+
+def serializer_models(serializer_class, seen=None):
+    """Models lidos pelo serializer: o seu, os aninhados, os expansíveis e os de Meta.cache_dependencies."""
+    seen = set() if seen is None else seen
+    if serializer_class in seen:
+        return set()
+    seen.add(serializer_class)
+
+    meta = getattr(serializer_class, 'Meta', None)
+    models = {_resolve(model) for model in getattr(meta, 'cache_dependencies', ())}
+    if getattr(meta, 'model', None) is not None:
+        models.add(meta.model)
+    for field in serializer_class().fields.values():
+        field = getattr(field, 'child', field)
+        if isinstance(field, serializers.BaseSerializer):
+            models |= serializer_models(type(field), seen)
+    for expandable in getattr(meta, 'expandable_fields', {}).values():
+        models |= serializer_models(expandable, seen)
+    return models
+
+
+def view_dependencies(view):
+    key = (type(view), view.action)
+    if key not in _dependencies:
+        models = {view.queryset.model} | serializer_models(view.get_serializer_class())
+        _dependencies[key] = sorted(models, key=lambda model: model._meta.label)
+    return _dependencies[key]
+
+
+def response_cache_key(view, request):
+    params = sorted((key, value) for key in request.query_params for value in request.query_params.getlist(key))
+    route = ':'.join(str(part) for part in (
+        type(view).__module__, type(view).__name__, view.action, sorted(view.kwargs.items()),
+        view.get_cache_scope(), request.get_host(), params,
+    ))
+    digest = hashlib.md5(route.encode()).hexdigest()
+    return RESPONSE_CACHE_KEY.format(digest, get_table_versions(*view_dependencies(view)))
+
+
+def get_cached_response(view, request):
+    """Resposta guardada (ou 304 pela ETag guardada) para a requisição; None quando não há."""
+    if not view.cache_responses or request.method != 'GET':
+        return None
+    request._response_cache_key = response_cache_key(view, request)
+    entry = cache.get(request._response_cache_key)
+    if entry is None:
+        return None
+
+    data, etag, last_modified = entry
+    response = not_modified(request, etag, last_modified if view.action == 'retrieve' else None)
+    if response is not None:
+        return response
+    return set_validators(Response(data), etag, last_modified)
+
+
+def store_response(view, request, response, etag=None, last_modified=None):
+    key = getattr(request, '_response_cache_key', None)
+    if key is not None and response.status_code == 200:
+        cache.set(key, (response.data, etag, last_modified), settings.RESPONSE_CACHE_TIMEOUT)
+    return response
@@ -1,6 +1,69 @@
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 from apps.commons.api.v1.utils import single_profile_validation
 
+
+def get_expand(request): #* Lê ?expand=a,b da requisição
+    if request is None:
+        return set()
+    return _split_names(request.query_params.get("expand", ""))
+
+
+def _split_names(raw):
+    return {name.strip() for name in raw.split(",") if name.strip()}
+
+
+def get_sparse_fields(request):
+    """Lê ?fields=a,b e ?omit=c da requisição: (campos pedidos ou None para todos, campos omitidos)"""
+    if request is None or request.method not in SAFE_METHODS:
+        return None, set()
+    fields = request.query_params.get("fields")
+    return (_split_names(fields) if fields else None), _split_names(request.query_params.get("omit", ""))
+
+
+def defer_unused_columns(queryset, serializer, keep=()):
+    """
+    Adia (defer) as colunas do model que nenhum campo do serializer lê, então elas não saem do banco.
+    Só colunas simples: chaves estrangeiras ficam, porque podem estar no select_related da viewset.
+    Campo de método ou property sem Meta.method_field_sources declarado pode ler qualquer coluna: nada é adiado.
+    """
+    serializer = getattr(serializer, "child", serializer)
+    sources = getattr(getattr(serializer, "Meta", None), "method_field_sources", {})
+    model_names = {field.name for field in queryset.model._meta.get_fields()} | set(queryset.query.annotations)
+    used = set(keep)
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        attr = None if field.source == "*" else field.source_attrs[0]
+        if attr in model_names:
+            used.add(attr)
+        elif name in sources: #* Campo de método (ou property) que declara o que lê
+            used.update(sources[name])
+        else:
+            return queryset
+
+    deferred = [
+        field.name for field in queryset.model._meta.concrete_fields
+        if not field.is_relation and not field.primary_key and field.name not in used
+    ]
+    return queryset.defer(*deferred) if deferred else queryset
+
+
+class ExpandableFieldsMixin:
+    """
+    Permite trocar campos compactos pela forma aninhada completa via ?expand=.
+    Declare em Meta: expandable_fields = {"patient": PatientUserSerializer}
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        request = self.context.get("request")
+        expandable = getattr(self.Meta, "expandable_fields", {})
+        for name in get_expand(request) & set(expandable):
+            if name in self.fields: #* Respeita ?fields=/?omit=: campo tirado pelo BaseSerializer não volta pelo expand
+                self.fields[name] = expandable[name](read_only=True)
+
 class BaseSerializer(serializers.ModelSerializer):
     class Meta:
         model = None
@@ -23,6 +86,12 @@ class BaseSerializer(serializers.ModelSerializer):
         #* Se esses campos existirem no modelo, eles são automaticamente marcados como read_only
         for field_name in existing:
             self.fields[field_name].read_only = True
+
+        #* Sparse fieldsets nas leituras: ?fields= escolhe e ?omit= tira campos (só do serializer de topo)
+        fields, omit = get_sparse_fields(self.context.get("request"))
+        for field_name in list(self.fields):
+            if (fields is not None and field_name not in fields) or field_name in omit:
+                self.fields.pop(field_name)
             
     def update(self, instance, validated_data): #! Função para resolver o problema do nested update
         user_data = validated_data.pop("user", None) # *Remove os dados do campo user do validated_data
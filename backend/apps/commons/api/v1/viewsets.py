@@ -1,9 +1,17 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import QuerySet
 from rest_framework import mixins, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, DjangoModelPermissions
 from rest_framework.viewsets import GenericViewSet
-from apps.commons.api.v1.permissions import BaseRolePermission
+from apps.accounts.utils.utils import get_request_profile
+from apps.commons.api.v1.conditional import detail_validators, list_validators, not_modified, set_validators
+from apps.commons.api.v1.filters import DeclarativeFilterBackend, get_ordering
+from apps.commons.api.v1.response_cache import get_cached_response, store_response, view_dependencies
+from apps.commons.cache import get_table_versions
+from apps.commons.api.v1.serializers import defer_unused_columns, get_expand
 
 
 class BaseModelViewSet(mixins.CreateModelMixin, mixins.DestroyModelMixin, mixins.UpdateModelMixin,
@@ -12,6 +20,86 @@ class BaseModelViewSet(mixins.CreateModelMixin, mixins.DestroyModelMixin, mixins
     permission_classes = [IsAuthenticated, DjangoModelPermissions]
     queryset = None
     serializer_class = None
+    list_serializer_class = None #* Serializer compacto opcional para a listagem (a rota de detalhe segue completa)
+
+    #* Filtros declarativos (ver DeclarativeFilterBackend); as viewsets acrescentam os seus campos
+    filter_backends = [DeclarativeFilterBackend]
+    filter_fields = ('created_at', 'is_deleted')
+    search_fields = ()
+    ordering_fields = ('created_at',) #* Só colunas NOT NULL: a paginação por cursor compara os valores
+    default_ordering = ('-created_at',)
+    conditional_requests = True #* ETag/Last-Modified em list/retrieve, com 304 antes de serializar (ver conditional.py)
+    cache_responses = False #* Guarda as respostas de list/retrieve até uma escrita nas tabelas lidas (ver response_cache.py)
+
+    def get_serializer_class(self):
+        if self.action == 'list' and self.list_serializer_class is not None:
+            return self.list_serializer_class
+        return super().get_serializer_class()
+
+    #* Colunas sempre carregadas, mesmo fora do ?fields=: cursor da paginação e ETag leem essas
+    always_loaded_columns = ('created_at', 'updated_at')
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action in ('list', 'retrieve') and isinstance(queryset, QuerySet):
+            ordering = [
+                field.lstrip('-').split('__')[0] for field in self.get_keyset_ordering(self.request)
+            ] if self.action == 'list' else []
+            queryset = defer_unused_columns(queryset, self.get_serializer(), (*self.always_loaded_columns, *ordering))
+        return queryset
+
+    def get_cache_scope(self):
+        """Parte da chave do cache de respostas: quem enxerga o mesmo conteúdo (papel e perfil)."""
+        role, profile = get_request_profile(self.request)
+        if role == 'superuser':
+            return role
+        return f'{role}:{getattr(profile, "pk", None)}'
+
+    def get_validator_scope(self): #* (escopo, versões das tabelas lidas) que entram nas ETags
+        return self.get_cache_scope(), get_table_versions(*view_dependencies(self))
+
+    def use_conditional_requests(self):
+        #* Models aninhados só entram na ETag pelas versões das tabelas, que com cache local não veem as escritas
+        #* de outros workers (dariam 304 com dado velho): sem cache compartilhado, só rotas de um model só têm ETag
+        return self.conditional_requests and (settings.SHARED_CACHE or len(view_dependencies(self)) == 1)
+
+    def list(self, request, *args, **kwargs):
+        response = get_cached_response(self, request)
+        if response is not None:
+            return response
+
+        queryset = self.filter_queryset(self.get_queryset())
+        validators = list_validators(request, queryset, *self.get_validator_scope()) if self.use_conditional_requests() else (None, None)
+        response = not_modified(request, validators[0]) #* Na lista só a ETag decide (ver list_validators)
+        if response is not None:
+            return response
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        else:
+            response = Response(self.get_serializer(queryset, many=True).data)
+        return store_response(self, request, set_validators(response, *validators), *validators)
+
+    def retrieve(self, request, *args, **kwargs):
+        response = get_cached_response(self, request)
+        if response is not None:
+            return response
+
+        instance = self.get_object()
+        embedded = len(view_dependencies(self)) > 1 #* Ex.: a ficha do paciente traz User, endereço e condições
+        validators = detail_validators(request, instance, *self.get_validator_scope(), embedded) if self.use_conditional_requests() else (None, None)
+        response = not_modified(request, *validators)
+        if response is not None:
+            return response
+        response = set_validators(Response(self.get_serializer(instance).data), *validators)
+        return store_response(self, request, response, *validators)
+
+    def get_expand(self):
+        return get_expand(self.request)
+
+    def get_keyset_ordering(self, request):
+        return get_ordering(request, self, self.default_ordering)
 
     def perform_create(self, serializer):
         extra_data = {}
@@ -36,17 +124,19 @@ class BaseModelViewSet(mixins.CreateModelMixin, mixins.DestroyModelMixin, mixins
 
     @action(detail=True, methods=["patch"], url_path='restore')
     def restore_object(self, request, pk=None):
-        user = request.user
-        role_perm = BaseRolePermission()
+        role, profile = get_request_profile(request)
 
-        if not user.is_superuser and not role_perm.is_manager(request):
+        if not request.user.is_superuser and role != 'manager':
             return Response(
                 {"detail": "Apenas superusuários e gestores podem usar o restore."},
                 status=status.HTTP_403_FORBIDDEN,
             )
 
         instance = self.get_object()
-        instance.restore(user=request.user)
+        try:
+            instance.restore(user=request.user)
+        except DjangoValidationError as error: #* Ex.: agendamento restaurado (direto ou em cascata) que conflita com a agenda atual
+            return Response({"detail": error.messages}, status=status.HTTP_400_BAD_REQUEST)
         return Response({"detail": "Objeto restaurado com sucesso."}, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=["delete"], url_path='hard-delete')
@@ -0,0 +1,67 @@
+import hashlib
+from uuid import uuid4
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+#* Versão por tabela: toda escrita via BaseModel/SoftDeleteQuerySet troca a versão das tabelas tocadas,
+#* e quem guarda resultados em cache inclui essas versões na chave. Não precisa apagar nada, as chaves
+#* antigas simplesmente deixam de ser lidas e expiram pelo timeout.
+TABLE_VERSION_CACHE_KEY = 'commons:table_version:{}'
+
+
+def get_model_tables(model):
+    """Tabelas escritas ao salvar o model (inclui as dos pais na herança multi-tabela, ex.: HAS -> DCNT)."""
+    meta = model._meta.concrete_model._meta
+    return [meta.db_table] + [parent._meta.db_table for parent in meta.get_parent_list()]
+
+
+def _bump(keys):
+    cache.set_many({key: uuid4().hex for key in keys}, settings.TABLE_VERSION_TIMEOUT)
+
+
+def bump_versions(*keys):
+    """Troca as versões das chaves; quem guardou algo sob as versões antigas deixa de ler."""
+    keys = set(keys)
+    _bump(keys)
+    #* Dentro de uma transação, outra requisição pode recalcular com os dados antigos antes do commit
+    #* e guardar sob a versão nova; trocar de novo no commit descarta esse resultado.
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _bump(keys))
+
+
+def get_versions(*keys):
+    """Retorna {chave: versão} das chaves, criando as que o cache ainda não tem."""
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            version = uuid4().hex
+            if not cache.add(key, version, settings.TABLE_VERSION_TIMEOUT):
+                version = cache.get(key) or version
+            versions[key] = version
+    return versions
+
+
+def bump_table_versions(*models):
+    bump_versions(*(TABLE_VERSION_CACHE_KEY.format(table) for model in models for table in get_model_tables(model)))
+
+
+def get_table_versions(*models):
+    """Retorna as versões atuais das tabelas dos models, criando as que o cache ainda não tem."""
+    keys = [TABLE_VERSION_CACHE_KEY.format(table) for model in models for table in get_model_tables(model)]
+    versions = get_versions(*keys)
+    #* Resumo curto para a chave caber nos limites de backends como o memcached
+    return hashlib.md5(':'.join(versions[key] for key in keys).encode()).hexdigest()
+
+
+def cached_for_models(key, models, compute, timeout=None):
+    """
+    Lê do cache o resultado de compute() guardado sob a chave + versões das tabelas de models.
+    Qualquer save/delete/restore nessas tabelas muda a chave, então o valor nunca fica mais velho que a escrita.
+    """
+    versioned_key = f'{key}:{get_table_versions(*models)}'
+    value = cache.get(versioned_key)
+    if value is None:
+        value = compute()
+        cache.set(versioned_key, value, timeout)
+    return value
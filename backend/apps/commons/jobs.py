@@ -0,0 +1,114 @@
+import logging
+import threading
+import zlib
+from collections import namedtuple
+from time import monotonic
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.module_loading import autodiscover_modules
+from django.utils.timezone import now
+
+#* Jobs periódicos: cada app registra as suas transições em lote em <app>/jobs.py com @periodic_job.
+#* Cada job é um UPDATE com a condição da transição no WHERE (ex.: end_date < hoje AND active), então
+#* rodar de novo, ou em dois workers ao mesmo tempo, não muda nada: a segunda execução toca 0 linhas.
+#* No PostgreSQL um advisory lock ainda evita que dois workers façam o mesmo trabalho em paralelo.
+logger = logging.getLogger(__name__)
+
+Job = namedtuple('Job', 'name function interval')
+JobResult = namedtuple('JobResult', 'name rows seconds skipped')
+
+_registry = {}
+
+
+def periodic_job(name, interval):
+    """Registra function(moment) -> linhas alteradas para rodar a cada interval segundos."""
+    def register(function):
+        _registry[name] = Job(name, function, interval)
+        return function
+    return register
+
+
+def get_jobs(names=None):
+    autodiscover_modules('jobs')
+    if not names:
+        return list(_registry.values())
+    unknown = set(names) - set(_registry)
+    if unknown:
+        raise KeyError(f"Jobs desconhecidos: {', '.join(sorted(unknown))}")
+    return [_registry[name] for name in names]
+
+
+def _try_lock(name):
+    if connection.vendor != 'postgresql':
+        return True #* SQLite serializa as escritas; a condição no WHERE já basta
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_try_advisory_xact_lock(%s)', [zlib.crc32(f'job:{name}'.encode())])
+        return cursor.fetchone()[0]
+
+
+def run_job(job, moment=None):
+    started = monotonic()
+    with transaction.atomic():
+        if not _try_lock(job.name):
+            return JobResult(job.name, 0, monotonic() - started, True)
+        rows = job.function(moment or now())
+    return JobResult(job.name, rows, monotonic() - started, False)
+
+
+def run_jobs(names=None, moment=None):
+    return [run_job(job, moment) for job in get_jobs(names)]
+
+
+class JobScheduler(threading.Thread):
+    """Agendador em processo: roda cada job no seu intervalo até stop()."""
+
+    def __init__(self, jobs):
+        super().__init__(name='periodic-jobs', daemon=True)
+        self.jobs = jobs
+        self.stopped = threading.Event()
+
+    def run(self):
+        due = {job.name: monotonic() for job in self.jobs}
+        while self.jobs and not self.stopped.is_set():
+            for job in self.jobs:
+                if due[job.name] > monotonic():
+                    continue
+                try:
+                    result = run_job(job)
+                    logger.info('%s: %s linhas em %.3fs%s', result.name, result.rows, result.seconds,
+                                ' (em execução em outro worker)' if result.skipped else '')
+                except Exception:
+                    logger.exception('Falha no job %s', job.name)
+                finally:
+                    connection.close() #* A thread não passa pelo ciclo de request que fecha a conexão
+                due[job.name] = monotonic() + job.interval
+            self.stopped.wait(max(0, min(due.values()) - monotonic()))
+
+    def stop(self):
+        self.stopped.set()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def start_scheduler(names=None):
+    """Inicia (uma vez por processo) o agendador em segundo plano."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = JobScheduler(get_jobs(names))
+            _scheduler.start()
+        return _scheduler
+
+
+def start_server_scheduler():
+    """
+    Chamado pelos pontos de entrada do servidor (core/wsgi.py e core/asgi.py) quando PERIODIC_JOBS_IN_PROCESS
+    está ligado. Fica fora do AppConfig.ready para não subir em migrate, shell, testes ou no processo pai
+    do autoreload. Com gunicorn --preload a thread ficaria no master: sem preload cada worker sobe a sua
+    e o lock de cada job evita execuções duplicadas.
+    """
+    if settings.PERIODIC_JOBS_IN_PROCESS:
+        return start_scheduler()
+    return None
@@ -0,0 +1,81 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+from django.utils.timezone import now, timedelta
+
+
+def _top_queries():
+    """As consultas mais frequentes das rotas, montadas como as viewsets montam."""
+    from apps.accounts.models import PatientUser, ProfessionalUser
+    from apps.alerts.models import Alert
+    from apps.appointments.models import Appointment
+    from apps.appointments.scheduling import busy_queryset
+    from apps.medications.models import Medication
+
+    professional = ProfessionalUser.all_objects.values_list('pk', flat=True).first() or 0
+    today = now()
+    page = slice(0, 51) #* Primeira página da KeysetPagination (page_size + 1)
+
+    return [
+        ('Pacientes ativos (listagem)', 'patient_active_idx',
+         PatientUser.objects.order_by('-created_at', '-id')[page]),
+        ('Login / check-cpf por CPF', 'unique_active_patient_cpf',
+         PatientUser.objects.filter(cpf='00000000000')),
+        ('Cadastro por cartão SUS', 'unique_active_patient_sus',
+         PatientUser.objects.filter(sus='000000000000000')),
+        ('Busca de pacientes por prefixo do nome', 'patient_name_prefix_idx',
+         PatientUser.objects.filter(search_name__startswith='maria').order_by('search_name')[:10]),
+        ('Busca de pacientes por trecho do nome (PostgreSQL)', 'patient_name_trgm_idx',
+         PatientUser.objects.filter(search_name__contains='silva').order_by('search_name')[:10]),
+        ('Busca de pacientes por telefone', 'patient_phone_prefix_idx',
+         PatientUser.objects.filter(search_phone__startswith='8399').order_by('search_name')[:10]),
+        ('Agenda do profissional', 'appointment_prof_dt_idx',
+         Appointment.all_objects.filter(
+             professional=professional, scheduled_datetime__range=(today, today + timedelta(days=7))
+         ).order_by('scheduled_datetime')),
+        ('Conflito na agenda ao marcar', 'appointment_prof_dt_idx',
+         busy_queryset(today, today + timedelta(minutes=30), professional_id=professional)),
+        ('Horários livres da instituição', 'appointment_local_dt_idx',
+         busy_queryset(today, today + timedelta(days=7), local_id=0).order_by('scheduled_datetime')),
+        ('Agendamentos ativos (listagem)', 'appointment_active_idx',
+         Appointment.objects.order_by('-created_at', '-id')[page]),
+        ('Alertas críticos em aberto', 'alert_risk_active_idx',
+         Alert.objects.filter(risk_level='critical').order_by('-created_at')[page]),
+        ('KPIs de alertas por risco', 'alert_risk_active_idx',
+         Alert.objects.order_by().values('risk_level').annotate(total=Count('pk'))),
+        ('Job finish_past_appointments', 'appointment_open_end_idx',
+         Appointment.objects.filter(status='ativo', end_datetime__lte=today)),
+        ('Job expire_medications', 'medication_expiry_idx',
+         Medication.all_objects.filter(active=True, end_date__lt=today.date())),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Roda EXPLAIN nas consultas principais da API e mostra se usam os índices esperados."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--analyze', action='store_true',
+            help="Executa as consultas (EXPLAIN ANALYZE) para ver tempos reais. Apenas PostgreSQL.",
+        )
+
+    def handle(self, *args, **options):
+        options_explain = {}
+        if options['analyze']:
+            if connection.vendor != 'postgresql':
+                self.stderr.write(self.style.WARNING("--analyze só é suportado no PostgreSQL; ignorando."))
+            else:
+                options_explain = {'analyze': True, 'buffers': True}
+
+        missing = 0
+        for label, index, queryset in _top_queries():
+            plan = queryset.explain(**options_explain)
+            uses_index = index in plan
+
+            status = self.style.SUCCESS('usa') if uses_index else self.style.WARNING('NÃO usa')
+            self.stdout.write(f"\n== {label}: {status} {index}")
+            self.stdout.write(plan)
+            missing += not uses_index
+
+        #* Em tabelas pequenas o planejador pode preferir seq scan; rode com dados reais antes de concluir algo
+        self.stdout.write(f"\n{missing} consulta(s) sem o índice esperado.")
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.commons.jobs import JobScheduler, get_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = 'Roda os jobs periódicos (expiração de medicações, finalização de agendamentos passados...).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('jobs', nargs='*', help='Jobs a rodar (padrão: todos)')
+        parser.add_argument('--loop', action='store_true', help='Fica rodando cada job no seu intervalo')
+        parser.add_argument('--list', action='store_true', help='Lista os jobs registrados')
+
+    def handle(self, *args, **options):
+        try:
+            jobs = get_jobs(options['jobs'])
+        except KeyError as error:
+            raise CommandError(error.args[0])
+
+        if options['list']:
+            for job in jobs:
+                self.stdout.write(f'{job.name} (a cada {job.interval}s)')
+            return
+
+        if options['loop']:
+            scheduler = JobScheduler(jobs)
+            self.stdout.write(f"Rodando {', '.join(job.name for job in jobs)}. Ctrl+C para parar.")
+            try:
+                scheduler.run() #* Na thread principal, para o Ctrl+C interromper
+            except KeyboardInterrupt:
+                scheduler.stop()
+            return
+
+        for job in jobs:
+            result = run_job(job)
+            status = 'ignorado, em execução em outro worker' if result.skipped else f'{result.rows} linhas'
+            self.stdout.write(f'{result.name}: {status} em {result.seconds:.3f}s')
@@ -1,20 +1,82 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.utils.timezone import now
 from django.contrib.auth.models import User
+from django.apps import apps
 from django.core.exceptions import ValidationError
+from apps.commons.cache import bump_table_versions
 
 # Create your models here.
 
+def deleted_models(delete_result): #* O delete() do Django devolve (total, {'app.Model': n}), incluindo os apagados em cascata
+    return [apps.get_model(label) for label, count in delete_result[1].items() if count]
+
+#* Cascata do soft delete: cada model declara em soft_delete_cascade as relações reversas (nomes de
+#* acesso, ex.: 'appointment', 'has') cujos registros acompanham o seu soft delete/restore. É um UPDATE
+#* por model relacionado, dos dependentes para cima, na mesma transação. O restore só traz de volta os
+#* dependentes excluídos junto (mesmo deleted_at), não os que já estavam excluídos antes.
+def _cascade_relations(model):
+    for name in getattr(model, 'soft_delete_cascade', ()):
+        relation = model._meta.get_field(name)
+        yield relation.related_model, relation.field.name
+
+def cascade_soft_delete(parents, deleted_at, user=None):
+    for related_model, field in _cascade_relations(parents.model):
+        related_model.all_objects.filter(
+            **{f'{field}__in': parents.values('pk')}, is_deleted=False
+        ).delete(user=user, deleted_at=deleted_at)
+
+def cascade_restore(parents, user=None):
+    for related_model, field in _cascade_relations(parents.model):
+        related_model.all_objects.filter(
+            **{f'{field}__in': parents.filter(is_deleted=True).values('pk')},
+            is_deleted=True, deleted_at=F(f'{field}__deleted_at'),
+        ).restore(user=user)
+
 #QuerySet=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
 class SoftDeleteQuerySet(models.QuerySet): #* Custom QuerySet para implementar soft_delete.
-    def delete(self):
-        return super().update(is_deleted=True, deleted_at=now())
+    def update(self, **kwargs): #* Escritas em lote também invalidam os caches que dependem da tabela
+        kwargs.setdefault('updated_at', now()) #* O auto_now não vale no update(); sem isso ETags e incrementais não veem a escrita
+        rows = super().update(**kwargs)
+        if rows:
+            bump_table_versions(self.model)
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        bump_table_versions(self.model)
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        if 'updated_at' not in fields:
+            stamp = now()
+            for obj in objs:
+                obj.updated_at = stamp
+            fields = [*fields, 'updated_at']
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        bump_table_versions(self.model)
+        return rows
+
+    def delete(self, user=None, deleted_at=None): #* Um único UPDATE; deleted_by vai junto quando informado
+        fields = {'is_deleted': True, 'deleted_at': deleted_at or now()}
+        if user:
+            fields['deleted_by'] = user
+        with transaction.atomic():
+            cascade_soft_delete(self, fields['deleted_at'], user)
+            return self.update(**fields)
     
-    def restore(self):
-        return super().update(is_deleted=False, deleted_at=None )
+    def restore(self, user=None):
+        fields = {'is_deleted': False, 'deleted_at': None, 'deleted_by': None}
+        if user:
+            fields['updated_by'] = user
+        with transaction.atomic():
+            cascade_restore(self, user)
+            return self.update(**fields)
     
     def hard_delete(self): #! Cuidado! deleta permanentemente o objeto.
-        return super().delete()
+        result = super().delete()
+        bump_table_versions(self.model, *deleted_models(result))
+        return result
 
     def active(self):
         return self.filter(is_deleted=False)
@@ -24,12 +86,16 @@ class SoftDeleteQuerySet(models.QuerySet): #* Custom QuerySet para implementar s
     
 #Manager=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
 class ActiveManager(models.Manager): #* Inclui apenas os objetos que não foram soft_deleted.
+    queryset_class = SoftDeleteQuerySet #* Models podem trocar por uma subclasse de SoftDeleteQuerySet
+
     def get_queryset(self):
-        return SoftDeleteQuerySet(self.model, using=self._db).filter(is_deleted=False)
+        return self.queryset_class(self.model, using=self._db).filter(is_deleted=False)
     
 class AllManager(models.Manager): #* Inclui todos os objetos, mesmo os com soft_delete, mas cuidado com o hard_delete!
+    queryset_class = SoftDeleteQuerySet
+
     def get_queryset(self):
-        return SoftDeleteQuerySet(self.model, using=self._db)
+        return self.queryset_class(self.model, using=self._db)
     
 #BaseModel=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
 class BaseModel(models.Model):
@@ -45,6 +111,8 @@ class BaseModel(models.Model):
     objects = ActiveManager()
     all_objects = AllManager()
 
+    soft_delete_cascade = () #* Relações reversas que acompanham o soft delete/restore (ver cascade_soft_delete)
+
     class Meta:
         abstract = True
         ordering = ['-created_at'] #* Ordenando pelo criado mais recentemente.
@@ -70,6 +138,7 @@ class BaseModel(models.Model):
             self.updated_by = user
 
         super().save(*args, **kwargs)
+        bump_table_versions(type(self))
     
     def delete(self, user=None):
         self.is_deleted = True
@@ -78,7 +147,9 @@ class BaseModel(models.Model):
         if user:
             self.deleted_by = user
 
-        self.save(update_fields=['is_deleted', 'deleted_at', 'deleted_by'])
+        with transaction.atomic():
+            cascade_soft_delete(type(self).all_objects.filter(pk=self.pk), self.deleted_at, user)
+            self.save(update_fields=['is_deleted', 'deleted_at', 'deleted_by'])
 
     def restore(self, user=None):
         self.is_deleted = False
@@ -88,10 +159,13 @@ class BaseModel(models.Model):
         if user:
             self.updated_by = user
 
-        self.save(update_fields=['is_deleted', 'deleted_at', 'deleted_by', 'updated_by'])
+        with transaction.atomic():
+            cascade_restore(type(self).all_objects.filter(pk=self.pk), user) #* Antes do save: compara com o deleted_at gravado
+            self.save(update_fields=['is_deleted', 'deleted_at', 'deleted_by', 'updated_by'])
 
     def hard_delete(self, keep_parents=False): #* Esse keep_parents serve pra dizer se os objetos pais do objeto deletado devem ser deletados também
-        super().delete(keep_parents=keep_parents)
+        result = super().delete(keep_parents=keep_parents)
+        bump_table_versions(type(self), *deleted_models(result))
     
     def get_creator_profile(self, user):
         """Retorna o tipo de user que criou o objeto"""
@@ -0,0 +1,86 @@
+"""
+Testes para as actions em lote do BaseModelAdmin
+"""
+from django.contrib.admin.models import CHANGE, DELETION, LogEntry
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now, timedelta
+from apps.accounts.models import PatientUser, ProfessionalUser
+from apps.accounts.utils.utils import ensure_role_version, get_role_version
+from apps.appointments.models import Appointment
+from apps.locations.models import MicroArea
+
+
+class BulkAdminActionsTest(TestCase):
+    """Testes para soft_delete_selected, restore_selected e hard_delete_selected"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', password='123456')
+        self.client.force_login(self.admin)
+
+    def run_action(self, model, action, pks):
+        url = f'/admin/{model._meta.app_label}/{model._meta.model_name}/'
+        return self.client.post(url, {'action': action, '_selected_action': [str(pk) for pk in pks]}, follow=True)
+
+    def create_micro_areas(self, amount):
+        return [MicroArea.objects.create(name=f'Área {index}').pk for index in range(amount)]
+
+    def test_soft_delete_is_set_based(self):
+        """Testa que o soft delete em lote custa o mesmo número de queries para 2 ou 20 linhas"""
+        few = self.create_micro_areas(2)
+        with CaptureQueriesContext(connection) as baseline:
+            self.run_action(MicroArea, 'soft_delete_selected', few)
+
+        many = self.create_micro_areas(20)
+        with CaptureQueriesContext(connection) as grown:
+            self.run_action(MicroArea, 'soft_delete_selected', many)
+
+        self.assertEqual(len(grown.captured_queries), len(baseline.captured_queries))
+        deleted = MicroArea.all_objects.filter(pk__in=many)
+        self.assertEqual(deleted.filter(is_deleted=True, deleted_by=self.admin, deleted_at__isnull=False).count(), 20)
+        self.assertEqual(LogEntry.objects.filter(action_flag=CHANGE, object_id__in=map(str, many)).count(), 20)
+
+    def test_restore_stamps_updated_by(self):
+        """Testa que restaurar limpa os campos de exclusão e registra quem restaurou"""
+        pks = self.create_micro_areas(3)
+        MicroArea.objects.filter(pk__in=pks).delete(user=self.admin)
+
+        self.run_action(MicroArea, 'restore_selected', pks)
+
+        restored = MicroArea.objects.filter(pk__in=pks)
+        self.assertEqual(restored.filter(updated_by=self.admin, deleted_by__isnull=True).count(), 3)
+
+    def test_hard_delete_logs_before_deleting(self):
+        """Testa que o hard delete em lote apaga as linhas e deixa o registro de auditoria"""
+        pks = self.create_micro_areas(3)
+        self.run_action(MicroArea, 'hard_delete_selected', pks)
+
+        self.assertFalse(MicroArea.all_objects.filter(pk__in=pks).exists())
+        entries = LogEntry.objects.filter(action_flag=DELETION)
+        self.assertEqual(sorted(entries.values_list('object_repr', flat=True)), ['Área 0', 'Área 1', 'Área 2'])
+
+    def test_profile_soft_delete_invalidates_role_claims(self):
+        """Testa que excluir perfis em lote troca a versão das claims de papel dos users"""
+        patient = PatientUser.objects.create(user=User.objects.create_user(username='paciente'))
+        version = ensure_role_version(patient.user_id)
+
+        self.run_action(PatientUser, 'soft_delete_selected', [patient.pk])
+
+        self.assertNotEqual(get_role_version(patient.user_id), version)
+
+    def test_restore_keeps_agenda_rule(self):
+        """Testa que restaurar em lote um agendamento em horário ocupado é recusado"""
+        professional = ProfessionalUser.objects.create(user=User.objects.create_user(username='prof'), role='Enfermeiro')
+        patient = PatientUser.objects.create(user=User.objects.create_user(username='paciente'))
+        start = now() + timedelta(days=1)
+        fields = dict(patient=patient, professional=professional, scheduled_datetime=start, risk_level='Seguro', type='Consulta')
+        deleted = Appointment.objects.create(**fields)
+        deleted.delete()
+        Appointment.objects.create(**fields)
+
+        response = self.run_action(Appointment, 'restore_selected', [deleted.pk])
+
+        self.assertContains(response, 'já tem um agendamento')
+        self.assertTrue(Appointment.all_objects.get(pk=deleted.pk).is_deleted)
@@ -0,0 +1,102 @@
+"""
+Testes para os GETs condicionais (ETag / Last-Modified) do BaseModelViewSet
+"""
+from django.contrib.auth.models import User
+from django.db.models import QuerySet
+from django.test import override_settings
+from django.utils.http import http_date
+from django.utils.timezone import timedelta
+from rest_framework.test import APITestCase
+from apps.accounts.models import PatientUser
+from apps.conditions.models import DM
+from apps.locations.models import Institution
+
+
+class ConditionalRequestTest(APITestCase):
+    """Testes para If-None-Match / If-Modified-Since em list e retrieve"""
+
+    URL = '/api/v1/locations/institutions/'
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', password='123456')
+        self.client.force_authenticate(self.admin)
+        self.centro = Institution.objects.create(name='UBS Centro')
+        self.norte = Institution.objects.create(name='UBS Norte')
+
+    def detail(self, institution=None):
+        return f'{self.URL}{(institution or self.centro).pk}/'
+
+    def test_detail_etag_and_last_modified(self):
+        """Testa o 304 pela ETag e pela data, antes de serializar, e a ETag nova depois de salvar"""
+        response = self.client.get(self.detail())
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertEqual(response['Last-Modified'], http_date(self.centro.updated_at.timestamp()))
+
+        with self.assertNumQueries(1): #* Só o get_object
+            response = self.client.get(self.detail(), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        since = http_date((self.centro.updated_at + timedelta(seconds=1)).timestamp())
+        self.assertEqual(self.client.get(self.detail(), HTTP_IF_MODIFIED_SINCE=since).status_code, 304)
+
+        self.centro.name = 'UBS Centro II'
+        self.centro.save()
+        response = self.client.get(self.detail(), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_fingerprint_follows_rows_and_params(self):
+        """Testa que a ETag da lista muda com escrita, exclusão, escrita em lote e com os filtros"""
+        etag = self.client.get(self.URL)['ETag']
+        self.assertEqual(self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertNotEqual(self.client.get(self.URL, {'page_size': 1})['ETag'], etag)
+
+        self.norte.delete()
+        response = self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response['ETag']
+        Institution.objects.filter(pk=self.centro.pk).update(name='UBS Centro II')
+        self.assertEqual(self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_list_ignores_if_modified_since(self):
+        """Testa que a lista só responde 304 pela ETag (excluir não aumenta o Max(updated_at))"""
+        since = http_date((self.norte.updated_at + timedelta(seconds=1)).timestamp())
+        self.assertEqual(self.client.get(self.URL, HTTP_IF_MODIFIED_SINCE=since).status_code, 200)
+
+    @override_settings(SHARED_CACHE=True)
+    def test_etag_depends_on_scope(self):
+        """Testa que outro papel não reaproveita a ETag de quem pediu antes"""
+        patient = PatientUser.objects.create(user=User.objects.create_user(username='paciente'))
+        url = f'/api/v1/accounts/patients/{patient.pk}/'
+        etag = self.client.get(url)['ETag']
+        self.client.force_authenticate(patient.user)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    @override_settings(SHARED_CACHE=True)
+    def test_embedded_detail_has_no_last_modified(self):
+        """Testa que a ficha do paciente não responde 304 só pela data quando o User aninhado muda"""
+        patient = PatientUser.objects.create(user=User.objects.create_user(username='paciente', first_name='José'))
+        url = f'/api/v1/accounts/patients/{patient.pk}/'
+        self.assertNotIn('Last-Modified', self.client.get(url))
+
+        patient.user.first_name = 'Josué'
+        patient.user.save()
+        since = http_date((patient.updated_at + timedelta(seconds=1)).timestamp())
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user']['first_name'], 'Josué')
+
+    @override_settings(SHARED_CACHE=False)
+    def test_embedded_routes_skip_etag_with_local_cache(self):
+        """Testa que, com cache local, a ficha do paciente não responde 304 após mudança feita por outro worker"""
+        patient = PatientUser.objects.create(user=User.objects.create_user(username='paciente'))
+        dm = DM.objects.create(patient=patient, glycated_hemoglobin='7,5')
+        url = f'/api/v1/accounts/patients/{patient.pk}/'
+        self.assertNotIn('ETag', self.client.get(url))
+
+        QuerySet.update(DM.objects.filter(pk=dm.pk), is_deleted=True) #* Só o banco, sem trocar a versão: como em outro worker
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='*').status_code, 200)
+        self.assertIn('ETag', self.client.get(self.detail())) #* Rota de um model só segue com ETag
@@ -0,0 +1,88 @@
+"""
+Testes para os filtros declarativos, busca e ordenação dos BaseModelViewSet
+"""
+from datetime import datetime
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from apps.accounts.models import PatientUser, ProfessionalUser
+from apps.appointments.models import Appointment
+from apps.conditions.models import HAS
+
+
+class DeclarativeFilterTest(APITestCase):
+    """Testes para o DeclarativeFilterBackend usando a rota de agendamentos"""
+
+    URL = '/api/v1/appointments/appointments/'
+
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_superuser(username='admin', password='123456'))
+        self.professional = ProfessionalUser.objects.create(user=User.objects.create_user(username='prof'), role='Enfermeiro')
+        self.maria = PatientUser.objects.create(
+            user=User.objects.create_user(username='maria', first_name='Maria', last_name='Silva'), cpf='11122233344'
+        )
+        self.joao = PatientUser.objects.create(
+            user=User.objects.create_user(username='joao', first_name='João', last_name='Souza'), cpf='55566677788'
+        )
+        self.first = self.create_appointment(self.maria, datetime(2025, 3, 10, 9), 'Crítico', 'ativo')
+        self.second = self.create_appointment(self.maria, datetime(2025, 3, 11, 15), 'Seguro', 'finalizado')
+        self.third = self.create_appointment(self.joao, datetime(2025, 3, 12, 8), 'Moderado', 'ativo')
+
+    def create_appointment(self, patient, scheduled, risk_level, status):
+        return Appointment.objects.create(
+            patient=patient, professional=self.professional, scheduled_datetime=timezone.make_aware(scheduled),
+            risk_level=risk_level, type='Consulta', status=status,
+        )
+
+    def ids(self, params):
+        response = self.client.get(self.URL, params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return {row['id'] for row in response.data['results']}
+
+    def test_foreign_key_and_choice_filters(self):
+        """Testa filtros por id de FK e por choices (com múltiplos valores)"""
+        self.assertEqual(self.ids({'patient': self.maria.id}), {self.first.id, self.second.id})
+        self.assertEqual(self.ids({'status': 'ativo', 'risk_level': 'Crítico,Moderado'}), {self.first.id, self.third.id})
+
+    def test_date_range_includes_whole_days(self):
+        """Testa que datas sem hora cobrem o dia inteiro no lte"""
+        params = {'scheduled_datetime__gte': '2025-03-11', 'scheduled_datetime__lte': '2025-03-11'}
+        self.assertEqual(self.ids(params), {self.second.id})
+
+    def test_is_deleted_filter(self):
+        """Testa o filtro de soft delete nas rotas que listam todos os registros"""
+        self.third.delete()
+        self.assertEqual(self.ids({'is_deleted': 'true'}), {self.third.id})
+        self.assertNotIn(self.third.id, self.ids({'is_deleted': 'false'}))
+
+    def test_prefix_search_on_patient(self):
+        """Testa a busca por prefixo de nome e CPF do paciente"""
+        self.assertEqual(self.ids({'search': 'mar sil'}), {self.first.id, self.second.id})
+        self.assertEqual(self.ids({'search': '555'}), {self.third.id})
+        self.assertEqual(self.ids({'search': 'ilva'}), set())
+
+    def test_whitelisted_ordering(self):
+        """Testa a ordenação permitida e a recusa de campos fora da lista"""
+        response = self.client.get(self.URL, {'ordering': 'scheduled_datetime', 'page_size': 2})
+        self.assertEqual([row['id'] for row in response.data['results']], [self.first.id, self.second.id])
+
+        next_page = self.client.get(response.data['next'])
+        self.assertEqual([row['id'] for row in next_page.data['results']], [self.third.id])
+
+        self.assertEqual(self.client.get(self.URL, {'ordering': 'description'}).status_code, 400)
+
+    def test_invalid_values(self):
+        """Testa que valores inválidos retornam 400 em vez de serem ignorados"""
+        self.assertEqual(self.client.get(self.URL, {'status': 'pendente'}).status_code, 400)
+        self.assertEqual(self.client.get(self.URL, {'patient': 'abc'}).status_code, 400)
+        self.assertEqual(self.client.get(self.URL, {'created_at__gte': 'ontem'}).status_code, 400)
+        self.assertEqual(self.client.get(self.URL, {'created_at__gte': '2025-02-30'}).status_code, 400)
+        self.assertEqual(self.client.get(self.URL, {'created_at__lte': '2025-01-01T25:00'}).status_code, 400)
+
+    def test_conditions_filtered_by_patient(self):
+        """Testa o ?patient= usado pelo frontend nas rotas de HAS"""
+        has = HAS.objects.create(patient=self.maria)
+        HAS.objects.create(patient=self.joao)
+
+        response = self.client.get('/api/v1/conditions/systolic-hypertension-cases/', {'patient': self.maria.id})
+        self.assertEqual([row['id'] for row in response.data['results']], [has.id])
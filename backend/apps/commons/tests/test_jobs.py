@@ -0,0 +1,60 @@
+"""
+Testes para os jobs periódicos
+"""
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils.timezone import now, timedelta
+from apps.accounts.models import PatientUser, ProfessionalUser
+from apps.appointments.models import Appointment
+from apps.commons.jobs import run_jobs
+from apps.medications.models import Medication
+
+
+class PeriodicJobsTest(TestCase):
+    """Testes para expire_medications, finish_past_appointments e o comando run_jobs"""
+
+    def setUp(self):
+        self.patient = PatientUser.objects.create(user=User.objects.create_user(username='paciente'))
+        self.professional = ProfessionalUser.objects.create(user=User.objects.create_user(username='prof'), role='Enfermeiro')
+        self.today = now().date()
+
+    def medication(self, end_date):
+        return Medication.objects.create(patient=self.patient, name='Losartana', description='50mg', end_date=end_date)
+
+    def appointment(self, start, status='ativo'):
+        return Appointment.objects.create(
+            patient=self.patient, professional=self.professional, scheduled_datetime=start,
+            risk_level='Seguro', type='Consulta', status=status,
+        )
+
+    def results(self):
+        return {result.name: result.rows for result in run_jobs(['expire_medications', 'finish_past_appointments'])}
+
+    def test_transitions_are_applied_once(self):
+        """Testa as transições em lote e que rodar de novo não altera nada"""
+        expired = self.medication(self.today - timedelta(days=1))
+        current = self.medication(self.today)
+        past = self.appointment(now() - timedelta(hours=2))
+        running = self.appointment(now() - timedelta(minutes=10))
+        cancelled = self.appointment(now() - timedelta(days=1), status='cancelado')
+
+        self.assertEqual(self.results(), {'expire_medications': 1, 'finish_past_appointments': 1})
+        self.assertEqual(self.results(), {'expire_medications': 0, 'finish_past_appointments': 0})
+
+        expired = Medication.all_objects.get(pk=expired.pk)
+        self.assertEqual((expired.active, expired.is_deleted), (False, True))
+        self.assertIsNotNone(expired.deleted_at)
+        self.assertTrue(Medication.objects.get(pk=current.pk).active)
+        statuses = dict(Appointment.objects.values_list('pk', 'status'))
+        self.assertEqual(
+            [statuses[past.pk], statuses[running.pk], statuses[cancelled.pk]], ['finalizado', 'ativo', 'cancelado']
+        )
+
+    def test_command_reports_rows(self):
+        """Testa que o comando informa as linhas alteradas por job"""
+        self.medication(self.today - timedelta(days=3))
+        out = StringIO()
+        call_command('run_jobs', 'expire_medications', stdout=out)
+        self.assertIn('expire_medications: 1 linhas', out.getvalue())
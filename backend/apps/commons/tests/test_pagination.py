@@ -0,0 +1,53 @@
+"""
+Testes para a paginação por cursor (keyset) das listagens
+"""
+from django.contrib.auth.models import User
+from django.utils.timezone import now
+from rest_framework.test import APITestCase
+from apps.locations.models import Institution
+
+
+class KeysetPaginationTest(APITestCase):
+    """Testes para a KeysetPagination usada pelos BaseModelViewSet"""
+
+    URL = '/api/v1/locations/institutions/'
+
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_superuser(username='admin', password='123456'))
+        self.institutions = [Institution.objects.create(name=f'UBS {i}') for i in range(5)]
+        #* Mesmo created_at para todas: o id precisa desempatar sem pular nem repetir linhas
+        Institution.all_objects.update(created_at=now())
+
+    def test_walks_all_pages_forward_and_back(self):
+        """Testa que next/previous percorrem todas as linhas na ordem (-created_at, -id)"""
+        expected = sorted(i.id for i in self.institutions)[::-1]
+
+        response = self.client.get(self.URL, {'page_size': 2})
+        seen, pages = [], []
+        while True:
+            self.assertEqual(response.status_code, 200)
+            pages.append([row['id'] for row in response.data['results']])
+            seen += pages[-1]
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+
+        self.assertEqual(seen, expected)
+        self.assertIsNotNone(response.data['previous'])
+
+        previous = self.client.get(response.data['previous'])
+        self.assertEqual([row['id'] for row in previous.data['results']], pages[-2])
+
+    def test_count_is_opt_in(self):
+        """Testa que o total só é calculado com ?count=true"""
+        self.assertNotIn('count', self.client.get(self.URL).data)
+        self.assertEqual(self.client.get(self.URL, {'count': 'true'}).data['count'], 5)
+
+    def test_page_size_is_capped(self):
+        """Testa que page_size respeita o limite máximo"""
+        response = self.client.get(self.URL, {'page_size': 100000})
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_invalid_cursor(self):
+        """Testa que um cursor inválido retorna 404"""
+        self.assertEqual(self.client.get(self.URL, {'cursor': 'nao-e-um-cursor'}).status_code, 404)
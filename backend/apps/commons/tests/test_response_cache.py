@@ -0,0 +1,88 @@
+"""
+Testes para o cache de respostas das viewsets (cache_responses)
+"""
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from apps.accounts.models import PatientUser
+from apps.conditions.models import HAS
+from apps.locations.models import Address, Institution
+
+
+@override_settings(SHARED_CACHE=True)
+class ResponseCacheTest(APITestCase):
+    """Testes para o cache de list/retrieve com invalidação pelas tabelas lidas"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(username='admin', password='123456')
+        self.client.force_authenticate(self.admin)
+        self.address = Address.objects.create(street='Rua A', number=1, district='Centro', city='Cidade', uf='SP')
+        self.patient = PatientUser.objects.create(
+            user=User.objects.create_user(username='jose', first_name='José'), address=self.address,
+        )
+        self.url = f'/api/v1/accounts/patients/{self.patient.pk}/'
+
+    def test_reference_list_is_served_from_cache(self):
+        """Testa que a segunda leitura não consulta a tabela e que escritas (inclusive em lote) invalidam"""
+        url = '/api/v1/locations/institutions/'
+        Institution.objects.create(name='UBS Centro')
+        self.client.get(url)
+        with self.assertNumQueries(1): #* Só o perfil do user (com JWT vem das claims do token)
+            self.assertEqual(len(self.client.get(url).data['results']), 1)
+
+        Institution.objects.create(name='UBS Norte')
+        self.assertEqual(len(self.client.get(url).data['results']), 2)
+
+        Institution.objects.filter(name='UBS Norte').update(name='UBS Sul')
+        self.assertEqual({row['name'] for row in self.client.get(url).data['results']}, {'UBS Centro', 'UBS Sul'})
+
+    def test_patient_detail_follows_embedded_models(self):
+        """Testa que a ficha do paciente é recalculada quando User, endereço ou condições mudam"""
+        self.assertEqual(self.client.get(self.url).data['user']['first_name'], 'José')
+
+        self.patient.user.first_name = 'Josué'
+        self.patient.user.save()
+        self.assertEqual(self.client.get(self.url).data['user']['first_name'], 'Josué')
+
+        self.address.street = 'Rua B'
+        self.address.save()
+        self.assertEqual(self.client.get(self.url).data['address_obj']['street'], 'Rua B')
+
+        HAS.objects.create(patient=self.patient)
+        self.assertEqual(self.client.get(self.url).data['conditions'], 'HAS')
+
+    def test_cached_etag_answers_304(self):
+        """Testa que a ETag guardada com a resposta ainda responde 304 sem consultar o paciente"""
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(1): #* Só o perfil do user
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_scope_is_part_of_the_key(self):
+        """Testa que um paciente não recebe a listagem guardada para outro papel"""
+        self.client.get('/api/v1/accounts/patients/')
+        other = PatientUser.objects.create(user=User.objects.create_user(username='maria'))
+        self.client.force_authenticate(other.user)
+        response = self.client.get('/api/v1/accounts/patients/')
+        self.assertEqual([row['id'] for row in response.data['results']], [other.pk])
+
+    def test_detail_etag_follows_embedded_models(self):
+        """Testa que mudar o User aninhado troca a ETag da ficha, mesmo sem mudar o updated_at do paciente"""
+        etag = self.client.get(self.url)['ETag']
+        self.patient.user.first_name = 'Josué'
+        self.patient.user.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user']['first_name'], 'Josué')
+
+    @override_settings(SHARED_CACHE=False)
+    def test_clinical_data_skips_local_cache(self):
+        """Testa que, com cache local, a ficha do paciente é sempre lida do banco"""
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertGreater(len(queries), 1)
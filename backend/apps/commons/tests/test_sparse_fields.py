@@ -0,0 +1,63 @@
+"""
+Testes para os sparse fieldsets (?fields= / ?omit=) do BaseSerializer/BaseModelViewSet
+"""
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from apps.accounts.models import PatientUser
+from apps.locations.models import MicroArea
+
+
+class SparseFieldsTest(APITestCase):
+    """Testes para /api/v1/accounts/patients/ com ?fields= e ?omit="""
+
+    URL = '/api/v1/accounts/patients/'
+
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_superuser(username='admin', password='123456'))
+        user = User.objects.create_user(username='jose', first_name='José', last_name='Araújo')
+        self.patient = PatientUser.objects.create(
+            user=user, cpf='12345678900', gender='Masculino', micro_area=MicroArea.objects.create(name='Norte'),
+        )
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        patient_select = next(
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and 'FROM "accounts_patientuser"' in query['sql'] and 'MAX(' not in query['sql']
+        )
+        return response.data, patient_select
+
+    def test_fields_trims_output_and_columns(self):
+        """Testa que só os campos pedidos são serializados e as outras colunas não são lidas"""
+        data, sql = self.get(self.URL, fields='id,cpf,user,micro_area')
+        row = data['results'][0]
+        self.assertEqual(set(row), {'id', 'cpf', 'user', 'micro_area'})
+        self.assertEqual(row['user']['first_name'], 'José')
+        self.assertIn('"accounts_patientuser"."cpf"', sql)
+        self.assertNotIn('"accounts_patientuser"."gender"', sql)
+
+    def test_omit_on_detail(self):
+        """Testa ?omit= na rota de detalhe, mantendo as colunas de auditoria usadas pela ETag"""
+        data, sql = self.get(f'{self.URL}{self.patient.pk}/', omit='gender,conditions')
+        self.assertNotIn('gender', data)
+        self.assertEqual(data['cpf'], '12345678900')
+        self.assertNotIn('"accounts_patientuser"."gender"', sql)
+        self.assertIn('"accounts_patientuser"."updated_at"', sql)
+
+    def test_without_params_everything_is_returned(self):
+        """Testa que sem parâmetros a resposta é a completa (só as colunas internas da busca ficam de fora)"""
+        data, sql = self.get(self.URL)
+        self.assertIn('gender', data['results'][0])
+        self.assertIn('conditions', data['results'][0])
+        self.assertNotIn('"accounts_patientuser"."search_name"', sql)
+
+    def test_writes_ignore_fields(self):
+        """Testa que ?fields= não corta a resposta de uma escrita"""
+        response = self.client.patch(f'{self.URL}{self.patient.pk}/?fields=id', {'gender': 'Feminino'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['gender'], 'Feminino')
+        self.assertIn('cpf', response.data)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import HAS, DM, OtherDCNT
+from .models import HAS, DM, OtherDCNT, Measurement
 from apps.commons.admin import BaseModelAdmin
 
 class DCNTBaseAdmin(BaseModelAdmin):
@@ -154,3 +154,12 @@ class OtherDCNTAdmin(DCNTBaseAdmin):
             ),
         }),
     )
+
+
+# === Aferições ===
+@admin.register(Measurement)
+class MeasurementAdmin(admin.ModelAdmin):
+    list_display = ('id', 'patient', 'kind', 'value', 'measured_at', 'created_by')
+    list_filter = ('kind',)
+    raw_id_fields = ('patient',)
+    readonly_fields = ('created_at', 'created_by')
@@ -1,9 +1,11 @@
 from rest_framework.routers import DefaultRouter
-from .viewsets import HASViewset, DMViewset, OtherDCNTViewset
+from .viewsets import HASViewset, DMViewset, OtherDCNTViewset, MeasurementViewset, MeasurementRollupViewset
 
 router_conditions = DefaultRouter()
 router_conditions.register(r'systolic-hypertension-cases', HASViewset)
 router_conditions.register(r'diabetes-mellitus-cases', DMViewset)
 router_conditions.register(r'other-dcnt-cases', OtherDCNTViewset)
+router_conditions.register(r'measurements', MeasurementViewset)
+router_conditions.register(r'measurement-rollups', MeasurementRollupViewset)
 
 urlpatterns = router_conditions.urls
\ No newline at end of file
@@ -1,5 +1,8 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils.timezone import now
 from rest_framework import serializers
-from apps.conditions.models import HAS, DM, OtherDCNT
+from apps.conditions.measurements import Reading, measure_limit, record
+from apps.conditions.models import HAS, DM, OtherDCNT, Measurement, MeasurementRollup
 
 class HASSerializer(serializers.ModelSerializer):
     class Meta:
@@ -11,9 +14,63 @@ class DMSerializer(serializers.ModelSerializer):
         model = DM
         fields = '__all__'
 
+    def save(self, **kwargs): #* Texto e número divergentes no mesmo envio são checados no save do modelo
+        try:
+            return super().save(**kwargs)
+        except DjangoValidationError as error:
+            raise serializers.ValidationError(error.message_dict)
+
+class DMStatsQuerySerializer(serializers.Serializer):
+    """Parâmetros de /diabetes-mellitus-cases/stats/ (os filtros são os mesmos da listagem)"""
+    group_by = serializers.ChoiceField(choices=['micro_area', 'screening_result', 'treatment_type'], required=False)
+
+class DMStatsSerializer(serializers.Serializer):
+    group = serializers.CharField(allow_null=True)
+    total = serializers.IntegerField()
+    hba1c_avg = serializers.FloatField(allow_null=True)
+    hba1c_min = serializers.DecimalField(max_digits=4, decimal_places=2, allow_null=True)
+    hba1c_max = serializers.DecimalField(max_digits=4, decimal_places=2, allow_null=True)
+    random_glucose_avg = serializers.FloatField(allow_null=True)
+    random_glucose_min = serializers.DecimalField(max_digits=6, decimal_places=2, allow_null=True)
+    random_glucose_max = serializers.DecimalField(max_digits=6, decimal_places=2, allow_null=True)
+    fasting_glucose_avg = serializers.FloatField(allow_null=True)
+    fasting_glucose_min = serializers.DecimalField(max_digits=6, decimal_places=2, allow_null=True)
+    fasting_glucose_max = serializers.DecimalField(max_digits=6, decimal_places=2, allow_null=True)
+
 class OtherDCNTSerializer(serializers.ModelSerializer):
     class Meta:
         model = OtherDCNT
         fields = '__all__'
         
-            
\ No newline at end of file
+            
+
+class MeasurementSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Measurement
+        fields = ['id', 'patient', 'kind', 'value', 'measured_at', 'created_at', 'created_by']
+        read_only_fields = ['created_at', 'created_by']
+
+    def validate(self, attrs):
+        #* Mesmos limites das leituras vindas de HAS/DM (ver measurements.parse_measure)
+        if not 0 <= attrs['value'] < measure_limit(attrs['kind']):
+            raise serializers.ValidationError({'value': f"Valor fora da faixa aceita para {attrs['kind']}."})
+        #* O histórico não sobrescreve leituras: a mesma data para o mesmo paciente/tipo é recusada
+        measured_at = attrs.get('measured_at')
+        if measured_at and Measurement.objects.filter(
+            patient=attrs['patient'], kind=attrs['kind'], measured_at=measured_at,
+        ).exists():
+            raise serializers.ValidationError({'measured_at': 'Já existe uma aferição deste tipo nesta data para o paciente.'})
+        return attrs
+
+    def create(self, validated_data):
+        #* Passa pelo registro do histórico para manter o resumo do paciente em dia
+        user = validated_data.pop('created_by', None)
+        reading = Reading(validated_data['patient'].pk, validated_data['kind'], validated_data['value'],
+                          validated_data.get('measured_at') or now())
+        record([reading], user_id=user.pk if user else None)
+        return Measurement.objects.get(patient=validated_data['patient'], kind=reading.kind, measured_at=reading.measured_at)
+
+class MeasurementRollupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MeasurementRollup
+        exclude = ['id']
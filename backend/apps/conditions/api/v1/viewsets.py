@@ -1,15 +1,24 @@
-from drf_spectacular.utils import extend_schema
-from rest_framework import viewsets
+from django.db.models import Avg, Count, F, Max, Min
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import mixins, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from .serializers import HASSerializer, DMSerializer, OtherDCNTSerializer
-from apps.conditions.models import HAS, DM, OtherDCNT
+from .serializers import (
+    HASSerializer, DMSerializer, DMStatsQuerySerializer, DMStatsSerializer, OtherDCNTSerializer,
+    MeasurementSerializer, MeasurementRollupSerializer,
+)
+from apps.accounts.utils.utils import get_request_profile
+from apps.conditions.models import HAS, DM, OtherDCNT, Measurement, MeasurementRollup
 from .permissions import ConditionsDataPermission
+from apps.commons.api.v1.filters import DeclarativeFilterBackend
 from apps.commons.api.v1.viewsets import BaseModelViewSet
 
 @extend_schema(tags=['Conditions - HAS'])
 class HASViewset(BaseModelViewSet):
     permission_classes = [IsAuthenticated, ConditionsDataPermission]
     queryset = HAS.all_objects
+    filter_fields = BaseModelViewSet.filter_fields + ('patient',)
     serializer_class = HASSerializer
 
 @extend_schema(tags=['Conditions - DM'])
@@ -17,11 +26,82 @@ class DMViewset(BaseModelViewSet):
     permission_classes = [IsAuthenticated, ConditionsDataPermission]
 
     queryset = DM.all_objects
+    filter_fields = BaseModelViewSet.filter_fields + (
+        'patient', 'patient__micro_area', 'hba1c', 'random_glucose', 'fasting_glucose',
+    )
     serializer_class = DMSerializer
 
+    STATS_GROUPS = {'micro_area': 'patient__micro_area', 'screening_result': 'screening_result', 'treatment_type': 'treatment_type'}
+    STATS_VALUES = ('hba1c', 'random_glucose', 'fasting_glucose')
+
+    @extend_schema(
+        parameters=[OpenApiParameter('group_by', str, enum=list(STATS_GROUPS), description="Agrupamento (padrão: nenhum).")],
+        responses=DMStatsSerializer(many=True),
+    )
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """Contagem e média/mín./máx. dos valores glicêmicos com os mesmos filtros da listagem, num único GROUP BY."""
+        params = DMStatsQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        queryset = self.filter_queryset(self.get_queryset())
+        if 'is_deleted' not in request.query_params:
+            queryset = queryset.filter(is_deleted=False)
+
+        aggregates = {'total': Count('pk')}
+        for field in self.STATS_VALUES:
+            aggregates.update({
+                f'{field}_avg': Avg(field), f'{field}_min': Min(field), f'{field}_max': Max(field),
+            })
+        group_by = params.validated_data.get('group_by')
+        if group_by:
+            rows = queryset.order_by().values(group=F(self.STATS_GROUPS[group_by])).annotate(**aggregates).order_by('group')
+        else:
+            rows = [{'group': None, **queryset.aggregate(**aggregates)}]
+        return Response({'results': DMStatsSerializer(rows, many=True).data})
+
 @extend_schema(tags=['Conditions - Other'])
 class OtherDCNTViewset(BaseModelViewSet):
     permission_classes = [IsAuthenticated, ConditionsDataPermission]
 
     queryset = OtherDCNT.all_objects
+    filter_fields = BaseModelViewSet.filter_fields + ('patient',)
     serializer_class = OtherDCNTSerializer
+
+
+class PatientScopedMixin:
+    """Pacientes só veem os próprios registros."""
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        role, profile = get_request_profile(self.request)
+        if role == 'patient' and not self.request.user.is_superuser:
+            queryset = queryset.filter(patient=profile)
+        return queryset
+
+
+@extend_schema(tags=['Conditions - Measurements'])
+class MeasurementViewset(PatientScopedMixin, mixins.CreateModelMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Histórico de aferições: só inclusão e consulta (leituras não são editadas nem excluídas)."""
+    permission_classes = [IsAuthenticated, ConditionsDataPermission]
+    queryset = Measurement.objects.all()
+    serializer_class = MeasurementSerializer
+    filter_backends = [DeclarativeFilterBackend]
+    filter_fields = ('patient', 'kind', 'measured_at')
+
+    def get_keyset_ordering(self, request):
+        return ('-measured_at',)
+
+    def perform_create(self, serializer):
+        serializer.save(created_by=self.request.user)
+
+
+@extend_schema(tags=['Conditions - Measurements'])
+class MeasurementRollupViewset(PatientScopedMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Resumo por paciente e tipo (última leitura, média/mín./máx. e tendência em 90 dias) para gráficos e relatórios."""
+    permission_classes = [IsAuthenticated, ConditionsDataPermission]
+    queryset = MeasurementRollup.objects.all()
+    serializer_class = MeasurementRollupSerializer
+    filter_backends = [DeclarativeFilterBackend]
+    filter_fields = ('patient', 'kind', 'latest_at')
+
+    def get_keyset_ordering(self, request):
+        return ('-latest_at',)
@@ -0,0 +1,8 @@
+from django.db import models
+
+class MeasurementKindChoices(models.TextChoices):
+    SYSTOLIC_BP = "SYSTOLIC_BP", "Pressão Arterial Sistólica (mmHg)"
+    DIASTOLIC_BP = "DIASTOLIC_BP", "Pressão Arterial Diastólica (mmHg)"
+    RANDOM_GLUCOSE = "RANDOM_GLUCOSE", "Glicemia Capilar Aleatória (mg/dL)"
+    FASTING_GLUCOSE = "FASTING_GLUCOSE", "Glicemia Capilar em Jejum (mg/dL)"
+    HBA1C = "HBA1C", "Hemoglobina Glicada (%)"
@@ -13,6 +13,17 @@ class ClinicalEvaluationDM(models.Model):
     glycated_hemoglobin = models.CharField(
         "Hemoglobina Glicada (%)", max_length=50, null=True, blank=True
     )
+    #* Os mesmos valores como número, para filtros, limiares e agregados no SQL. Preenchidos no save a
+    #* partir dos campos texto acima (ver DM.save); textos que não são número ficam com NULL aqui.
+    random_glucose = models.DecimalField(
+        "Glicemia Capilar Aleatória (mg/dL) - valor", max_digits=6, decimal_places=2, null=True, blank=True
+    )
+    fasting_glucose = models.DecimalField(
+        "Glicemia Capilar em Jejum (mg/dL) - valor", max_digits=6, decimal_places=2, null=True, blank=True
+    )
+    hba1c = models.DecimalField(
+        "Hemoglobina Glicada (%) - valor", max_digits=4, decimal_places=2, null=True, blank=True
+    )
     weight = models.DecimalField(
         "Peso (kg)", max_digits=5, decimal_places=2, null=True, blank=True
     )
@@ -0,0 +1,8 @@
+from apps.commons.jobs import periodic_job
+from apps.conditions.measurements import refresh_stale_rollups
+
+
+@periodic_job('refresh_measurement_rollups', interval=60 * 60 * 6)
+def refresh_measurement_rollups(moment):
+    """Resumos com leituras que saíram da janela de 90 dias desde o último cálculo."""
+    return refresh_stale_rollups(moment)
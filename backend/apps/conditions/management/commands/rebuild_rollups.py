@@ -0,0 +1,21 @@
+from time import monotonic
+from django.core.management.base import BaseCommand
+from apps.conditions.measurements import backfill, rebuild_rollups
+from apps.conditions.models import DM, HAS
+
+
+class Command(BaseCommand):
+    help = 'Recalcula os resumos de aferições; com --backfill, leva antes os valores atuais de HAS/DM para o histórico.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backfill', action='store_true', help='Importa as aferições atuais de HAS/DM')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Registros por lote (padrão: 500)')
+
+    def handle(self, *args, **options):
+        started = monotonic()
+        if options['backfill']:
+            for model in (HAS, DM):
+                readings = sum(backfill(model, options['chunk_size']))
+                self.stdout.write(f'{model._meta.verbose_name}: {readings} leituras importadas')
+        keys = sum(rebuild_rollups(options['chunk_size']))
+        self.stdout.write(f'{keys} resumos recalculados em {monotonic() - started:.2f}s')
@@ -0,0 +1,21 @@
+from time import monotonic
+from django.core.management.base import BaseCommand, CommandError
+from apps.conditions.metrics import recompute_table
+
+
+class Command(BaseCommand):
+    help = 'Recalcula IMC, classificação da PA e Framingham de todos os registros de HAS/DM (ex.: após mudança de diretriz).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tables', nargs='*', help='Tabelas a recalcular (padrão: has e dm)')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Linhas por lote (padrão: 2000)')
+
+    def handle(self, *args, **options):
+        tables = options['tables'] or ['has', 'dm']
+        if set(tables) - {'has', 'dm'}:
+            raise CommandError("Tabelas válidas: has, dm")
+        for table in tables:
+            started, read, changed = monotonic(), 0, 0
+            for rows, updated in recompute_table(table, options['chunk_size']):
+                read, changed = read + rows, changed + updated
+            self.stdout.write(f'{table}: {read} registros lidos, {changed} atualizados em {monotonic() - started:.2f}s')
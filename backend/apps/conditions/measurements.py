@@ -0,0 +1,198 @@
+import re
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+from django.db import transaction
+from django.utils.timezone import now, timedelta
+from apps.commons.cache import bump_table_versions
+from apps.conditions.constants.measurement_choices import MeasurementKindChoices as Kind
+
+#* Histórico de aferições (Measurement) e resumos por paciente/tipo (MeasurementRollup). Cada inserção
+#* recalcula só os resumos das chaves tocadas, lendo as leituras da janela pelo índice (patient, kind,
+#* measured_at). Leituras que saem da janela com o passar dos dias são tratadas pelo job
+#* refresh_measurement_rollups, que recalcula apenas os resumos com window_start_at vencido.
+ROLLUP_WINDOW = timedelta(days=90)
+ROLLUP_CHUNK_SIZE = 500
+
+#* Campos das condições que alimentam o histórico; as duas aferições de PA viram uma leitura (a média)
+HAS_MEASURED_FIELDS = {
+    'BP_assessment1_1': Kind.SYSTOLIC_BP, 'BP_assessment2_1': Kind.SYSTOLIC_BP,
+    'BP_assessment1_2': Kind.DIASTOLIC_BP, 'BP_assessment2_2': Kind.DIASTOLIC_BP,
+}
+DM_MEASURED_FIELDS = {
+    'random_glucose': Kind.RANDOM_GLUCOSE,
+    'fasting_glucose': Kind.FASTING_GLUCOSE,
+    'hba1c': Kind.HBA1C,
+}
+
+#* Campo texto digitado -> coluna numérica do DM
+DM_TEXT_FIELDS = {
+    'capillary_blood_glucose_random': 'random_glucose',
+    'fasting_capillary_blood_glucose': 'fasting_glucose',
+    'glycated_hemoglobin': 'hba1c',
+}
+MEASURE_LIMITS = {'random_glucose': 10000, 'fasting_glucose': 10000, 'hba1c': 100} #* Cabem nas colunas decimais
+MEASURE_PATTERN = re.compile(r'^\s*(\d{1,4}(?:[.,]\d{1,2})?)\s*(?:mg\s*/?\s*dl|%)?\s*$', re.IGNORECASE)
+MEASUREMENT_LIMIT = 10000 #* Teto do MEASURE_PATTERN (4 dígitos); cabe em Measurement.value
+KIND_LIMITS = {DM_MEASURED_FIELDS[field]: limit for field, limit in MEASURE_LIMITS.items()}
+
+Reading = namedtuple('Reading', 'patient_id kind value measured_at')
+
+ROLLUP_FIELDS = (
+    'latest_value', 'latest_at', 'window_count', 'window_mean', 'window_min', 'window_max',
+    'window_slope', 'window_start_at', 'updated_at',
+)
+
+
+def to_decimal(value, limit=MEASUREMENT_LIMIT):
+    """Leitura numérica (número ou texto como '7,5'), pelas regras de parse_measure; fora delas ('1e9', 'alta') vira None."""
+    if value is None:
+        return None
+    return parse_measure(str(value), limit)
+
+
+def measure_limit(kind):
+    return KIND_LIMITS.get(kind, MEASUREMENT_LIMIT)
+
+
+def parse_measure(text, limit):
+    """Valor de glicemia/HbA1c digitado como texto ('126', '7,5%', '110 mg/dL'); None se não for um número válido."""
+    match = MEASURE_PATTERN.match(text or '')
+    value = Decimal(match.group(1).replace(',', '.')) if match else None
+    return value if value is not None and value < limit else None
+
+
+def readings_from(instance, fields, measured_at=None):
+    """Leituras (uma por tipo) dos campos de aferição de um HAS/DM."""
+    measured_at = measured_at or now()
+    readings = []
+    for kind in dict.fromkeys(instance.MEASURED_FIELDS[field] for field in fields):
+        values = [
+            to_decimal(getattr(instance, field), measure_limit(kind))
+            for field, field_kind in instance.MEASURED_FIELDS.items() if field_kind == kind
+        ]
+        values = [value for value in values if value is not None]
+        if values:
+            mean = (sum(values) / len(values)).quantize(Decimal('0.01'))
+            readings.append(Reading(instance.patient_id, kind, mean, measured_at))
+    return readings
+
+
+def record(readings, user_id=None):
+    """Anexa as leituras ao histórico e atualiza os resumos das chaves (paciente, tipo) tocadas."""
+    from apps.conditions.models import Measurement
+    if not readings:
+        return
+    with transaction.atomic():
+        Measurement.objects.bulk_create([
+            Measurement(patient_id=reading.patient_id, kind=reading.kind, value=reading.value,
+                        measured_at=reading.measured_at, created_by_id=user_id)
+            for reading in readings
+        ], ignore_conflicts=True) #* A mesma leitura registrada duas vezes não duplica
+        refresh_rollups({(reading.patient_id, reading.kind) for reading in readings})
+
+
+def slope(points):
+    """Inclinação (mínimos quadrados) em unidades por dia; None com menos de duas datas distintas."""
+    if len(points) < 2:
+        return None
+    origin = points[0][0]
+    xs = [(measured_at - origin).total_seconds() / 86400 for measured_at, _ in points]
+    ys = [float(value) for _, value in points]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    spread = sum((x - mean_x) ** 2 for x in xs)
+    if not spread:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / spread
+
+
+def build_rollup(patient_id, kind, points, latest):
+    """points: [(measured_at, value)] da janela em ordem; latest: a última leitura de todas (measured_at, value)."""
+    from apps.conditions.models import MeasurementRollup
+    values = [value for _, value in points]
+    return MeasurementRollup(
+        patient_id=patient_id, kind=kind, latest_at=latest[0], latest_value=latest[1],
+        window_count=len(points),
+        window_mean=float(sum(values) / len(values)) if values else None,
+        window_min=min(values, default=None), window_max=max(values, default=None),
+        window_slope=slope(points), window_start_at=points[0][0] if points else None,
+    )
+
+
+def refresh_rollups(keys, moment=None):
+    """Recalcula os resumos das chaves (patient_id, kind) com duas leituras indexadas por lote."""
+    from apps.conditions.models import Measurement, MeasurementRollup
+    keys = list(keys)
+    moment = moment or now()
+    for start in range(0, len(keys), ROLLUP_CHUNK_SIZE):
+        chunk = set(keys[start:start + ROLLUP_CHUNK_SIZE])
+        scope = Measurement.objects.filter(
+            patient__in={patient_id for patient_id, _ in chunk}, kind__in={kind for _, kind in chunk},
+        )
+        points = defaultdict(list)
+        for patient_id, kind, value, measured_at in (
+            scope.filter(measured_at__gte=moment - ROLLUP_WINDOW).order_by('measured_at')
+            .values_list('patient_id', 'kind', 'value', 'measured_at')
+        ):
+            if (patient_id, kind) in chunk:
+                points[patient_id, kind].append((measured_at, value))
+
+        latest = {key: series[-1] for key, series in points.items()}
+        for key in chunk - set(latest): #* Sem leitura na janela: a última é mais antiga
+            patient_id, kind = key
+            row = scope.filter(patient_id=patient_id, kind=kind).order_by('-measured_at').values_list(
+                'measured_at', 'value'
+            ).first()
+            if row is not None:
+                latest[key] = row
+
+        MeasurementRollup.objects.bulk_create(
+            [build_rollup(patient_id, kind, points[patient_id, kind], last) for (patient_id, kind), last in latest.items()],
+            update_conflicts=True, unique_fields=['patient', 'kind'], update_fields=ROLLUP_FIELDS,
+        )
+    if keys:
+        bump_table_versions(Measurement, MeasurementRollup) #* Relatórios em cache leem os resumos
+
+
+def refresh_stale_rollups(moment=None):
+    """Recalcula os resumos que têm leituras saindo da janela; devolve quantos foram recalculados."""
+    from apps.conditions.models import MeasurementRollup
+    moment = moment or now()
+    keys = list(MeasurementRollup.objects.filter(window_start_at__lt=moment - ROLLUP_WINDOW).values_list('patient_id', 'kind'))
+    refresh_rollups(keys, moment)
+    return len(keys)
+
+
+def rebuild_rollups(chunk_size=ROLLUP_CHUNK_SIZE):
+    """Recalcula todos os resumos a partir do histórico; gera o número de chaves por lote."""
+    from apps.conditions.models import Measurement
+    keys = Measurement.objects.order_by('patient_id', 'kind').values_list('patient_id', 'kind').distinct()
+    batch = []
+    for key in keys.iterator(chunk_size=chunk_size):
+        batch.append(key)
+        if len(batch) == chunk_size:
+            refresh_rollups(batch)
+            yield len(batch)
+            batch = []
+    if batch:
+        refresh_rollups(batch)
+        yield len(batch)
+
+
+def backfill(model, chunk_size=ROLLUP_CHUNK_SIZE):
+    """Leva os valores atuais de HAS/DM para o histórico, datados pelo updated_at do registro."""
+    from apps.conditions.models import Measurement
+    fields = list(model.MEASURED_FIELDS)
+    queryset = model.objects.filter(patient__isnull=False).order_by('pk')
+    last_pk = 0
+    while True:
+        rows = list(queryset.filter(pk__gt=last_pk).only('pk', 'patient_id', 'updated_at', *fields)[:chunk_size])
+        if not rows:
+            return
+        last_pk = rows[-1].pk
+        readings = [reading for row in rows for reading in readings_from(row, fields, row.updated_at)]
+        Measurement.objects.bulk_create([
+            Measurement(patient_id=reading.patient_id, kind=reading.kind, value=reading.value, measured_at=reading.measured_at)
+            for reading in readings
+        ], ignore_conflicts=True)
+        bump_table_versions(Measurement)
+        yield len(readings)
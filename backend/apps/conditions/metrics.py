@@ -0,0 +1,202 @@
+import math
+from datetime import date
+from decimal import Decimal
+from django.db.models import Exists, OuterRef
+from apps.accounts.constants.patient_choices import SmokingChoices
+from apps.conditions.constants.dcnt_choices import TreatmentStatusChoices
+from apps.conditions.constants.has_choices import BloodPressureClassificationChoices, FraminghamScoreChoices
+
+#* Métricas derivadas de HAS/DM. Cada função recebe colunas (listas alinhadas, uma posição por registro)
+#* e devolve a coluna calculada, com None onde faltar dado. O save usa colunas de um elemento só e o
+#* comando recompute_metrics usa as colunas de values_list de milhares de linhas, com as mesmas contas.
+
+#* Limites da Diretriz Brasileira de Hipertensão (2020): (classificação, sistólica mínima, diastólica mínima)
+BP_STAGES = [
+    (BloodPressureClassificationChoices.HIPERTENSO_E3, 180, 110),
+    (BloodPressureClassificationChoices.HIPERTENSO_E2, 160, 100),
+    (BloodPressureClassificationChoices.HIPERTENSO_E1, 140, 90),
+    (BloodPressureClassificationChoices.PRE_HIPERTENSO, 130, 85),
+]
+
+#* Framingham geral (D'Agostino, 2008), risco cardiovascular em 10 anos:
+#* (ln idade, ln colesterol total, ln HDL, ln PAS sem tratamento, ln PAS tratada, fumante, diabetes, média, sobrevida)
+FRAMINGHAM = {
+    'M': (3.06117, 1.12370, -0.93263, 1.93303, 1.99881, 0.65451, 0.57367, 23.9802, 0.88936),
+    'F': (2.32888, 1.20904, -0.70833, 2.76157, 2.82263, 0.52873, 0.69154, 26.1931, 0.95012),
+}
+
+IMC_INPUTS = ('weight', 'height')
+BP_INPUTS = ('BP_assessment1_1', 'BP_assessment1_2', 'BP_assessment2_1', 'BP_assessment2_2')
+FRAMINGHAM_INPUTS = ('total_cholesterol', 'HDL_cholesterol', 'uses_medication', 'patient')
+IMC_MAX = 1000 #* A coluna IMC é Decimal(5, 2); peso/altura implausíveis dariam um valor que não cabe nela
+
+
+def mean_column(*columns):
+    """Média das leituras presentes em cada posição (ex.: 1ª e 2ª aferição)."""
+    means = []
+    for values in zip(*columns):
+        present = [value for value in values if value is not None]
+        means.append(sum(present) / len(present) if present else None)
+    return means
+
+
+def imc_column(weights, heights):
+    result = []
+    for weight, height in zip(weights, heights):
+        if not weight or not height or weight < 0 or height < 0:
+            result.append(None)
+            continue
+        meters = float(height) / 100 if height > 3 else float(height) #* Altura digitada em centímetros
+        imc = round(float(weight) / meters ** 2, 2)
+        result.append(Decimal(str(imc)) if imc < IMC_MAX else None)
+    return result
+
+
+def bp_classification_column(systolics, diastolics):
+    result = []
+    for systolic, diastolic in zip(systolics, diastolics):
+        if systolic is None and diastolic is None:
+            result.append(None)
+            continue
+        #* Vale a maior categoria entre sistólica e diastólica
+        stage = next((
+            label for label, min_systolic, min_diastolic in BP_STAGES
+            if (systolic or 0) >= min_systolic or (diastolic or 0) >= min_diastolic
+        ), BloodPressureClassificationChoices.NORMAL)
+        result.append(stage.value)
+    return result
+
+
+def framingham_column(sexes, ages, total_cholesterols, hdls, systolics, treated, smokers, diabetics):
+    result = []
+    for sex, age, total, hdl, systolic, on_treatment, smoker, diabetic in zip(
+        sexes, ages, total_cholesterols, hdls, systolics, treated, smokers, diabetics
+    ):
+        #* Só valores positivos entram no log (ex.: nascimento no futuro por erro de digitação daria idade negativa)
+        if sex not in FRAMINGHAM or not all(value is not None and value > 0 for value in (age, total, hdl, systolic)):
+            result.append(None)
+            continue
+        b_age, b_total, b_hdl, b_untreated, b_treated, b_smoker, b_diabetes, mean, survival = FRAMINGHAM[sex]
+        score = (
+            b_age * math.log(age) + b_total * math.log(total) + b_hdl * math.log(hdl)
+            + (b_treated if on_treatment else b_untreated) * math.log(systolic)
+            + b_smoker * bool(smoker) + b_diabetes * bool(diabetic)
+        )
+        risk = 1 - survival ** math.exp(score - mean)
+        if risk < 0.10:
+            result.append(FraminghamScoreChoices.BAIXO.value)
+        elif risk <= 0.20:
+            result.append(FraminghamScoreChoices.MODERADO.value)
+        else:
+            result.append(FraminghamScoreChoices.ALTO.value)
+    return result
+
+
+def sex_of(gender):
+    """'Masculino'/'M'/'Homem' -> 'M', 'Feminino'/'F'/'Mulher' -> 'F'; gênero é texto livre no cadastro."""
+    initial = (gender or '').strip()[:1].upper()
+    return {'M': 'M', 'H': 'M', 'F': 'F'}.get(initial)
+
+
+def age_of(age, birth_date, today=None):
+    if birth_date:
+        today = today or date.today()
+        return today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
+    return age
+
+
+def keep_manual(derived, typed):
+    """Onde não há dado para calcular, mantém o valor digitado à mão."""
+    return [value if value is not None else manual for value, manual in zip(derived, typed)]
+
+
+#Colunas por model=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+HAS_COLUMNS = (
+    'pk', 'weight', 'height', *BP_INPUTS, 'total_cholesterol', 'HDL_cholesterol', 'uses_medication',
+    'patient__gender', 'patient__age', 'patient__birth_date', 'patient__smoking', 'has_dm',
+    'IMC', 'BP_classifications', 'framingham_score',
+)
+HAS_OUTPUTS = ('IMC', 'BP_classifications', 'framingham_score')
+DM_COLUMNS = ('pk', 'weight', 'height', 'IMC')
+DM_OUTPUTS = ('IMC',)
+
+
+def has_queryset(queryset):
+    from apps.conditions.models import DM
+    return queryset.annotate(
+        has_dm=Exists(DM.objects.filter(patient=OuterRef('patient'), patient__isnull=False))
+    ).values_list(*HAS_COLUMNS)
+
+
+def derive_has(rows):
+    """rows no formato de HAS_COLUMNS -> colunas (IMC, BP_classifications, framingham_score)."""
+    (_, weights, heights, bp1_1, bp1_2, bp2_1, bp2_2, totals, hdls, medication,
+     genders, ages, births, smoking, diabetics, imcs, classifications, scores) = zip(*rows)
+    today = date.today()
+    systolics = mean_column(bp1_1, bp2_1)
+    return (
+        keep_manual(imc_column(weights, heights), imcs),
+        keep_manual(bp_classification_column(systolics, mean_column(bp1_2, bp2_2)), classifications),
+        keep_manual(framingham_column(
+            [sex_of(gender) for gender in genders],
+            [age_of(age, birth, today) for age, birth in zip(ages, births)],
+            totals, hdls, systolics,
+            [value == TreatmentStatusChoices.SIM for value in medication],
+            [value == SmokingChoices.FUMANTE_ATUAL for value in smoking],
+            diabetics,
+        ), scores),
+    )
+
+
+def derive_dm(rows):
+    _, weights, heights, imcs = zip(*rows)
+    return (keep_manual(imc_column(weights, heights), imcs),)
+
+
+def instance_row(instance, columns):
+    """A linha de values_list correspondente a uma instância ainda não salva (para o save)."""
+    row = []
+    for column in columns:
+        if column.startswith('patient__'):
+            patient = instance.patient
+            row.append(getattr(patient, column.removeprefix('patient__')) if patient else None)
+        elif column == 'has_dm':
+            from apps.conditions.models import DM
+            row.append(bool(instance.patient_id) and DM.objects.filter(patient_id=instance.patient_id).exists())
+        else:
+            row.append(getattr(instance, column))
+    return row
+
+
+def apply_metrics(instance, columns, derive, outputs):
+    for field, column in zip(outputs, derive([instance_row(instance, columns)])):
+        setattr(instance, field, column[0])
+
+
+def recompute_table(name, chunk_size=2000):
+    """
+    Recalcula as métricas de toda a tabela ('has' ou 'dm'), em lotes por pk, gravando com bulk_update
+    só as linhas cujo valor mudou. Gera (linhas lidas, linhas alteradas) por lote.
+    """
+    from apps.conditions.models import DM, HAS
+    model, columns, derive, outputs = {
+        'has': (HAS, HAS_COLUMNS, derive_has, HAS_OUTPUTS),
+        'dm': (DM, DM_COLUMNS, derive_dm, DM_OUTPUTS),
+    }[name]
+
+    last_pk = 0
+    while True:
+        queryset = model.all_objects.filter(pk__gt=last_pk).order_by('pk')
+        rows = list((has_queryset(queryset) if model is HAS else queryset.values_list(*columns))[:chunk_size])
+        if not rows:
+            return
+        last_pk = rows[-1][0]
+        stored = [row[-len(outputs):] for row in rows] #* As saídas são as últimas colunas
+        changed = [
+            model(pk=row[0], **dict(zip(outputs, values)))
+            for row, current, values in zip(rows, stored, zip(*derive(rows)))
+            if tuple(values) != tuple(current)
+        ]
+        if changed:
+            model.all_objects.bulk_update(changed, outputs)
+        yield len(rows), len(changed)
@@ -0,0 +1,163 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:14
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0009_patient_search"),
+        ("conditions", "0003_active_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Measurement",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("SYSTOLIC_BP", "Pressão Arterial Sistólica (mmHg)"),
+                            ("DIASTOLIC_BP", "Pressão Arterial Diastólica (mmHg)"),
+                            ("RANDOM_GLUCOSE", "Glicemia Capilar Aleatória (mg/dL)"),
+                            ("FASTING_GLUCOSE", "Glicemia Capilar em Jejum (mg/dL)"),
+                            ("HBA1C", "Hemoglobina Glicada (%)"),
+                        ],
+                        max_length=20,
+                        verbose_name="Tipo",
+                    ),
+                ),
+                (
+                    "value",
+                    models.DecimalField(
+                        decimal_places=2, max_digits=7, verbose_name="Valor"
+                    ),
+                ),
+                (
+                    "measured_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        verbose_name="Data da aferição",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="measurement_created",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "patient",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="accounts.patientuser",
+                        verbose_name="Paciente",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Aferição",
+                "verbose_name_plural": "Aferições",
+                "indexes": [
+                    models.Index(
+                        fields=["kind", "measured_at"], name="measurement_kind_dt_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("patient", "kind", "measured_at"),
+                        name="unique_patient_measurement",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="MeasurementRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("SYSTOLIC_BP", "Pressão Arterial Sistólica (mmHg)"),
+                            ("DIASTOLIC_BP", "Pressão Arterial Diastólica (mmHg)"),
+                            ("RANDOM_GLUCOSE", "Glicemia Capilar Aleatória (mg/dL)"),
+                            ("FASTING_GLUCOSE", "Glicemia Capilar em Jejum (mg/dL)"),
+                            ("HBA1C", "Hemoglobina Glicada (%)"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("latest_value", models.DecimalField(decimal_places=2, max_digits=7)),
+                ("latest_at", models.DateTimeField()),
+                ("window_count", models.PositiveIntegerField(default=0)),
+                ("window_mean", models.FloatField(blank=True, null=True)),
+                (
+                    "window_min",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=7, null=True
+                    ),
+                ),
+                (
+                    "window_max",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=7, null=True
+                    ),
+                ),
+                ("window_slope", models.FloatField(blank=True, null=True)),
+                ("window_start_at", models.DateTimeField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "patient",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="measurement_rollups",
+                        to="accounts.patientuser",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Resumo de aferições",
+                "verbose_name_plural": "Resumos de aferições",
+                "indexes": [
+                    models.Index(
+                        fields=["kind", "latest_value"], name="rollup_kind_value_idx"
+                    ),
+                    models.Index(
+                        fields=["window_start_at"], name="rollup_window_start_idx"
+                    ),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("patient", "kind"), name="unique_patient_rollup"
+                    )
+                ],
+            },
+        ),
+    ]
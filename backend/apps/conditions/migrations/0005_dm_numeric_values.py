@@ -0,0 +1,109 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:17
+
+import re
+from decimal import Decimal
+
+from django.db import migrations, models
+
+#* Cópia congelada de MEASURE_PATTERN/DM_TEXT_FIELDS/MEASURE_LIMITS (apps/conditions/measurements.py): a migração não deve mudar se o app mudar
+MEASURE_PATTERN = re.compile(r"^\s*(\d{1,4}(?:[.,]\d{1,2})?)\s*(?:mg\s*/?\s*dl|%)?\s*$", re.IGNORECASE)
+TEXT_FIELDS = {
+    "capillary_blood_glucose_random": "random_glucose",
+    "fasting_capillary_blood_glucose": "fasting_glucose",
+    "glycated_hemoglobin": "hba1c",
+}
+LIMITS = {"random_glucose": 10000, "fasting_glucose": 10000, "hba1c": 100}
+CHUNK_SIZE = 2000
+SAMPLE_SIZE = 20
+
+
+def parse_measure(text, limit):
+    match = MEASURE_PATTERN.match(text or "")
+    value = Decimal(match.group(1).replace(",", ".")) if match else None
+    return value if value is not None and value < limit else None
+
+
+def fill_numeric_values(apps, schema_editor):
+    """Converte os textos existentes em lotes por pk e informa o que não deu para converter."""
+    DM = apps.get_model("conditions", "DM")
+    queryset = DM._base_manager.order_by("pk").only("pk", *TEXT_FIELDS)
+    last_pk, converted, unparsed = 0, 0, []
+    while True:
+        rows = list(queryset.filter(pk__gt=last_pk)[:CHUNK_SIZE])
+        if not rows:
+            break
+        last_pk = rows[-1].pk
+        for row in rows:
+            for text_field, value_field in TEXT_FIELDS.items():
+                text = getattr(row, text_field)
+                value = parse_measure(text, LIMITS[value_field])
+                setattr(row, value_field, value)
+                if value is not None:
+                    converted += 1
+                elif text and text.strip():
+                    unparsed.append((row.pk, text_field, text))
+        DM._base_manager.bulk_update(rows, list(TEXT_FIELDS.values()))
+
+    if converted or unparsed:
+        print(f"\n  {converted} valor(es) convertido(s); {len(unparsed)} não são número e ficaram só no texto.")
+        for pk, field, text in unparsed[:SAMPLE_SIZE]:
+            print(f"    DM {pk} {field}: {text!r}")
+
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0009_patient_search"),
+        ("conditions", "0004_measurements"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dm",
+            name="fasting_glucose",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=2,
+                max_digits=6,
+                null=True,
+                verbose_name="Glicemia Capilar em Jejum (mg/dL) - valor",
+            ),
+        ),
+        migrations.AddField(
+            model_name="dm",
+            name="hba1c",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=2,
+                max_digits=4,
+                null=True,
+                verbose_name="Hemoglobina Glicada (%) - valor",
+            ),
+        ),
+        migrations.AddField(
+            model_name="dm",
+            name="random_glucose",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=2,
+                max_digits=6,
+                null=True,
+                verbose_name="Glicemia Capilar Aleatória (mg/dL) - valor",
+            ),
+        ),
+        migrations.RunPython(fill_numeric_values, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="dm",
+            index=models.Index(fields=["hba1c"], name="dm_hba1c_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="dm",
+            index=models.Index(fields=["random_glucose"], name="dm_random_glucose_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="dm",
+            index=models.Index(
+                fields=["fasting_glucose"], name="dm_fasting_glucose_idx"
+            ),
+        ),
+    ]
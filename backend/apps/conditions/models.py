@@ -1,12 +1,31 @@
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils.timezone import now
 from apps.commons.models import BaseModel
 from apps.accounts.models import PatientUser
-from apps.conditions.constants import dm_choices, has_choices, dcnt_choices
+from apps.conditions.constants import dm_choices, has_choices, dcnt_choices, measurement_choices
 from apps.conditions.data.dm import ClinicalEvaluationDM, ClassificationConductDM, RiskFactorsDM
 from apps.conditions.data.has import ClinicalEvaluationHAS, ClassificationConductHAS
+from apps.conditions import measurements, metrics
+
+
+def derive_on_save(instance, kwargs, inputs, columns, derive, outputs):
+    """Recalcula as métricas derivadas se o save mexe nos campos de entrada (saves parciais, ex.: soft delete, não)."""
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and not set(update_fields) & set(inputs):
+        return
+    metrics.apply_metrics(instance, columns, derive, outputs)
+    if update_fields is not None:
+        kwargs['update_fields'] = {*update_fields, *outputs}
 
 
 class DCNT(BaseModel):
+    class Meta(BaseModel.Meta): #* created_at/is_deleted de HAS, DM e OtherDCNT ficam nesta tabela
+        indexes = [
+            models.Index(fields=['created_at', 'id'], condition=models.Q(is_deleted=False), name='dcnt_active_idx'),
+        ]
+
     is_diagnosed = models.BooleanField(
         "Diagnóstico confirmado", null=True, blank=True
     )
@@ -21,6 +40,30 @@ class DCNT(BaseModel):
         "Histórico familiar", null=True, blank=True
     )
 
+    #* Campos de aferição: {campo: tipo de Measurement}. Ao mudarem, a leitura vai para o histórico
+    MEASURED_FIELDS = {}
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_measures = instance.measured_values()
+        return instance
+
+    def measured_values(self):
+        return {field: self.__dict__.get(field) for field in self.MEASURED_FIELDS}
+
+    def record_measurements(self, update_fields=None):
+        """Anexa ao histórico as aferições que mudaram desde o carregamento (ou todas, na criação)."""
+        loaded = getattr(self, '_loaded_measures', {})
+        current = self.measured_values()
+        changed = {
+            field for field, value in current.items()
+            if value is not None and value != loaded.get(field) and (update_fields is None or field in update_fields)
+        }
+        if changed and self.patient_id:
+            measurements.record(measurements.readings_from(self, changed), user_id=self.updated_by_id or self.created_by_id)
+        self._loaded_measures = current
+
 
 class HAS(DCNT, ClinicalEvaluationHAS, ClassificationConductHAS):
     class Meta:
@@ -39,12 +82,25 @@ class HAS(DCNT, ClinicalEvaluationHAS, ClassificationConductHAS):
         max_length=30, null=True, blank=True,
         choices=has_choices.HypertensionComplicationsChoices.choices
     )
-    
+
+    METRIC_INPUTS = (*metrics.IMC_INPUTS, *metrics.BP_INPUTS, *metrics.FRAMINGHAM_INPUTS)
+    MEASURED_FIELDS = measurements.HAS_MEASURED_FIELDS
+
+    def save(self, *args, **kwargs):
+        derive_on_save(self, kwargs, self.METRIC_INPUTS, metrics.HAS_COLUMNS, metrics.derive_has, metrics.HAS_OUTPUTS)
+        super().save(*args, **kwargs)
+        self.record_measurements(kwargs.get('update_fields'))
+
 
 class DM(DCNT, ClinicalEvaluationDM, RiskFactorsDM, ClassificationConductDM):
     class Meta:
         verbose_name = "DM"
         verbose_name_plural = "DMs"
+        indexes = [ #* Filtros por faixa (ex.: HbA1c > 9) e limiares das regras de alerta
+            models.Index(fields=['hba1c'], name='dm_hba1c_idx'),
+            models.Index(fields=['random_glucose'], name='dm_random_glucose_idx'),
+            models.Index(fields=['fasting_glucose'], name='dm_fasting_glucose_idx'),
+        ]
 
     patient = models.OneToOneField(
         PatientUser,
@@ -75,6 +131,44 @@ class DM(DCNT, ClinicalEvaluationDM, RiskFactorsDM, ClassificationConductDM):
         "Membro afetado pelo pé diabético", max_length=100, null=True, blank=True
     )
 
+    MEASURED_FIELDS = measurements.DM_MEASURED_FIELDS
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_texts = {field: instance.__dict__.get(field) for field in measurements.DM_TEXT_FIELDS}
+        return instance
+
+    def sync_numeric_values(self, kwargs):
+        """Mantém texto digitado e coluna numérica coerentes, conforme qual dos dois mudou desde o carregamento."""
+        update_fields = kwargs.get('update_fields')
+        loaded_values = getattr(self, '_loaded_measures', {})
+        loaded_texts = getattr(self, '_loaded_texts', {})
+        touched, errors = set(), {}
+        for text_field, value_field in measurements.DM_TEXT_FIELDS.items():
+            text, value = getattr(self, text_field), getattr(self, value_field)
+            text_changed = text != loaded_texts.get(text_field)
+            value_changed = value != loaded_values.get(value_field)
+            parsed = measurements.parse_measure(text, measurements.MEASURE_LIMITS[value_field])
+            if value_changed and (not text_changed or not text): #* Só o número mudou (ex.: API): o texto acompanha
+                setattr(self, text_field, None if value is None else str(value))
+            elif text_changed and value_changed and value is not None and parsed != value:
+                errors[value_field] = f'{value} não confere com {text_field} ({text!r}); envie só um dos dois.'
+            elif text_changed: #* Texto digitado (ou apagado): o número sai dele
+                setattr(self, value_field, parsed)
+            touched |= {text_field, value_field}
+        if errors:
+            raise ValidationError(errors)
+        if update_fields is not None and touched & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, *touched}
+
+    def save(self, *args, **kwargs):
+        self.sync_numeric_values(kwargs)
+        derive_on_save(self, kwargs, metrics.IMC_INPUTS, metrics.DM_COLUMNS, metrics.derive_dm, metrics.DM_OUTPUTS)
+        super().save(*args, **kwargs)
+        self.record_measurements(kwargs.get('update_fields'))
+        self._loaded_texts = {field: getattr(self, field) for field in measurements.DM_TEXT_FIELDS}
+
 
 class OtherDCNT(DCNT):
     class Meta:
@@ -99,4 +193,56 @@ class OtherDCNT(DCNT):
     )
 
 #* Sugestão de melhoria:
-#* Fazer um metodo que caso o paciente seja deletado ele subistitua o paciente pelo seu nome.
\ No newline at end of file
+#* Fazer um metodo que caso o paciente seja deletado ele subistitua o paciente pelo seu nome.
+
+
+class Measurement(models.Model):
+    """Histórico de aferições: só recebe inserções, cada leitura nova vira uma linha."""
+    class Meta:
+        verbose_name = "Aferição"
+        verbose_name_plural = "Aferições"
+        constraints = [ #* O índice da constraint também serve a série temporal de um paciente (patient, kind, measured_at)
+            models.UniqueConstraint(fields=['patient', 'kind', 'measured_at'], name='unique_patient_measurement'),
+        ]
+        indexes = [
+            models.Index(fields=['kind', 'measured_at'], name='measurement_kind_dt_idx'),
+        ]
+
+    patient = models.ForeignKey(PatientUser, on_delete=models.CASCADE, verbose_name="Paciente")
+    kind = models.CharField("Tipo", max_length=20, choices=measurement_choices.MeasurementKindChoices.choices)
+    value = models.DecimalField("Valor", max_digits=7, decimal_places=2)
+    measured_at = models.DateTimeField("Data da aferição", default=now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    created_by = models.ForeignKey(User, related_name='measurement_created', on_delete=models.SET_NULL, null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.patient} - {self.get_kind_display()}: {self.value}"
+
+
+class MeasurementRollup(models.Model):
+    """Resumo por paciente e tipo (última leitura e janela recente), mantido a cada inserção em Measurement."""
+    class Meta:
+        verbose_name = "Resumo de aferições"
+        verbose_name_plural = "Resumos de aferições"
+        constraints = [
+            models.UniqueConstraint(fields=['patient', 'kind'], name='unique_patient_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['kind', 'latest_value'], name='rollup_kind_value_idx'), #* Taxa de controle
+            models.Index(fields=['window_start_at'], name='rollup_window_start_idx'), #* Janelas a renovar
+        ]
+
+    patient = models.ForeignKey(PatientUser, on_delete=models.CASCADE, related_name='measurement_rollups')
+    kind = models.CharField(max_length=20, choices=measurement_choices.MeasurementKindChoices.choices)
+    latest_value = models.DecimalField(max_digits=7, decimal_places=2)
+    latest_at = models.DateTimeField()
+    window_count = models.PositiveIntegerField(default=0)
+    window_mean = models.FloatField(null=True, blank=True)
+    window_min = models.DecimalField(max_digits=7, decimal_places=2, null=True, blank=True)
+    window_max = models.DecimalField(max_digits=7, decimal_places=2, null=True, blank=True)
+    window_slope = models.FloatField(null=True, blank=True) #* Tendência (unidades por dia) na janela
+    window_start_at = models.DateTimeField(null=True, blank=True) #* Leitura mais antiga ainda dentro da janela
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.patient} - {self.get_kind_display()}: {self.latest_value}"
@@ -0,0 +1,92 @@
+"""
+Testes para os valores numéricos de glicemia/HbA1c do DM
+"""
+import importlib
+from contextlib import redirect_stdout
+from decimal import Decimal
+from io import StringIO
+from django.apps import apps
+from django.contrib.auth.models import User
+from rest_framework.test import APITestCase
+from apps.accounts.models import PatientUser
+from apps.conditions.models import DM
+from apps.locations.models import MicroArea
+
+migration = importlib.import_module('apps.conditions.migrations.0005_dm_numeric_values')
+
+
+class DMNumericValuesTest(APITestCase):
+    """Testes para hba1c/random_glucose/fasting_glucose, os filtros por faixa e /stats/"""
+
+    URL = '/api/v1/conditions/diabetes-mellitus-cases/'
+
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_superuser(username='admin', password='123456'))
+        self.north, self.south = MicroArea.objects.create(name='Norte'), MicroArea.objects.create(name='Sul')
+
+    def create_dm(self, username, micro_area, **fields):
+        patient = PatientUser.objects.create(user=User.objects.create_user(username=username), micro_area=micro_area)
+        return DM.objects.create(patient=patient, **fields)
+
+    def test_text_is_parsed_on_save(self):
+        """Testa a conversão do texto digitado, com vírgula, unidade ou valor inválido"""
+        dm = self.create_dm('a', self.north, glycated_hemoglobin='7,5 %', capillary_blood_glucose_random='180 mg/dL',
+                            fasting_capillary_blood_glucose='não fez')
+        self.assertEqual((dm.hba1c, dm.random_glucose, dm.fasting_glucose), (Decimal('7.5'), Decimal('180'), None))
+
+        dm.hba1c = Decimal('8.1') #* Só o número, sem texto (ex.: API)
+        dm.glycated_hemoglobin = None
+        dm.capillary_blood_glucose_random = ''
+        dm.save()
+        dm.refresh_from_db()
+        self.assertEqual((dm.glycated_hemoglobin, dm.hba1c, dm.random_glucose), ('8.1', Decimal('8.1'), None))
+
+    def test_api_patch_keeps_text_and_number_in_sync(self):
+        """Testa que o PATCH só do número reescreve o texto e que texto e número divergentes dão 400"""
+        dm = self.create_dm('a', self.north, glycated_hemoglobin='7,5')
+        url = f'{self.URL}{dm.pk}/'
+
+        self.assertEqual(self.client.patch(url, {'hba1c': '9.20'}).status_code, 200)
+        dm.refresh_from_db()
+        self.assertEqual((dm.glycated_hemoglobin, dm.hba1c), ('9.20', Decimal('9.2')))
+
+        self.assertEqual(self.client.patch(url, {'glycated_hemoglobin': '6,8 %'}).status_code, 200)
+        dm.refresh_from_db()
+        self.assertEqual(dm.hba1c, Decimal('6.8'))
+
+        response = self.client.patch(url, {'glycated_hemoglobin': '7', 'hba1c': '8'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('hba1c', response.data)
+        self.assertEqual(self.client.patch(url, {'glycated_hemoglobin': '7', 'hba1c': '7.00'}).status_code, 200)
+
+    def test_range_filter_and_stats_by_micro_area(self):
+        """Testa ?hba1c__gt= e a agregação por micro-área numa única consulta"""
+        self.create_dm('a', self.north, glycated_hemoglobin='9.5')
+        self.create_dm('b', self.north, glycated_hemoglobin='10')
+        self.create_dm('c', self.south, glycated_hemoglobin='6.2')
+        self.create_dm('d', self.south, glycated_hemoglobin='11').delete()
+
+        response = self.client.get(self.URL, {'hba1c__gt': '9', 'is_deleted': 'false'})
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(self.client.get(self.URL, {'hba1c__gt': 'nove'}).status_code, 400)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(f'{self.URL}stats/', {'hba1c__gt': '9', 'group_by': 'micro_area'})
+        self.assertEqual(
+            [(row['group'], row['total'], row['hba1c_max']) for row in response.data['results']],
+            [(str(self.north.pk), 2, '10.00')],
+        )
+
+    def test_data_migration_reports_unparsed(self):
+        """Testa a conversão dos registros antigos e o relatório do que não é número"""
+        ok = self.create_dm('a', self.north, glycated_hemoglobin='7,1')
+        bad = self.create_dm('b', self.north, fasting_capillary_blood_glucose='alta')
+        DM.objects.update(hba1c=None) #* Como antes da migração
+
+        out = StringIO()
+        with redirect_stdout(out):
+            migration.fill_numeric_values(apps, None)
+
+        self.assertEqual(DM.objects.get(pk=ok.pk).hba1c, Decimal('7.1'))
+        self.assertIn('1 valor(es) convertido(s); 1 não são número', out.getvalue())
+        self.assertIn(f"DM {bad.pk} fasting_capillary_blood_glucose: 'alta'", out.getvalue())
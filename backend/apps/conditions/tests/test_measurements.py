@@ -0,0 +1,82 @@
+"""
+Testes para o histórico de aferições e seus resumos
+"""
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.utils.timezone import now, timedelta
+from rest_framework.test import APITestCase
+from apps.accounts.models import PatientUser
+from apps.conditions.measurements import Reading, record, refresh_stale_rollups
+from apps.conditions.models import DM, HAS, Measurement, MeasurementRollup
+
+
+class MeasurementTest(APITestCase):
+    """Testes para Measurement, MeasurementRollup e as rotas /conditions/measurements/"""
+
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_superuser(username='admin', password='123456'))
+        self.patient = PatientUser.objects.create(user=User.objects.create_user(username='paciente'))
+
+    def rollup(self, kind):
+        return MeasurementRollup.objects.get(patient=self.patient, kind=kind)
+
+    def test_condition_saves_append_history(self):
+        """Testa que mudar a PA ou a glicemia acrescenta leituras em vez de sobrescrever"""
+        has = HAS.objects.create(patient=self.patient, BP_assessment1_1=150, BP_assessment2_1=140, BP_assessment1_2=90)
+        has.BP_assessment1_1 = 130
+        has.save()
+        has.save() #* Sem mudança nas aferições: nada novo
+        DM.objects.create(patient=self.patient, glycated_hemoglobin='8,4')
+
+        systolic = Measurement.objects.filter(patient=self.patient, kind='SYSTOLIC_BP').order_by('measured_at')
+        self.assertEqual(list(systolic.values_list('value', flat=True)), [Decimal('145'), Decimal('135')])
+        self.assertEqual(Measurement.objects.filter(kind='DIASTOLIC_BP').count(), 1)
+        self.assertEqual(self.rollup('SYSTOLIC_BP').latest_value, Decimal('135'))
+        self.assertEqual(self.rollup('HBA1C').latest_value, Decimal('8.4'))
+
+    def test_rollup_window_and_trend(self):
+        """Testa média, mínimo, máximo e tendência na janela de 90 dias, e a renovação da janela"""
+        today = now()
+        record([
+            Reading(self.patient.pk, 'RANDOM_GLUCOSE', Decimal(value), today - timedelta(days=days))
+            for value, days in (('300', 120), ('220', 60), ('200', 30), ('180', 0))
+        ])
+
+        rollup = self.rollup('RANDOM_GLUCOSE')
+        self.assertEqual((rollup.latest_value, rollup.window_count), (Decimal('180'), 3))
+        self.assertEqual((rollup.window_min, rollup.window_max, rollup.window_mean), (Decimal('180'), Decimal('220'), 200.0))
+        self.assertAlmostEqual(rollup.window_slope, -40 / 60)
+
+        self.assertEqual(refresh_stale_rollups(today + timedelta(days=45)), 1) #* A leitura de 60 dias atrás sai da janela
+        self.assertEqual(self.rollup('RANDOM_GLUCOSE').window_count, 2)
+
+    def test_api_appends_and_lists_rollups(self):
+        """Testa a inclusão pela API e a leitura dos resumos por paciente"""
+        response = self.client.post('/api/v1/conditions/measurements/', {
+            'patient': self.patient.pk, 'kind': 'HBA1C', 'value': '6.8',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.client.put(f"/api/v1/conditions/measurements/{response.data['id']}/", {}).status_code, 404)
+
+        response = self.client.get('/api/v1/conditions/measurement-rollups/', {'patient': self.patient.pk})
+        self.assertEqual([(row['kind'], row['latest_value']) for row in response.data['results']], [('HBA1C', '6.80')])
+
+    def test_api_rejects_duplicates_and_out_of_range(self):
+        """Testa que a mesma data repetida e valores fora da faixa dão 400 em vez de sumirem"""
+        url = '/api/v1/conditions/measurements/'
+        data = {'patient': self.patient.pk, 'kind': 'HBA1C', 'value': '6.8', 'measured_at': '2025-03-01T10:00:00Z'}
+        self.assertEqual(self.client.post(url, data, format='json').status_code, 201)
+
+        response = self.client.post(url, {**data, 'value': '7.2'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('measured_at', response.data)
+        self.assertEqual(Measurement.objects.get(patient=self.patient).value, Decimal('6.8'))
+
+        for value in ('1e9', '150', '-1'):
+            response = self.client.post(url, {**data, 'value': value, 'measured_at': '2025-03-02T10:00:00Z'}, format='json')
+            self.assertEqual(response.status_code, 400, value)
+
+    def test_implausible_condition_values_are_not_recorded(self):
+        """Testa que aferições absurdas dos campos de HAS não estouram a coluna do histórico"""
+        HAS.objects.create(patient=self.patient, BP_assessment1_1=10 ** 9, BP_assessment1_2=80)
+        self.assertEqual(list(Measurement.objects.values_list('kind', flat=True)), ['DIASTOLIC_BP'])
@@ -0,0 +1,73 @@
+"""
+Testes para as métricas derivadas de HAS/DM
+"""
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from apps.accounts.models import PatientUser
+from apps.conditions.metrics import bp_classification_column, framingham_column, imc_column
+from apps.conditions.models import DM, HAS
+
+
+class DerivedMetricsTest(TestCase):
+    """Testes para o cálculo no save e o comando recompute_metrics"""
+
+    def setUp(self):
+        self.patient = PatientUser.objects.create(
+            user=User.objects.create_user(username='paciente'), gender='Masculino',
+            birth_date=date(1964, 1, 1), smoking='FUMANTE_ATUAL',
+        )
+
+    def test_bp_classification_uses_highest_category(self):
+        """Testa a classificação pela média das aferições e pela pior entre sistólica e diastólica"""
+        self.assertEqual(
+            bp_classification_column([118, 135, 150, 125, None], [78, 80, 85, 112, None]),
+            ['NORMAL', 'PRE_HIPERTENSO', 'HIPERTENSO_E1', 'HIPERTENSO_E3', None],
+        )
+
+    def test_framingham_categories(self):
+        """Testa as faixas do Framingham para perfis de risco baixo e alto"""
+        self.assertEqual(
+            framingham_column(['F', 'M', 'M'], [40, 65, 65], [180, 260, None], [60, 35, 35],
+                              [115, 165, 165], [False, True, True], [False, True, True], [False, True, True]),
+            ['BAIXO', 'ALTO', None],
+        )
+
+    def test_implausible_inputs_are_dropped(self):
+        """Testa que nascimento no futuro e peso/altura implausíveis não quebram o save nem estouram a coluna"""
+        self.assertEqual(imc_column([Decimal('300'), Decimal('-70')], [Decimal('0.4'), Decimal('170')]), [None, None])
+
+        self.patient.birth_date = date(date.today().year + 1, 1, 1)
+        self.patient.save()
+        has = HAS.objects.create(patient=self.patient, BP_assessment1_1=150, total_cholesterol=240, HDL_cholesterol=40)
+        self.assertIsNone(has.framingham_score)
+
+    def test_metrics_are_derived_on_save(self):
+        """Testa que IMC, classificação e Framingham são calculados ao salvar, sem perder o que foi digitado"""
+        has = HAS.objects.create(
+            patient=self.patient, weight=Decimal('80'), height=Decimal('175'), BP_assessment1_1=150, BP_assessment1_2=95,
+            BP_assessment2_1=160, BP_assessment2_2=100, total_cholesterol=240, HDL_cholesterol=40, framingham_score='BAIXO',
+        )
+        has.refresh_from_db()
+        self.assertEqual(has.IMC, Decimal('26.12'))
+        self.assertEqual(has.BP_classifications, 'HIPERTENSO_E1')
+        self.assertEqual(has.framingham_score, 'ALTO')
+
+        dm = DM.objects.create(patient=self.patient, weight=Decimal('60'), IMC=Decimal('22'))
+        self.assertEqual(dm.IMC, Decimal('22')) #* Sem altura não há como calcular: fica o valor digitado
+
+    def test_recompute_command_updates_only_changed_rows(self):
+        """Testa que o recálculo em lote corrige valores defasados e não regrava os que já estão certos"""
+        has = HAS.objects.create(patient=self.patient, BP_assessment1_1=120, BP_assessment1_2=80)
+        other = HAS.objects.create(BP_assessment1_1=145)
+        HAS.objects.filter(pk=has.pk).update(BP_classifications='HIPERTENSO_E2') #* Digitado errado, sem passar pelo save
+
+        out = StringIO()
+        call_command('recompute_metrics', 'has', '--chunk-size', '1', stdout=out)
+
+        self.assertIn('has: 2 registros lidos, 1 atualizados', out.getvalue())
+        self.assertEqual(HAS.objects.get(pk=has.pk).BP_classifications, 'NORMAL')
+        self.assertEqual(HAS.objects.get(pk=other.pk).BP_classifications, 'HIPERTENSO_E1')
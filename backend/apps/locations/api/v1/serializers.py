@@ -14,4 +14,9 @@ class MicroAreaSerializer(serializers.ModelSerializer):
 class InstitutionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Institution
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+class InstitutionSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Institution
+        fields = ['id', 'name']
@@ -12,6 +12,7 @@ class AddressViewset(BaseModelViewSet):
     permission_classes = [IsAuthenticated, LocationsDataPermissions]
 
     queryset = Address.all_objects
+    cache_responses = True #* Dados de referência: muito lidos, raramente alterados
     serializer_class = AddressSerializer
 
 @extend_schema(tags=['Locations - Micro-Area'])
@@ -19,6 +20,8 @@ class MicroAreaViewset(BaseModelViewSet):
     permission_classes = [IsAuthenticated, LocationsDataPermissions]
 
     queryset = MicroArea.all_objects
+    cache_responses = True #* Dados de referência: muito lidos, raramente alterados
+    search_fields = ('name',)
     serializer_class = MicroAreaSerializer
 
 @extend_schema(tags=['Locations - Institution'])
@@ -26,4 +29,6 @@ class InstitutionViewset(BaseModelViewSet):
     permission_classes = [IsAuthenticated, LocationsDataPermissions]
 
     queryset = Institution.all_objects
+    cache_responses = True #* Dados de referência: muito lidos, raramente alterados
+    search_fields = ('name',)
     serializer_class = InstitutionSerializer
@@ -5,17 +5,19 @@ from .serializers import MedicationSerializer
 from apps.medications.models import Medication
 from apps.commons.api.v1.viewsets import BaseModelViewSet
 from .permissions import MedicationsDataPermission
-from apps.accounts.utils.utils import get_user_profile
+from apps.accounts.utils.utils import get_request_profile
 
 @extend_schema(tags=['Medications'])
 class MedicationViewset(BaseModelViewSet):
     permission_classes = [IsAuthenticated, MedicationsDataPermission]
     queryset = Medication.all_objects
     serializer_class = MedicationSerializer
+    filter_fields = BaseModelViewSet.filter_fields + ('patient', 'active', 'end_date')
+    search_fields = ('name', 'patient__user__first_name', 'patient__user__last_name', 'patient__cpf__startswith')
 
     def get_queryset(self):
         queryset = super().get_queryset()
-        role, profile = get_user_profile(self.request.user)
+        role, profile = get_request_profile(self.request)
 
         if not self.request.user.is_authenticated:
             return queryset.none()
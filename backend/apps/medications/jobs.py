@@ -0,0 +1,12 @@
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from apps.commons.jobs import periodic_job
+from apps.medications.models import Medication
+
+
+@periodic_job('expire_medications', interval=60 * 60)
+def expire_medications(moment):
+    """O finished() em lote: medicações com end_date no passado ficam inativas e saem da listagem."""
+    return Medication.all_objects.filter(active=True, end_date__lt=moment.date()).update(
+        active=False, is_deleted=True, deleted_at=Coalesce(F('deleted_at'), Value(moment)),
+    )
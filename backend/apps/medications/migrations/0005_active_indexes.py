@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0007_patientuser_sus_and_indexes"),
+        ("medications", "0004_alter_medication_options"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="medication",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["created_at", "id"],
+                name="medication_active_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0009_patient_search"),
+        ("medications", "0005_active_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="medication",
+            index=models.Index(
+                condition=models.Q(("active", True)),
+                fields=["end_date"],
+                name="medication_expiry_idx",
+            ),
+        ),
+    ]
@@ -8,6 +8,10 @@ class Medication(BaseModel):
     class Meta:
         verbose_name = "Medicação"
         verbose_name_plural = "Medicações"
+        indexes = [
+            models.Index(fields=['created_at', 'id'], condition=models.Q(is_deleted=False), name='medication_active_idx'),
+            models.Index(fields=['end_date'], condition=models.Q(active=True), name='medication_expiry_idx'), #* Job expire_medications
+        ]
         
     patient = models.ForeignKey(PatientUser, on_delete=models.CASCADE)
     name = models.CharField(max_length=50)
@@ -23,8 +27,9 @@ class Medication(BaseModel):
 
     def finished(self):
         if self.is_active() == False:
+            self.active = False
             self.is_deleted = True
+            self.deleted_at = self.deleted_at or now()
             self.save()
 
-#* Sugestão de melhoria futura:
-#* Se possivel Descobrir como fazer algo que automatize esse finished para que o valor mude automaticamente.
+#* O finished() agora roda em lote e automaticamente no job expire_medications (apps/medications/jobs.py).
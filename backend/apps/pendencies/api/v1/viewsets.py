@@ -5,17 +5,19 @@ from .serializers import PendencySerializer
 from apps.pendencies.models import Pendency
 from apps.commons.api.v1.viewsets import BaseModelViewSet
 from .permissions import PendenciesDataPermission
-from apps.accounts.utils.utils import get_user_profile
+from apps.accounts.utils.utils import get_request_profile
 
 @extend_schema(tags=['Pendencies'])
 class PendencyViewset(BaseModelViewSet):
     permission_classes = [IsAuthenticated, PendenciesDataPermission]
     queryset = Pendency.all_objects
     serializer_class = PendencySerializer
+    filter_fields = BaseModelViewSet.filter_fields + ('patient', 'micro_area')
+    search_fields = ('patient__user__first_name', 'patient__user__last_name', 'patient__cpf__startswith')
 
     def get_queryset(self):
         queryset = super().get_queryset()
-        role, profile = get_user_profile(self.request.user)
+        role, profile = get_request_profile(self.request)
 
         if not self.request.user.is_authenticated:
             return queryset.none()
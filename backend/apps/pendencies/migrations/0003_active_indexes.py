@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0007_patientuser_sus_and_indexes"),
+        ("locations", "0002_alter_address_options_alter_institution_options_and_more"),
+        ("pendencies", "0002_alter_pendency_options_pendency_description"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="pendency",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["created_at", "id"],
+                name="pendency_active_idx",
+            ),
+        ),
+    ]
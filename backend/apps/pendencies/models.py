@@ -8,6 +8,9 @@ class Pendency(BaseModel):
     class Meta:
         verbose_name = "Pendência"
         verbose_name_plural = "Pendências"
+        indexes = [
+            models.Index(fields=['created_at', 'id'], condition=models.Q(is_deleted=False), name='pendency_active_idx'),
+        ]
 
     patient = models.ForeignKey(PatientUser, on_delete=models.CASCADE)
     micro_area = models.ForeignKey(MicroArea, on_delete=models.SET_NULL, null=True, blank=True)
@@ -0,0 +1,22 @@
+from rest_framework.permissions import SAFE_METHODS
+from apps.commons.api.v1.permissions import BaseRolePermission
+
+class ReportDataPermission(BaseRolePermission):
+    message = "Você não tem permissão para acessar esse recurso."
+
+    def has_permission(self, request, view):
+        user = request.user
+
+        if not user.is_authenticated:
+            self.message = "Usuário não autenticado!"
+            return False
+
+        if request.method not in SAFE_METHODS:
+            self.message = "Relatórios são somente leitura."
+            return False
+
+        if user.is_superuser or self.is_manager(request):
+            return True
+
+        self.message = "Apenas gestores tem acesso aos relatórios..."
+        return False
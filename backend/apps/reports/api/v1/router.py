@@ -0,0 +1,10 @@
+from rest_framework.routers import DefaultRouter
+from .viewsets import ExportViewset, KpiViewset, StratificationViewset, TrendViewset
+
+router_reports = DefaultRouter()
+router_reports.register(r'kpis', KpiViewset, basename='kpis')
+router_reports.register(r'exports', ExportViewset, basename='exports')
+router_reports.register(r'stratification', StratificationViewset, basename='stratification')
+router_reports.register(r'trends', TrendViewset, basename='trends')
+
+urlpatterns = router_reports.urls
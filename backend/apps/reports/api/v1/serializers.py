@@ -0,0 +1,101 @@
+from datetime import timedelta
+from django.utils.timezone import localdate
+from rest_framework import serializers
+from apps.accounts.models import ProfessionalUser
+from apps.locations.models import MicroArea
+from apps.reports.exports import OUTPUTS
+
+TREND_DEFAULT_DAYS = 90
+TREND_MAX_DAYS = 366 * 2
+
+
+#* Serializers apenas de saída: documentam no schema o formato dos relatórios
+class PatientKpiSerializer(serializers.Serializer):
+    total = serializers.IntegerField()
+    at_risk = serializers.IntegerField(help_text="Pacientes com alerta crítico em aberto ou agendamento ativo de risco crítico.")
+    with_has = serializers.IntegerField()
+    with_dm = serializers.IntegerField()
+
+
+class AppointmentKpiSerializer(serializers.Serializer):
+    total = serializers.IntegerField()
+    by_status = serializers.DictField(child=serializers.IntegerField())
+    by_risk_level = serializers.DictField(child=serializers.IntegerField())
+
+
+class AlertKpiSerializer(serializers.Serializer):
+    total = serializers.IntegerField()
+    critical = serializers.IntegerField()
+    by_risk_level = serializers.DictField(child=serializers.IntegerField())
+
+
+class ControlRateSerializer(serializers.Serializer):
+    total = serializers.IntegerField(help_text="Pacientes com aferição registrada.")
+    controlled = serializers.IntegerField(help_text="Pacientes com a última aferição dentro da meta.")
+    rate = serializers.FloatField(allow_null=True)
+
+
+class ControlKpiSerializer(serializers.Serializer):
+    hypertension = ControlRateSerializer(help_text="Meta: última PA < 140/90 mmHg.")
+    diabetes = ControlRateSerializer(help_text="Meta: última HbA1c < 7%.")
+
+
+class KpiSerializer(serializers.Serializer):
+    patients = PatientKpiSerializer()
+    appointments = AppointmentKpiSerializer()
+    alerts = AlertKpiSerializer()
+    control = ControlKpiSerializer()
+    generated_at = serializers.DateTimeField()
+
+
+class ExportQuerySerializer(serializers.Serializer):
+    """Parâmetros das rotas /reports/exports/"""
+    output = serializers.ChoiceField(choices=OUTPUTS, default='csv')
+    micro_area = serializers.PrimaryKeyRelatedField(queryset=MicroArea.objects.all(), required=False)
+    condition = serializers.ChoiceField(choices=['has', 'dm'], required=False)
+    professional = serializers.PrimaryKeyRelatedField(queryset=ProfessionalUser.objects.all(), required=False)
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+
+class StratificationQuerySerializer(serializers.Serializer):
+    """Parâmetros das rotas /reports/stratification/"""
+    group_by = serializers.ChoiceField(choices=['micro_area', 'institution'], default='micro_area')
+    micro_area = serializers.IntegerField(min_value=1, required=False) #* Sem consulta: id inexistente só não traz linhas
+
+
+class StratificationRowSerializer(serializers.Serializer):
+    """Uma linha por grupo; as demais colunas são as contagens (e taxas) de cada relatório."""
+    group = serializers.IntegerField(allow_null=True)
+    name = serializers.CharField(allow_null=True)
+
+
+class TrendQuerySerializer(serializers.Serializer):
+    """Parâmetros de /reports/trends/"""
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    period = serializers.ChoiceField(choices=['day', 'week', 'month'], default='day')
+    micro_area = serializers.IntegerField(min_value=1, required=False)
+
+    def validate(self, attrs):
+        attrs.setdefault("end", localdate())
+        attrs.setdefault("start", attrs["end"] - timedelta(days=TREND_DEFAULT_DAYS - 1))
+        if attrs["end"] < attrs["start"]:
+            raise serializers.ValidationError({"end": "A data final deve ser igual ou posterior à inicial."})
+        if (attrs["end"] - attrs["start"]).days >= TREND_MAX_DAYS:
+            raise serializers.ValidationError({"end": f"O intervalo máximo é de {TREND_MAX_DAYS} dias."})
+        return attrs
+
+
+class TrendPointSerializer(serializers.Serializer):
+    date = serializers.DateField(help_text="Início do período")
+    last_date = serializers.DateField(help_text="Dia do retrato usado nos estoques")
+    patients = serializers.IntegerField()
+    has_cases = serializers.IntegerField()
+    dm_cases = serializers.IntegerField()
+    alerts_safe = serializers.IntegerField()
+    alerts_moderate = serializers.IntegerField()
+    alerts_critical = serializers.IntegerField()
+    appointments_active = serializers.IntegerField()
+    appointments_finished = serializers.IntegerField()
+    appointments_canceled = serializers.IntegerField()
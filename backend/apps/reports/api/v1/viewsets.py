@@ -0,0 +1,146 @@
+from django.http import StreamingHttpResponse
+from django.utils.timezone import localdate
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from apps.reports.exports import CONTENT_TYPES, stream_export
+from apps.reports.kpis import get_kpis
+from apps.reports.snapshots import trend
+from apps.reports.stratification import get_report
+from .permissions import ReportDataPermission
+from .serializers import (
+    ExportQuerySerializer, KpiSerializer, StratificationQuerySerializer, StratificationRowSerializer,
+    TrendPointSerializer, TrendQuerySerializer,
+)
+
+
+@extend_schema(tags=['Reports'])
+class KpiViewset(viewsets.ViewSet):
+    permission_classes = [IsAuthenticated, ReportDataPermission]
+
+    @extend_schema(responses=KpiSerializer)
+    def list(self, request):
+        #* Contagens agregadas no banco (uma query por modelo) e guardadas em cache até a próxima escrita
+        return Response(get_kpis())
+
+
+def export_schema(*names):
+    descriptions = {
+        'micro_area': "ID da micro-área do paciente.",
+        'condition': "has ou dm (padrão: pacientes com qualquer uma das duas).",
+        'professional': "ID do profissional.",
+        'start': "Data inicial (AAAA-MM-DD) do agendamento.",
+        'end': "Data final (AAAA-MM-DD) do agendamento.",
+    }
+    return extend_schema(
+        parameters=[OpenApiParameter('output', str, enum=['csv', 'xlsx'], description="Formato do arquivo (padrão csv).")]
+        + [OpenApiParameter(name, str, description=descriptions[name]) for name in names],
+        responses={(200, 'text/csv'): OpenApiTypes.BINARY, (200, CONTENT_TYPES['xlsx']): OpenApiTypes.BINARY},
+    )
+
+
+@extend_schema(tags=['Reports'])
+class ExportViewset(viewsets.ViewSet):
+    """Exportações em CSV/XLSX geradas em fluxo: a memória não cresce com o número de linhas."""
+    permission_classes = [IsAuthenticated, ReportDataPermission]
+
+    def stream(self, request, name):
+        params = ExportQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = dict(params.validated_data)
+        output = data.pop('output')
+
+        response = StreamingHttpResponse(stream_export(name, output, **data), content_type=CONTENT_TYPES[output])
+        response['Content-Disposition'] = f'attachment; filename="{name}-{localdate():%Y%m%d}.{output}"'
+        return response
+
+    @export_schema('micro_area')
+    @action(detail=False, methods=['get'])
+    def patients(self, request):
+        return self.stream(request, 'patients')
+
+    @export_schema('condition', 'micro_area')
+    @action(detail=False, methods=['get'])
+    def registry(self, request):
+        """Registro de HAS/DM: dados do paciente com as colunas de HAS, DM e outras DCNT"""
+        return self.stream(request, 'registry')
+
+    @export_schema('professional', 'start', 'end')
+    @action(detail=False, methods=['get'])
+    def appointments(self, request):
+        return self.stream(request, 'appointments')
+
+
+stratification_schema = extend_schema(
+    parameters=[
+        OpenApiParameter('group_by', str, enum=['micro_area', 'institution'], description="Agrupamento (padrão micro_area)."),
+        OpenApiParameter('micro_area', int, description="Restringe aos pacientes de uma micro-área."),
+    ],
+    responses=StratificationRowSerializer(many=True),
+)
+
+
+@extend_schema(tags=['Reports'])
+class StratificationViewset(viewsets.ViewSet):
+    """Estratificação da população por micro-área ou instituição; valores do dia, em cache até a virada."""
+    permission_classes = [IsAuthenticated, ReportDataPermission]
+
+    def report(self, request, name):
+        params = StratificationQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        rows = get_report(name, params.validated_data['group_by'], params.validated_data.get('micro_area'))
+        return Response({'date': localdate(), 'results': rows})
+
+    @stratification_schema
+    @action(detail=False, methods=['get'])
+    def prevalence(self, request):
+        """Pacientes, HAS, DM e HAS+DM por grupo, com as prevalências"""
+        return self.report(request, 'prevalence')
+
+    @stratification_schema
+    @action(detail=False, methods=['get'])
+    def control(self, request):
+        """Taxas de controle pela última aferição (PA < 140/90, HbA1c < 7%)"""
+        return self.report(request, 'control')
+
+    @stratification_schema
+    @action(detail=False, methods=['get'], url_path='bp-classification')
+    def bp_classification(self, request):
+        """Distribuição da classificação da PA dos pacientes com HAS"""
+        return self.report(request, 'bp-classification')
+
+    @stratification_schema
+    @action(detail=False, methods=['get'])
+    def screening(self, request):
+        """Distribuição do resultado do rastreamento dos pacientes com DM"""
+        return self.report(request, 'screening')
+
+    @stratification_schema
+    @action(detail=False, methods=['get'])
+    def demographics(self, request):
+        """Faixa etária e gênero dos pacientes com HAS ou DM"""
+        return self.report(request, 'demographics')
+
+
+@extend_schema(tags=['Reports'])
+class TrendViewset(viewsets.ViewSet):
+    """Séries históricas do painel, lidas só dos retratos diários (DailySnapshot)"""
+    permission_classes = [IsAuthenticated, ReportDataPermission]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter('start', OpenApiTypes.DATE, description="Primeiro dia (padrão: 90 dias atrás)."),
+            OpenApiParameter('end', OpenApiTypes.DATE, description="Último dia (padrão: hoje)."),
+            OpenApiParameter('period', str, enum=['day', 'week', 'month'], description="Agregação (padrão day)."),
+            OpenApiParameter('micro_area', int, description="Só uma micro-área."),
+        ],
+        responses=TrendPointSerializer(many=True),
+    )
+    def list(self, request):
+        params = TrendQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        return Response({'results': trend(data['start'], data['end'], data['period'], data.get('micro_area'))})
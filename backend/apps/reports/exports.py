@@ -0,0 +1,302 @@
+import csv
+import re
+import zipfile
+from collections import namedtuple
+from datetime import date, datetime
+from decimal import Decimal
+from xml.sax.saxutils import escape
+from django.db.models import Aggregate, Case, CharField, Exists, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Concat
+from django.utils import timezone
+from apps.accounts.models import PatientUser
+from apps.appointments.models import Appointment
+from apps.conditions.models import DM, HAS, OtherDCNT
+
+CHUNK_SIZE = 2000 #* Linhas lidas do banco por vez (cursor no servidor no PostgreSQL)
+OUTPUTS = ('csv', 'xlsx')
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+#* key: nome na projeção values(); expression: anotação quando a coluna não é um campo direto;
+#* choices: rótulos para trocar o valor gravado (ex.: HIPERTENSO_E1 -> Hipertenso Estágio 1)
+Column = namedtuple('Column', ['key', 'label', 'expression', 'choices'], defaults=[None, None])
+
+
+class GroupConcat(Aggregate): #* STRING_AGG no PostgreSQL, GROUP_CONCAT no SQLite
+    function = 'STRING_AGG'
+    template = "%(function)s(%(expressions)s, ', ')"
+    output_field = CharField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, function='GROUP_CONCAT', **extra_context)
+
+
+def _resolve_field(model, lookup):
+    field = None
+    for name in lookup.split('__'):
+        field = model._meta.get_field(name)
+        model = field.related_model or model
+    return field
+
+
+def field_column(model, lookup, prefix=''):
+    field = _resolve_field(model, lookup)
+    return Column(lookup, f'{prefix}{field.verbose_name}', choices=dict(field.choices) if field.choices else None)
+
+
+def active_column(model, relation, name, prefix):
+    """Coluna de HAS/DM pelo JOIN do paciente, vazia se o registro da condição estiver excluído."""
+    field = _resolve_field(model, f'{relation}__{name}')
+    expression = Case(When(**{f'{relation}__is_deleted': False}, then=F(f'{relation}__{name}')), default=None)
+    return Column(
+        f'{relation}_{name}', f'{prefix}{field.verbose_name}', expression,
+        dict(field.choices) if field.choices else None,
+    )
+
+
+def _patient_columns():
+    return [
+        Column('id', 'ID'),
+        Column('patient_name', 'Nome', Concat('user__first_name', Value(' '), 'user__last_name')),
+        field_column(PatientUser, 'cpf'),
+        field_column(PatientUser, 'sus'),
+        field_column(PatientUser, 'birth_date'),
+        field_column(PatientUser, 'gender'),
+        Column('phone', 'Telefone'),
+        Column('micro_area__name', 'Micro-área'),
+    ]
+
+
+def _other_dcnt_column():
+    names = OtherDCNT.objects.filter(patient=OuterRef('pk')).order_by().values('patient').annotate(
+        names=GroupConcat('name')
+    ).values('names')
+    return Column('other_dcnt', 'Outras DCNT', Subquery(names))
+
+
+HAS_FIELDS = (
+    'BP_assessment1_1', 'BP_assessment1_2', 'BP_assessment2_1', 'BP_assessment2_2', 'weight', 'height', 'IMC',
+    'abdominal_circumference', 'total_cholesterol', 'HDL_cholesterol', 'BP_classifications', 'framingham_score',
+    'conduct_adopted', 'any_complications_HBP', 'uses_medication', 'medications_name',
+)
+DM_FIELDS = (
+    'capillary_blood_glucose_random', 'fasting_capillary_blood_glucose', 'glycated_hemoglobin', 'weight', 'height',
+    'IMC', 'treatment_type', 'diabetes_comorbidities', 'diabetic_foot', 'screening_result', 'adopted_conduct',
+    'uses_medication', 'medications_name',
+)
+
+
+def patients_export(micro_area=None, **params):
+    has = HAS.objects.filter(patient=OuterRef('pk'))
+    dm = DM.objects.filter(patient=OuterRef('pk'))
+    columns = _patient_columns() + [
+        Column('has_active', 'HAS', Exists(has)),
+        Column('dm_active', 'DM', Exists(dm)),
+        _other_dcnt_column(),
+        Column('created_at', 'Cadastrado em'),
+    ]
+    queryset = PatientUser.objects.all()
+    if micro_area is not None:
+        queryset = queryset.filter(micro_area=micro_area)
+    return columns, queryset
+
+
+def registry_export(condition=None, micro_area=None, **params):
+    """Registro de acompanhamento de HAS/DM: paciente + colunas de HAS, DM e outras DCNT, unidos no SQL."""
+    columns = (
+        _patient_columns()
+        + [active_column(PatientUser, 'has', name, 'HAS - ') for name in HAS_FIELDS]
+        + [active_column(PatientUser, 'dm', name, 'DM - ') for name in DM_FIELDS]
+        + [_other_dcnt_column()]
+    )
+    has = Q(Exists(HAS.objects.filter(patient=OuterRef('pk'))))
+    dm = Q(Exists(DM.objects.filter(patient=OuterRef('pk'))))
+    queryset = PatientUser.objects.filter({'has': has, 'dm': dm}.get(condition, has | dm))
+    if micro_area is not None:
+        queryset = queryset.filter(micro_area=micro_area)
+    return columns, queryset
+
+
+def appointments_export(start=None, end=None, professional=None, **params):
+    columns = [
+        Column('id', 'ID'),
+        Column('scheduled_datetime', 'Data e hora'),
+        Column('duration_minutes', 'Duração (min)'),
+        field_column(Appointment, 'status'),
+        field_column(Appointment, 'type'),
+        field_column(Appointment, 'risk_level'),
+        Column('patient_name', 'Paciente', Concat('patient__user__first_name', Value(' '), 'patient__user__last_name')),
+        Column('patient__cpf', 'CPF'),
+        Column('professional_name', 'Profissional',
+               Concat('professional__user__first_name', Value(' '), 'professional__user__last_name')),
+        Column('professional__role', 'Cargo'),
+        Column('local__name', 'Local'),
+        Column('description', 'Descrição'),
+    ]
+    queryset = Appointment.objects.all()
+    if start is not None:
+        queryset = queryset.filter(scheduled_datetime__date__gte=start)
+    if end is not None:
+        queryset = queryset.filter(scheduled_datetime__date__lte=end)
+    if professional is not None:
+        queryset = queryset.filter(professional=professional)
+    return columns, queryset
+
+
+EXPORTS = {
+    'patients': patients_export,
+    'registry': registry_export,
+    'appointments': appointments_export,
+}
+
+
+def export_rows(name, chunk_size=CHUNK_SIZE, **params):
+    """
+    (colunas, gerador de linhas). As linhas vêm de uma projeção values() lida com iterator(), então só
+    chunk_size linhas ficam em memória, seja qual for o tamanho da exportação.
+    """
+    columns, queryset = EXPORTS[name](**params)
+    annotations = {column.key: column.expression for column in columns if column.expression is not None}
+    rows = queryset.annotate(**annotations).order_by('pk').values_list(*(column.key for column in columns))
+    return columns, rows.iterator(chunk_size=chunk_size)
+
+
+def format_value(value, column):
+    if value is None:
+        return ''
+    if column.choices:
+        return column.choices.get(value, value)
+    if isinstance(value, datetime):
+        return timezone.localtime(value).strftime('%d/%m/%Y %H:%M')
+    if isinstance(value, date):
+        return value.strftime('%d/%m/%Y')
+    return value
+
+
+class _Buffer: #* Arquivo só de escrita: o que é escrito sai no próximo pedaço da resposta
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class _TextAdapter:
+    def __init__(self, buffer):
+        self.buffer = buffer
+
+    def write(self, text):
+        return self.buffer.write(text.encode('utf-8'))
+
+
+def stream_csv(columns, rows):
+    """CSV separado por ; com BOM, como o Excel em português espera."""
+    buffer = _Buffer()
+    writer = csv.writer(_TextAdapter(buffer), delimiter=';')
+    buffer.write('\ufeff'.encode('utf-8'))
+    writer.writerow([column.label for column in columns])
+    for index, row in enumerate(rows, 1):
+        writer.writerow([_csv_value(format_value(value, column)) for value, column in zip(row, columns)])
+        if index % 500 == 0:
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+#* Texto que o Excel leria como fórmula (CSV injection): vai com ' na frente e aparece como texto
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _csv_value(value):
+    if isinstance(value, bool):
+        return 'Sim' if value else 'Não'
+    if isinstance(value, (Decimal, float)):
+        return str(value).replace('.', ',')
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+#* XLSX mínimo (um pacote zip com a planilha em XML) escrito direto na resposta: as linhas são
+#* compactadas à medida que chegam, sem montar a planilha inteira em memória nem em disco.
+XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="xl/workbook.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Dados" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+        '</Relationships>'
+    ),
+}
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+ILLEGAL_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _xlsx_cell(value):
+    if value == '':
+        return '<c/>'
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f'<c><v>{value}</v></c>'
+    text = escape(ILLEGAL_XML_CHARS.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values):
+    return ('<row>' + ''.join(_xlsx_cell(value) for value in values) + '</row>').encode('utf-8')
+
+
+def stream_xlsx(columns, rows):
+    buffer = _Buffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as package:
+        for name, content in XLSX_PARTS.items():
+            package.writestr(name, XML_HEADER + content)
+
+        with package.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write((XML_HEADER + '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                         '<sheetData>').encode('utf-8'))
+            sheet.write(_xlsx_row([column.label for column in columns]))
+            for index, row in enumerate(rows, 1):
+                sheet.write(_xlsx_row([format_value(value, column) for value, column in zip(row, columns)]))
+                if index % 500 == 0:
+                    yield buffer.drain()
+            sheet.write(b'</sheetData></worksheet>')
+    yield buffer.drain()
+
+
+def stream_export(name, output='csv', chunk_size=CHUNK_SIZE, **params):
+    """Gerador de bytes do arquivo da exportação, para StreamingHttpResponse ou para um arquivo."""
+    columns, rows = export_rows(name, chunk_size=chunk_size, **params)
+    writer = stream_xlsx if output == 'xlsx' else stream_csv
+    return writer(columns, rows)
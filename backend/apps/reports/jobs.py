@@ -0,0 +1,9 @@
+from django.utils.timezone import localdate
+from apps.commons.jobs import periodic_job
+from apps.reports.snapshots import take_snapshot
+
+
+@periodic_job('snapshot_kpis', interval=60 * 60)
+def snapshot_kpis(moment):
+    """Regrava o retrato diário de hoje; a última execução antes da meia-noite é a que fica."""
+    return take_snapshot(localdate(moment))
@@ -0,0 +1,101 @@
+from django.conf import settings
+from django.db.models import Count, Exists, OuterRef, Q
+from django.utils.timezone import now
+from apps.accounts.models import PatientUser
+from apps.alerts.models import Alert, RISK_CHOICES
+from apps.appointments.models import Appointment, RISK_LEVEL, STATUS_CHOICES
+from apps.commons.cache import cached_for_models
+from apps.conditions.constants.measurement_choices import MeasurementKindChoices as Kind
+from apps.conditions.models import HAS, DM, MeasurementRollup
+
+KPI_CACHE_KEY = 'reports:kpis'
+
+#* Tabelas lidas pelos agregados; escrever em qualquer uma delas muda a chave do cache
+KPI_MODELS = (PatientUser, HAS, DM, Appointment, Alert, MeasurementRollup)
+
+
+def _grouped_counts(queryset, *fields):
+    """Um único GROUP BY pelos campos; devolve as linhas já com o total de cada grupo."""
+    return list(queryset.order_by().values(*fields).annotate(total=Count('pk')))
+
+
+def _sum_by(rows, field, choices):
+    counts = {value: 0 for value, label in choices}
+    for row in rows:
+        key = row[field] if row[field] is not None else 'sem_valor'
+        counts[key] = counts.get(key, 0) + row['total']
+    return counts
+
+
+def patient_kpis():
+    #* Em risco: paciente com alerta crítico em aberto ou agendamento ativo de risco crítico
+    critical_alert = Alert.objects.filter(patient=OuterRef('pk'), risk_level='critical')
+    critical_appointment = Appointment.objects.filter(patient=OuterRef('pk'), risk_level='Crítico', status='ativo')
+
+    return PatientUser.objects.aggregate(
+        total=Count('pk'),
+        at_risk=Count('pk', filter=Q(Exists(critical_alert)) | Q(Exists(critical_appointment))),
+        with_has=Count('pk', filter=Q(has__isnull=False, has__is_deleted=False)),
+        with_dm=Count('pk', filter=Q(dm__isnull=False, dm__is_deleted=False)),
+    )
+
+
+def appointment_kpis():
+    rows = _grouped_counts(Appointment.objects, 'status', 'risk_level')
+    return {
+        'total': sum(row['total'] for row in rows),
+        'by_status': _sum_by(rows, 'status', STATUS_CHOICES),
+        'by_risk_level': _sum_by(rows, 'risk_level', RISK_LEVEL),
+    }
+
+
+def alert_kpis():
+    #* Alertas com soft delete são os resolvidos, então Alert.objects já traz só os em aberto
+    by_risk_level = _sum_by(_grouped_counts(Alert.objects, 'risk_level'), 'risk_level', RISK_CHOICES)
+    return {
+        'total': sum(by_risk_level.values()),
+        'critical': by_risk_level['critical'],
+        'by_risk_level': by_risk_level,
+    }
+
+
+#* Metas de controle usadas na taxa de controle (última aferição do paciente)
+BP_CONTROL_TARGET = (140, 90)
+HBA1C_CONTROL_TARGET = 7
+
+
+def _control_rate(total, controlled):
+    return {'total': total, 'controlled': controlled, 'rate': round(controlled / total, 4) if total else None}
+
+
+def control_kpis():
+    #* Lê só os resumos (uma linha por paciente e tipo), nunca o histórico de aferições
+    rollups = MeasurementRollup.objects.filter(patient__is_deleted=False)
+    high_diastolic = rollups.filter(
+        patient=OuterRef('patient'), kind=Kind.DIASTOLIC_BP, latest_value__gte=BP_CONTROL_TARGET[1]
+    )
+    bp = rollups.filter(kind=Kind.SYSTOLIC_BP, patient__has__is_deleted=False).aggregate(
+        total=Count('pk'),
+        controlled=Count('pk', filter=Q(latest_value__lt=BP_CONTROL_TARGET[0]) & ~Q(Exists(high_diastolic))),
+    )
+    hba1c = rollups.filter(kind=Kind.HBA1C, patient__dm__is_deleted=False).aggregate(
+        total=Count('pk'), controlled=Count('pk', filter=Q(latest_value__lt=HBA1C_CONTROL_TARGET)),
+    )
+    return {
+        'hypertension': _control_rate(bp['total'], bp['controlled']),
+        'diabetes': _control_rate(hba1c['total'], hba1c['controlled']),
+    }
+
+
+def compute_kpis():
+    return {
+        'patients': patient_kpis(),
+        'appointments': appointment_kpis(),
+        'alerts': alert_kpis(),
+        'control': control_kpis(),
+        'generated_at': now().isoformat(),
+    }
+
+
+def get_kpis():
+    return cached_for_models(KPI_CACHE_KEY, KPI_MODELS, compute_kpis, settings.REPORTS_KPI_CACHE_TIMEOUT)
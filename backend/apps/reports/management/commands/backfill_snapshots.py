@@ -0,0 +1,23 @@
+from datetime import date, timedelta
+from time import monotonic
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.timezone import localdate
+from apps.reports.snapshots import backfill
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói os retratos diários de dias passados a partir das datas de criação e exclusão.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, help='Primeiro dia (AAAA-MM-DD); padrão: 365 dias atrás')
+        parser.add_argument('--end', type=date.fromisoformat, help='Último dia (AAAA-MM-DD); padrão: ontem')
+
+    def handle(self, *args, **options):
+        end = options['end'] or localdate() - timedelta(days=1)
+        start = options['start'] or end - timedelta(days=364)
+        if start > end:
+            raise CommandError('--start deve ser anterior ou igual a --end.')
+
+        started = monotonic()
+        rows = backfill(start, end)
+        self.stdout.write(f'{rows} retratos de {start:%d/%m/%Y} a {end:%d/%m/%Y} em {monotonic() - started:.2f}s.')
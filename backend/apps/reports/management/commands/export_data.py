@@ -0,0 +1,38 @@
+import time
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from apps.reports.exports import CHUNK_SIZE, EXPORTS, OUTPUTS, stream_export
+
+
+class Command(BaseCommand):
+    help = "Exporta pacientes, agendamentos ou o registro de HAS/DM para CSV/XLSX, em fluxo (memória constante)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=list(EXPORTS), help="Exportação a gerar.")
+        parser.add_argument('path', help="Arquivo de saída; o formato vem da extensão (.csv ou .xlsx).")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Linhas lidas do banco por vez.")
+        parser.add_argument('--condition', choices=['has', 'dm'], help="Registro: só pacientes com HAS ou com DM.")
+        parser.add_argument('--micro-area', type=int, help="ID da micro-área (pacientes e registro).")
+        parser.add_argument('--professional', type=int, help="ID do profissional (agendamentos).")
+        parser.add_argument('--start', type=date.fromisoformat, help="Data inicial AAAA-MM-DD (agendamentos).")
+        parser.add_argument('--end', type=date.fromisoformat, help="Data final AAAA-MM-DD (agendamentos).")
+
+    def handle(self, *args, **options):
+        output = options['path'].rsplit('.', 1)[-1].lower()
+        if output not in OUTPUTS:
+            raise CommandError("Use um arquivo .csv ou .xlsx.")
+
+        params = {
+            key: options[key] for key in ('condition', 'micro_area', 'professional', 'start', 'end')
+            if options[key] is not None
+        }
+        started = time.perf_counter()
+        size = 0
+        with open(options['path'], 'wb') as file:
+            for chunk in stream_export(options['name'], output, chunk_size=options['chunk_size'], **params):
+                file.write(chunk)
+                size += len(chunk)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['path']} gerado ({size / 1024:.0f} KB) em {time.perf_counter() - started:.1f}s."
+        ))
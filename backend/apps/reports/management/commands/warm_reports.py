@@ -0,0 +1,22 @@
+import os
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.reports.stratification import warm_reports
+
+
+class Command(BaseCommand):
+    help = (
+        "Pré-calcula os relatórios de estratificação de cada micro-área e o total, em paralelo (um processo por "
+        "micro-área). Exige um cache compartilhado (arquivo, banco, memcached, redis): com LocMemCache o servidor não vê o resultado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Processos do pool (1 = sem pool).")
+
+    def handle(self, *args, **options):
+        if not settings.SHARED_CACHE:
+            raise CommandError("O cache padrão é local a este processo; configure um cache compartilhado para pré-calcular.")
+        started = time.perf_counter()
+        micro_areas = warm_reports(workers=options['workers'])
+        self.stdout.write(f"{len(micro_areas)} micro-área(s) calculadas em {time.perf_counter() - started:.2f}s.")
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        ("locations", "0002_alter_address_options_alter_institution_options_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailySnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(db_index=True)),
+                ("patients", models.PositiveIntegerField(default=0)),
+                ("has_cases", models.PositiveIntegerField(default=0)),
+                ("dm_cases", models.PositiveIntegerField(default=0)),
+                ("alerts_safe", models.PositiveIntegerField(default=0)),
+                ("alerts_moderate", models.PositiveIntegerField(default=0)),
+                ("alerts_critical", models.PositiveIntegerField(default=0)),
+                ("appointments_active", models.PositiveIntegerField(default=0)),
+                ("appointments_finished", models.PositiveIntegerField(default=0)),
+                ("appointments_canceled", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "micro_area",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="locations.microarea",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Retrato diário",
+                "verbose_name_plural": "Retratos diários",
+                "ordering": ["date"],
+                "get_latest_by": "date",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("date", "micro_area"), name="unique_daily_snapshot"
+                    )
+                ],
+            },
+        ),
+    ]
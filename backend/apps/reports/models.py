@@ -1,3 +1,38 @@
 from django.db import models
+from apps.locations.models import MicroArea
 
-# Create your models here.
+
+class DailySnapshot(models.Model):
+    """
+    Contagens do fim de um dia por micro-área, gravadas pelo job snapshot_kpis (ou reconstruídas pelo
+    backfill_snapshots). As tendências do painel leem só esta tabela.
+    """
+    class Meta:
+        verbose_name = "Retrato diário"
+        verbose_name_plural = "Retratos diários"
+        ordering = ['date']
+        get_latest_by = 'date'
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'micro_area'], name='unique_daily_snapshot'),
+        ]
+
+    date = models.DateField(db_index=True)
+    micro_area = models.ForeignKey(MicroArea, on_delete=models.CASCADE, null=True, blank=True) #* Vazio: pacientes sem micro-área
+
+    #* Estoques: o que estava ativo no fim do dia
+    patients = models.PositiveIntegerField(default=0)
+    has_cases = models.PositiveIntegerField(default=0)
+    dm_cases = models.PositiveIntegerField(default=0)
+    alerts_safe = models.PositiveIntegerField(default=0)
+    alerts_moderate = models.PositiveIntegerField(default=0)
+    alerts_critical = models.PositiveIntegerField(default=0)
+
+    #* Fluxos: agendamentos marcados para o dia, pelo status
+    appointments_active = models.PositiveIntegerField(default=0)
+    appointments_finished = models.PositiveIntegerField(default=0)
+    appointments_canceled = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.date:%d/%m/%Y} - {self.micro_area or 'Sem micro-área'}"
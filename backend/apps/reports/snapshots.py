@@ -0,0 +1,152 @@
+from collections import defaultdict
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from apps.accounts.models import PatientUser
+from apps.alerts.models import Alert
+from apps.appointments.models import Appointment
+from apps.conditions.models import DM, HAS
+from apps.reports.models import DailySnapshot
+
+#* Retratos diários por micro-área. Duas formas de preencher, com o mesmo significado:
+#*   - take_snapshot: o estado atual (linhas ativas agora) com um GROUP BY por tabela; o job roda ao longo
+#*     do dia e regrava a linha de hoje, então a última execução do dia é a que fica;
+#*   - backfill: dias passados reconstruídos de created_at/deleted_at. Cada tabela vira duas consultas
+#*     (entradas e saídas por grupo e dia) e o Python acumula o saldo dia a dia, então o custo não cresce
+#*     com o número de dias. Micro-área, risco e status são os de hoje: o histórico desses campos não existe.
+
+ALERT_FIELDS = {'safe': 'alerts_safe', 'moderate': 'alerts_moderate', 'critical': 'alerts_critical'}
+APPOINTMENT_FIELDS = {'ativo': 'appointments_active', 'finalizado': 'appointments_finished', 'cancelado': 'appointments_canceled'}
+
+#* (campo, queryset de todas as linhas, caminho até a micro-área, coluna que escolhe o campo)
+STOCKS = [
+    ('patients', PatientUser.all_objects, 'micro_area', None),
+    ('has_cases', HAS.all_objects, 'patient__micro_area', None),
+    ('dm_cases', DM.all_objects, 'patient__micro_area', None),
+    (ALERT_FIELDS, Alert.all_objects, 'patient__micro_area', 'risk_level'),
+]
+STOCK_FIELDS = ['patients', 'has_cases', 'dm_cases', *ALERT_FIELDS.values()]
+FLOW_FIELDS = list(APPOINTMENT_FIELDS.values())
+
+
+def _field(target, key):
+    return target if isinstance(target, str) else target.get(key)
+
+
+def _grouped(queryset, group, key=None, **values):
+    fields = {'group': F(group), **values}
+    if key:
+        fields['key'] = F(key)
+    return queryset.order_by().values(**fields).annotate(total=Count('pk'))
+
+
+def _appointments(counts, start, end):
+    """Agendamentos marcados em cada dia, pelo status (status vazio não entra)."""
+    queryset = Appointment.objects.filter(scheduled_datetime__date__range=(start, end))
+    for row in _grouped(queryset, 'patient__micro_area', 'status', day=TruncDate('scheduled_datetime')):
+        field = APPOINTMENT_FIELDS.get(row['key'])
+        if field:
+            counts[row['day']][row['group']][field] += row['total']
+
+
+def _counts():
+    return defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+
+
+def current_counts(day):
+    """{dia: {micro_area: {campo: n}}} com o estado atual, contado como o retrato de `day`."""
+    counts = _counts()
+    for target, queryset, group, key in STOCKS:
+        for row in _grouped(queryset.filter(is_deleted=False), group, key):
+            field = _field(target, row.get('key'))
+            if field:
+                counts[day][row['group']][field] += row['total']
+    _appointments(counts, day, day)
+    return counts
+
+
+def history_counts(start, end):
+    """{dia: {micro_area: {campo: n}}} de start a end, reconstruído das datas de criação e exclusão."""
+    counts = _counts()
+    for target, queryset, group, key in STOCKS:
+        #* Excluído sem deleted_at (dados antigos) não tem data de saída: fica fora de todo o histórico
+        queryset = queryset.exclude(is_deleted=True, deleted_at__isnull=True).filter(created_at__date__lte=end)
+        deltas = defaultdict(lambda: defaultdict(int))
+        for row in _grouped(queryset, group, key, day=TruncDate('created_at')):
+            deltas[row['group'], row.get('key')][row['day']] += row['total']
+        removed = queryset.filter(deleted_at__date__lte=end)
+        for row in _grouped(removed, group, key, day=TruncDate('deleted_at')):
+            deltas[row['group'], row.get('key')][row['day']] -= row['total']
+
+        for (micro_area, value), by_day in deltas.items():
+            field = _field(target, value)
+            if not field:
+                continue
+            balance = sum(total for day, total in by_day.items() if day < start)
+            day = start
+            while day <= end:
+                balance += by_day.get(day, 0)
+                if balance > 0:
+                    counts[day][micro_area][field] += balance
+                day += timedelta(days=1)
+    _appointments(counts, start, end)
+    return counts
+
+
+def save_counts(counts, start, end):
+    """Troca os retratos de start a end pelas contagens (um DELETE e um INSERT em lote)."""
+    rows = [
+        DailySnapshot(date=day, micro_area_id=micro_area, **fields)
+        for day, groups in counts.items() for micro_area, fields in groups.items()
+    ]
+    with transaction.atomic():
+        DailySnapshot.objects.filter(date__range=(start, end)).delete()
+        DailySnapshot.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def backfill(start, end):
+    return save_counts(history_counts(start, end), start, end)
+
+
+def take_snapshot(day):
+    """Regrava o retrato de `day` com o estado atual; dias sem retrato desde o último são reconstruídos."""
+    saved = 0
+    last = DailySnapshot.objects.filter(date__lt=day).order_by('-date').values_list('date', flat=True).first()
+    if last and last < day - timedelta(days=1):
+        saved += backfill(last + timedelta(days=1), day - timedelta(days=1))
+    return saved + save_counts(current_counts(day), day, day)
+
+
+def _period_start(day, period):
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def trend(start, end, period='day', micro_area=None):
+    """
+    Série lida só dos retratos (uma consulta). Por semana/mês, os estoques são os do último dia do
+    período e os agendamentos são somados.
+    """
+    queryset = DailySnapshot.objects.filter(date__range=(start, end))
+    if micro_area is not None:
+        queryset = queryset.filter(micro_area=micro_area)
+    rows = queryset.order_by('date').values('date').annotate(
+        **{field: Sum(field) for field in STOCK_FIELDS + FLOW_FIELDS}
+    )
+
+    points = {}
+    for row in rows:
+        period_start = _period_start(row['date'], period)
+        point = points.get(period_start)
+        if point is None:
+            point = points[period_start] = {'date': period_start, **{field: 0 for field in FLOW_FIELDS}}
+        point.update({field: row[field] for field in STOCK_FIELDS})
+        point['last_date'] = row['date']
+        for field in FLOW_FIELDS:
+            point[field] += row[field]
+    return list(points.values())
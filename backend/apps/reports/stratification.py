@@ -0,0 +1,206 @@
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Count, Exists, F, OuterRef, Q
+from django.utils.timezone import localdate
+from apps.accounts.models import PatientUser
+from apps.appointments.models import Appointment
+from apps.commons.cache import get_table_versions
+from apps.conditions.constants.dm_choices import ScreeningResultChoices
+from apps.conditions.constants.has_choices import BloodPressureClassificationChoices
+from apps.conditions.constants.measurement_choices import MeasurementKindChoices as Kind
+from apps.conditions.models import DM, HAS, MeasurementRollup
+from apps.locations.models import Institution, MicroArea
+from apps.reports.kpis import BP_CONTROL_TARGET, HBA1C_CONTROL_TARGET
+
+#* Estratificação da população por micro-área ou instituição. Cada relatório é um único GROUP BY sobre
+#* PatientUser com contagens condicionais (Count com filter vira CASE WHEN/FILTER no SQL); o Python só
+#* junta os nomes dos grupos e calcula as taxas. Os resultados ficam em cache por (relatório, agrupamento,
+#* micro-área, data, versões das tabelas lidas): uma escrita em qualquer delas troca a chave. O comando
+#* warm_reports pré-calcula as micro-áreas (e o total) em paralelo, uma por processo; só adianta com um
+#* cache compartilhado (settings.SHARED_CACHE), já que com cache local o servidor nunca vê o que ele grava.
+STRATIFICATION_CACHE_KEY = 'reports:stratification:{}:{}:{}:{}:{}'
+REPORT_DEPENDENCIES = (PatientUser, HAS, DM, MeasurementRollup, Appointment, MicroArea, Institution)
+
+#* Instituição do paciente = local de algum agendamento ativo dele; um paciente pode contar em mais de uma
+GROUPS = {'micro_area': 'micro_area', 'institution': 'appointment__local'}
+GROUP_MODELS = {'micro_area': MicroArea, 'institution': Institution}
+
+HAS_ACTIVE = Q(has__isnull=False, has__is_deleted=False)
+DM_ACTIVE = Q(dm__isnull=False, dm__is_deleted=False)
+
+AGE_BANDS = [('0-39', 0, 40), ('40-59', 40, 60), ('60-79', 60, 80), ('80+', 80, None)]
+GENDERS = {'masculino': ('m', 'h'), 'feminino': ('f',)}
+
+
+def _years_ago(today, years):
+    try:
+        return today.replace(year=today.year - years)
+    except ValueError: #* 29/02
+        return today.replace(year=today.year - years, day=28)
+
+
+def _age_band(today, minimum, maximum):
+    """Faixa pela data de nascimento; sem ela, pela idade digitada."""
+    by_birth = Q(birth_date__lte=_years_ago(today, minimum))
+    by_age = Q(birth_date__isnull=True, age__gte=minimum)
+    if maximum is not None:
+        by_birth &= Q(birth_date__gt=_years_ago(today, maximum))
+        by_age &= Q(age__lt=maximum)
+    return by_birth | by_age
+
+
+def _gender(initials):
+    condition = Q()
+    for initial in initials:
+        condition |= Q(gender__istartswith=initial)
+    return condition
+
+
+#* As contagens não podem se chamar has/dm: o nome da anotação esconderia a relação usada nos filtros
+def _count(condition=None, distinct=False):
+    return Count('pk', filter=condition, distinct=distinct)
+
+
+def prevalence(today, distinct):
+    return {
+        'total': _count(distinct=distinct),
+        'has_patients': _count(HAS_ACTIVE, distinct),
+        'dm_patients': _count(DM_ACTIVE, distinct),
+        'has_and_dm': _count(HAS_ACTIVE & DM_ACTIVE, distinct),
+    }
+
+
+def control(today, distinct):
+    rollups = MeasurementRollup.objects.filter(patient=OuterRef('pk'))
+    bp_controlled = Q(Exists(rollups.filter(kind=Kind.SYSTOLIC_BP, latest_value__lt=BP_CONTROL_TARGET[0]))) & ~Q(
+        Exists(rollups.filter(kind=Kind.DIASTOLIC_BP, latest_value__gte=BP_CONTROL_TARGET[1]))
+    )
+    return {
+        'has_patients': _count(HAS_ACTIVE, distinct),
+        'has_measured': _count(HAS_ACTIVE & Q(Exists(rollups.filter(kind=Kind.SYSTOLIC_BP))), distinct),
+        'has_controlled': _count(HAS_ACTIVE & bp_controlled, distinct),
+        'dm_patients': _count(DM_ACTIVE, distinct),
+        'dm_measured': _count(DM_ACTIVE & Q(Exists(rollups.filter(kind=Kind.HBA1C))), distinct),
+        'dm_controlled': _count(
+            DM_ACTIVE & Q(Exists(rollups.filter(kind=Kind.HBA1C, latest_value__lt=HBA1C_CONTROL_TARGET))), distinct
+        ),
+    }
+
+
+def bp_classification(today, distinct):
+    aggregates = {
+        value.lower(): _count(HAS_ACTIVE & Q(has__BP_classifications=value), distinct)
+        for value in BloodPressureClassificationChoices.values
+    }
+    aggregates['sem_valor'] = _count(HAS_ACTIVE & Q(has__BP_classifications__isnull=True), distinct)
+    return aggregates
+
+
+def screening(today, distinct):
+    aggregates = {
+        value.lower(): _count(DM_ACTIVE & Q(dm__screening_result=value), distinct)
+        for value in ScreeningResultChoices.values
+    }
+    aggregates['sem_valor'] = _count(DM_ACTIVE & Q(dm__screening_result__isnull=True), distinct)
+    return aggregates
+
+
+def demographics(today, distinct):
+    population = HAS_ACTIVE | DM_ACTIVE #* Pacientes acompanhados por HAS ou DM
+    aggregates = {'total': _count(population, distinct)}
+    for label, minimum, maximum in AGE_BANDS:
+        aggregates[f'age_{label}'] = _count(population & _age_band(today, minimum, maximum), distinct)
+    aggregates['age_sem_valor'] = _count(population & Q(birth_date__isnull=True, age__isnull=True), distinct)
+    for label, initials in GENDERS.items():
+        aggregates[f'gender_{label}'] = _count(population & _gender(initials), distinct)
+    known = Q()
+    for initials in GENDERS.values():
+        known |= _gender(initials)
+    aggregates['gender_outro'] = _count(population & ~known, distinct)
+    return aggregates
+
+
+REPORTS = {
+    'prevalence': prevalence,
+    'control': control,
+    'bp-classification': bp_classification,
+    'screening': screening,
+    'demographics': demographics,
+}
+
+#* Taxas derivadas: (nome, numerador, denominador)
+RATES = {
+    'prevalence': [('has_rate', 'has_patients', 'total'), ('dm_rate', 'dm_patients', 'total')],
+    'control': [('has_control_rate', 'has_controlled', 'has_measured'), ('dm_control_rate', 'dm_controlled', 'dm_measured')],
+}
+
+
+def compute_report(name, group_by='micro_area', micro_area=None, today=None):
+    """Linhas do relatório por grupo; com micro_area, só os pacientes daquela micro-área."""
+    today = today or localdate()
+    queryset = PatientUser.objects.order_by()
+    if micro_area is not None:
+        queryset = queryset.filter(micro_area=micro_area)
+    distinct = group_by == 'institution' #* O join com agendamentos repete o paciente
+    if distinct:
+        queryset = queryset.filter(appointment__is_deleted=False, appointment__local__isnull=False)
+
+    rows = list(
+        queryset.values(group=F(GROUPS[group_by])).annotate(**REPORTS[name](today, distinct)).order_by('group')
+    )
+    names = dict(GROUP_MODELS[group_by].all_objects.filter(
+        pk__in=[row['group'] for row in rows if row['group'] is not None]
+    ).values_list('pk', 'name'))
+    for row in rows:
+        row['name'] = names.get(row['group'], 'Sem micro-área' if group_by == 'micro_area' else None)
+        for rate, numerator, denominator in RATES.get(name, ()):
+            row[rate] = round(row[numerator] / row[denominator], 4) if row[denominator] else None
+    return rows
+
+
+def report_cache_key(name, group_by, micro_area, today, versions=None):
+    versions = versions or get_table_versions(*REPORT_DEPENDENCIES)
+    return STRATIFICATION_CACHE_KEY.format(name, group_by, micro_area or 'all', today.isoformat(), versions)
+
+
+def get_report(name, group_by='micro_area', micro_area=None):
+    today = localdate()
+    key = report_cache_key(name, group_by, micro_area, today) #* Versões lidas antes de calcular: escrita no meio descarta
+    rows = cache.get(key)
+    if rows is None:
+        rows = compute_report(name, group_by, micro_area, today)
+        cache.set(key, rows, settings.REPORTS_STRATIFICATION_CACHE_TIMEOUT)
+    return rows
+
+
+def _compute_micro_area(args):
+    """Roda num processo do pool: todos os relatórios de uma micro-área (None = todas)."""
+    micro_area, today = args
+    try:
+        return micro_area, {name: compute_report(name, 'micro_area', micro_area, today) for name in REPORTS}
+    finally:
+        connections.close_all()
+
+
+def warm_reports(workers=None, today=None):
+    """
+    Calcula e guarda em cache os relatórios de cada micro-área e o total (sem filtro), um por tarefa do pool.
+    O processo principal grava o cache (com cache local, cada processo teria o seu). Devolve as micro-áreas.
+    """
+    today = today or localdate()
+    versions = get_table_versions(*REPORT_DEPENDENCIES)
+    micro_areas = list(MicroArea.objects.order_by('pk').values_list('pk', flat=True))
+    tasks = [(micro_area, today) for micro_area in (None, *micro_areas)]
+    if workers == 1 or len(tasks) < 2:
+        results = map(_compute_micro_area, tasks)
+    else:
+        connections.close_all() #* Os processos filhos não podem herdar a conexão aberta
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_compute_micro_area, tasks))
+    for micro_area, reports in results:
+        cache.set_many({
+            report_cache_key(name, 'micro_area', micro_area, today, versions): rows for name, rows in reports.items()
+        }, settings.REPORTS_STRATIFICATION_CACHE_TIMEOUT)
+    return micro_areas
@@ -0,0 +1,98 @@
+"""
+Testes para as exportações em CSV/XLSX
+"""
+import csv
+import io
+import os
+import tempfile
+from io import StringIO
+import openpyxl
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from rest_framework.test import APITestCase
+from apps.accounts.models import PatientUser, ProfessionalUser
+from apps.conditions.models import DM, HAS, OtherDCNT
+
+
+class ExportTest(APITestCase):
+    """Testes para /api/v1/reports/exports/ e o comando export_data"""
+
+    URL = '/api/v1/reports/exports/'
+
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_superuser(username='admin', password='123456'))
+        self.jose = self.create_patient('jose', 'José', 'Araújo', '12345678900')
+        self.maria = self.create_patient('maria', 'Maria', 'Souza', '98765432100')
+        self.ana = self.create_patient('ana', 'Ana', 'Lima', '11122233344')
+
+        HAS.objects.create(patient=self.jose, BP_assessment1_1=150, BP_classifications='HIPERTENSO_E1')
+        OtherDCNT.objects.create(patient=self.jose, name='Asma')
+        OtherDCNT.objects.create(patient=self.jose, name='DPOC')
+        DM.objects.create(patient=self.maria, glycated_hemoglobin='7.5').delete() #* Registro excluído não entra
+
+    def create_patient(self, username, first_name, last_name, cpf):
+        user = User.objects.create_user(username=username, first_name=first_name, last_name=last_name)
+        return PatientUser.objects.create(user=user, cpf=cpf)
+
+    def download(self, name, **params):
+        response = self.client.get(f'{self.URL}{name}/', params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content)
+
+    def read_csv(self, content):
+        return list(csv.DictReader(io.StringIO(content.decode('utf-8-sig')), delimiter=';'))
+
+    def test_patients_csv(self):
+        """Testa a exportação de pacientes em CSV, com as condições unidas no SQL"""
+        response, content = self.download('patients')
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        self.assertIn('attachment; filename="patients-', response['Content-Disposition'])
+
+        rows = {row['CPF']: row for row in self.read_csv(content)}
+        self.assertEqual(set(rows), {'12345678900', '98765432100', '11122233344'})
+        self.assertEqual(rows['12345678900']['Nome'], 'José Araújo')
+        self.assertEqual((rows['12345678900']['HAS'], rows['12345678900']['DM']), ('Sim', 'Não'))
+        self.assertEqual(rows['12345678900']['Outras DCNT'], 'Asma, DPOC')
+        self.assertEqual(rows['98765432100']['DM'], 'Não')
+
+    def test_csv_neutralizes_formulas(self):
+        """Testa que textos começados por =, +, - ou @ saem com ' na frente e não viram fórmula no Excel"""
+        OtherDCNT.objects.create(patient=self.ana, name='=HYPERLINK("http://exemplo")')
+        self.ana.user.first_name = '@SUM(1+1)'
+        self.ana.user.save()
+
+        rows = {row['CPF']: row for row in self.read_csv(self.download('patients')[1])}
+        self.assertEqual(rows['11122233344']['Nome'], "'@SUM(1+1) Lima")
+        self.assertEqual(rows['11122233344']['Outras DCNT'], '\'=HYPERLINK("http://exemplo")')
+        self.assertEqual(rows['12345678900']['Nome'], 'José Araújo')
+
+    def test_registry_xlsx(self):
+        """Testa o registro de HAS/DM em XLSX, com rótulos das escolhas e sem registros excluídos"""
+        _, content = self.download('registry', output='xlsx')
+        sheet = openpyxl.load_workbook(io.BytesIO(content), read_only=True).active
+        header, *rows = list(sheet.iter_rows(values_only=True))
+
+        self.assertEqual(len(rows), 1)
+        row = dict(zip(header, rows[0]))
+        self.assertEqual(row['CPF'], '12345678900')
+        self.assertEqual(row['HAS - Pressão Arterial 1ª Avaliação (Sistólica)'], 150)
+        self.assertEqual(row['HAS - Classificação da PA'], 'Hipertenso Estágio 1')
+
+    def test_query_count_does_not_grow_with_rows(self):
+        """Testa que a exportação é uma única consulta, com qualquer número de linhas"""
+        with self.assertNumQueries(1):
+            self.download('registry', condition='has')
+
+    def test_only_managers(self):
+        """Testa que profissionais não exportam dados"""
+        professional = ProfessionalUser.objects.create(user=User.objects.create_user(username='prof'), role='Enfermeiro')
+        self.client.force_authenticate(professional.user)
+        self.assertEqual(self.client.get(f'{self.URL}patients/').status_code, 403)
+
+    def test_management_command(self):
+        """Testa o comando export_data gravando o arquivo em disco"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'pacientes.csv')
+            call_command('export_data', 'patients', path, '--chunk-size', '1', stdout=StringIO())
+            with open(path, 'rb') as file:
+                self.assertEqual(len(self.read_csv(file.read())), 3)
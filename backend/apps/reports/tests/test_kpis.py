@@ -0,0 +1,71 @@
+"""
+Testes para a rota de KPIs do painel do gestor
+"""
+from django.core.cache import cache
+from django.contrib.auth.models import User
+from django.utils.timezone import now, timedelta
+from rest_framework.test import APITestCase
+from apps.accounts.models import PatientUser, ProfessionalUser
+from apps.alerts.models import Alert
+from apps.appointments.models import Appointment
+from apps.conditions.models import HAS
+
+
+class KpiViewsetTest(APITestCase):
+    """Testes para /api/v1/reports/kpis/"""
+
+    URL = '/api/v1/reports/kpis/'
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(User.objects.create_superuser(username='admin', password='123456'))
+        self.professional = ProfessionalUser.objects.create(user=User.objects.create_user(username='prof'), role='Enfermeiro')
+        self.patients = [
+            PatientUser.objects.create(user=User.objects.create_user(username=f'paciente{i}'), cpf=f'{i:011d}')
+            for i in range(3)
+        ]
+        HAS.objects.create(patient=self.patients[0], BP_assessment1_1=150, BP_assessment1_2=85)
+
+        self.create_appointment(self.patients[0], 'Crítico', 'ativo')
+        self.create_appointment(self.patients[1], 'Seguro', 'finalizado')
+        self.create_appointment(self.patients[1], 'Crítico', 'cancelado')
+        Alert.objects.create(patient=self.patients[2], title='PA elevada', description='-', risk_level='critical')
+        Alert.objects.create(patient=self.patients[1], title='Retorno', description='-', risk_level='safe')
+
+    def create_appointment(self, patient, risk_level, status):
+        hours = Appointment.all_objects.count() #* Horários distintos: a agenda do profissional não aceita sobreposição
+        return Appointment.objects.create(
+            patient=patient, professional=self.professional, scheduled_datetime=now() + timedelta(days=1, hours=hours),
+            risk_level=risk_level, type='Consulta', status=status,
+        )
+
+    def test_kpis(self):
+        """Testa os totais agregados de pacientes, agendamentos e alertas"""
+        with self.assertNumQueries(5): #* uma query agregada por modelo e uma por taxa de controle
+            data = self.client.get(self.URL).data
+
+        self.assertEqual(data['patients'], {'total': 3, 'at_risk': 2, 'with_has': 1, 'with_dm': 0})
+        self.assertEqual(data['appointments']['total'], 3)
+        self.assertEqual(data['appointments']['by_status'], {'ativo': 1, 'finalizado': 1, 'cancelado': 1})
+        self.assertEqual(data['appointments']['by_risk_level'], {'Seguro': 1, 'Moderado': 0, 'Crítico': 2})
+        self.assertEqual(data['alerts']['critical'], 1)
+        self.assertEqual(data['alerts']['total'], 2)
+        self.assertEqual(data['control']['hypertension'], {'total': 1, 'controlled': 0, 'rate': 0.0})
+        self.assertEqual(data['control']['diabetes'], {'total': 0, 'controlled': 0, 'rate': None})
+
+    def test_cached_until_write(self):
+        """Testa que os KPIs vêm do cache e são recalculados após um save ou soft delete"""
+        self.client.get(self.URL)
+        with self.assertNumQueries(0):
+            self.client.get(self.URL)
+
+        Alert.objects.get(risk_level='critical').delete()
+        self.assertEqual(self.client.get(self.URL).data['alerts']['critical'], 0)
+
+        Alert.all_objects.filter(risk_level='critical').restore()
+        self.assertEqual(self.client.get(self.URL).data['alerts']['critical'], 1)
+
+    def test_patients_cannot_access(self):
+        """Testa que pacientes não acessam os relatórios"""
+        self.client.force_authenticate(self.patients[0].user)
+        self.assertEqual(self.client.get(self.URL).status_code, 403)
@@ -0,0 +1,109 @@
+"""
+Testes para os retratos diários e as tendências do painel
+"""
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.utils.timezone import localdate, now, timedelta
+from rest_framework.test import APITestCase
+from apps.accounts.models import PatientUser, ProfessionalUser
+from apps.alerts.models import Alert
+from apps.appointments.models import Appointment
+from apps.conditions.models import HAS
+from apps.locations.models import MicroArea
+from apps.reports.models import DailySnapshot
+from apps.reports.snapshots import take_snapshot
+
+
+class SnapshotTest(APITestCase):
+    """Testes para DailySnapshot, o job snapshot_kpis, o backfill_snapshots e /api/v1/reports/trends/"""
+
+    URL = '/api/v1/reports/trends/'
+
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_superuser(username='admin', password='123456'))
+        self.today = localdate()
+        self.norte = MicroArea.objects.create(name='Norte')
+        self.jose = self.create_patient('jose', days_ago=10)
+        self.maria = self.create_patient('maria', days_ago=5)
+
+    def create_patient(self, username, days_ago):
+        patient = PatientUser.objects.create(user=User.objects.create_user(username=username), micro_area=self.norte)
+        PatientUser.objects.filter(pk=patient.pk).update(created_at=now() - timedelta(days=days_ago))
+        return patient
+
+    def snapshot(self, day):
+        return DailySnapshot.objects.get(date=day, micro_area=self.norte)
+
+    def test_snapshot_of_today(self):
+        """Testa o retrato do estado atual: pacientes, casos, alertas em aberto e agendamentos do dia"""
+        HAS.objects.create(patient=self.jose)
+        Alert.objects.create(patient=self.jose, title='PA alta', risk_level='critical')
+        Alert.objects.create(patient=self.maria, title='Revisar', risk_level='moderate').delete()
+        professional = ProfessionalUser.objects.create(user=User.objects.create_user(username='prof'), role='Enfermeiro')
+        Appointment.objects.create(
+            patient=self.maria, professional=professional, scheduled_datetime=now(), risk_level='Seguro',
+            type='Consulta', status='ativo',
+        )
+
+        take_snapshot(self.today)
+        take_snapshot(self.today) #* Regravar o dia não duplica a linha
+
+        snapshot = self.snapshot(self.today)
+        self.assertEqual((snapshot.patients, snapshot.has_cases, snapshot.dm_cases), (2, 1, 0))
+        self.assertEqual((snapshot.alerts_critical, snapshot.alerts_moderate), (1, 0))
+        self.assertEqual(snapshot.appointments_active, 1)
+        self.assertEqual(DailySnapshot.objects.count(), 1)
+
+    def test_backfill_from_audit_timestamps(self):
+        """Testa a reconstrução dos dias passados pelas datas de criação e exclusão"""
+        self.maria.delete()
+        PatientUser.all_objects.filter(pk=self.maria.pk).update(deleted_at=now() - timedelta(days=2))
+        alert = Alert.objects.create(patient=self.jose, title='PA alta', risk_level='critical')
+        alert.delete()
+        Alert.all_objects.filter(pk=alert.pk).update(
+            created_at=now() - timedelta(days=4), deleted_at=now() - timedelta(days=1),
+        )
+
+        call_command('backfill_snapshots', '--start', (self.today - timedelta(days=10)).isoformat(), stdout=StringIO())
+
+        patients = {
+            days: self.snapshot(self.today - timedelta(days=days)).patients for days in (10, 5, 3, 2, 1)
+        }
+        self.assertEqual(patients, {10: 1, 5: 2, 3: 2, 2: 1, 1: 1})
+        self.assertEqual(self.snapshot(self.today - timedelta(days=4)).alerts_critical, 1)
+        self.assertEqual(self.snapshot(self.today - timedelta(days=1)).alerts_critical, 0)
+        self.assertFalse(DailySnapshot.objects.filter(date=self.today).exists())
+
+    def test_job_fills_missing_days(self):
+        """Testa que o job reconstrói os dias sem retrato desde o último"""
+        DailySnapshot.objects.create(date=self.today - timedelta(days=3), micro_area=self.norte, patients=2)
+        take_snapshot(self.today)
+        self.assertEqual(
+            list(DailySnapshot.objects.values_list('date', flat=True)),
+            [self.today - timedelta(days=days) for days in (3, 2, 1, 0)],
+        )
+
+    def test_trends_read_only_snapshots(self):
+        """Testa a série por dia e por semana, lida só da tabela de retratos"""
+        monday = self.today - timedelta(days=self.today.weekday() + 7)
+        for offset, (patients, finished) in enumerate([(1, 2), (2, 0), (3, 1)]):
+            DailySnapshot.objects.create(
+                date=monday + timedelta(days=offset), micro_area=self.norte, patients=patients,
+                appointments_finished=finished,
+            )
+        DailySnapshot.objects.create(date=monday, micro_area=None, patients=4)
+
+        params = {'start': monday.isoformat(), 'end': (monday + timedelta(days=6)).isoformat()}
+        daily = self.client.get(self.URL, params).data['results']
+        self.assertEqual([point['patients'] for point in daily], [5, 2, 3])
+
+        weekly = self.client.get(self.URL, {**params, 'period': 'week', 'micro_area': self.norte.pk}).data['results']
+        self.assertEqual(len(weekly), 1)
+        self.assertEqual((weekly[0]['patients'], weekly[0]['appointments_finished']), (3, 3))
+        self.assertEqual(weekly[0]['last_date'], monday + timedelta(days=2))
+
+    def test_invalid_range(self):
+        """Testa que o fim antes do início é recusado"""
+        response = self.client.get(self.URL, {'start': self.today.isoformat(), 'end': (self.today - timedelta(days=1)).isoformat()})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,124 @@
+"""
+Testes para os relatórios de estratificação por micro-área e instituição
+"""
+from datetime import date
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+from django.utils.timezone import localdate, now, timedelta
+from rest_framework.test import APITestCase
+from apps.accounts.models import PatientUser, ProfessionalUser
+from apps.appointments.models import Appointment
+from apps.conditions.models import DM, HAS
+from apps.locations.models import Institution, MicroArea
+from apps.reports.stratification import report_cache_key
+
+
+class StratificationTest(APITestCase):
+    """Testes para /api/v1/reports/stratification/ e o comando warm_reports"""
+
+    URL = '/api/v1/reports/stratification/'
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(User.objects.create_superuser(username='admin', password='123456'))
+        self.norte = MicroArea.objects.create(name='Norte')
+        self.sul = MicroArea.objects.create(name='Sul')
+
+        self.jose = self.create_patient('jose', self.norte, gender='Masculino', age=65)
+        self.maria = self.create_patient('maria', self.norte, gender='Feminino', birth_date=date(1990, 5, 1))
+        self.ana = self.create_patient('ana', self.norte, gender='Feminino', age=50)
+        self.joao = self.create_patient('joao', self.sul, gender='Masculino', age=30)
+
+        HAS.objects.create(patient=self.jose, BP_assessment1_1=130, BP_assessment1_2=80)
+        HAS.objects.create(patient=self.maria, BP_assessment1_1=170, BP_assessment1_2=100)
+        DM.objects.create(patient=self.maria, hba1c='6.5', screening_result='NORMAL')
+        DM.objects.create(patient=self.joao, hba1c='9.2')
+        HAS.objects.create(patient=self.ana).delete() #* Registro excluído não entra
+
+    def create_patient(self, username, micro_area, **fields):
+        user = User.objects.create_user(username=username)
+        return PatientUser.objects.create(user=user, micro_area=micro_area, **fields)
+
+    def report(self, name, **params):
+        response = self.client.get(f'{self.URL}{name}/', params)
+        self.assertEqual(response.status_code, 200)
+        return {row['name']: row for row in response.data['results']}
+
+    def test_prevalence_per_micro_area(self):
+        """Testa as contagens e prevalências de HAS/DM por micro-área"""
+        rows = self.report('prevalence')
+        self.assertEqual(
+            [rows['Norte'][key] for key in ('total', 'has_patients', 'dm_patients', 'has_and_dm')], [3, 2, 1, 1]
+        )
+        self.assertEqual(rows['Norte']['has_rate'], round(2 / 3, 4))
+        self.assertEqual((rows['Sul']['has_patients'], rows['Sul']['dm_rate']), (0, 1.0))
+
+    def test_control_and_distributions(self):
+        """Testa as taxas de controle pela última aferição e as distribuições de PA e rastreamento"""
+        control = self.report('control')
+        self.assertEqual((control['Norte']['has_measured'], control['Norte']['has_controlled']), (2, 1))
+        self.assertEqual(control['Norte']['has_control_rate'], 0.5)
+        self.assertEqual((control['Sul']['dm_measured'], control['Sul']['dm_controlled']), (1, 0))
+
+        classification = self.report('bp-classification')['Norte']
+        self.assertEqual(sum(value for key, value in classification.items() if key not in ('group', 'name')), 2)
+        self.assertEqual(self.report('screening')['Norte']['normal'], 1)
+
+        demographics = self.report('demographics', micro_area=self.norte.pk)
+        self.assertEqual(list(demographics), ['Norte'])
+        self.assertEqual(
+            [demographics['Norte'][key] for key in ('total', 'age_0-39', 'age_60-79', 'gender_masculino', 'gender_feminino')],
+            [2, 1, 1, 1, 1],
+        )
+
+    def test_group_by_institution(self):
+        """Testa o agrupamento pelo local dos agendamentos, sem contar o paciente duas vezes"""
+        professional = ProfessionalUser.objects.create(user=User.objects.create_user(username='prof'), role='Enfermeiro')
+        ubs = Institution.objects.create(name='UBS Centro')
+        for days in (1, 2):
+            Appointment.objects.create(
+                patient=self.jose, professional=professional, local=ubs, scheduled_datetime=now() + timedelta(days=days),
+                risk_level='Seguro', type='Consulta',
+            )
+
+        rows = self.report('prevalence', group_by='institution')
+        self.assertEqual(list(rows), ['UBS Centro'])
+        self.assertEqual((rows['UBS Centro']['total'], rows['UBS Centro']['has_patients']), (1, 1))
+
+    def test_results_are_cached_per_day(self):
+        """Testa que o relatório do dia vem do cache na segunda chamada"""
+        self.report('prevalence')
+        self.assertIsNotNone(cache.get(report_cache_key('prevalence', 'micro_area', None, localdate())))
+        with self.assertNumQueries(0):
+            self.report('prevalence')
+
+    def test_writes_invalidate_cached_report(self):
+        """Testa que uma condição nova aparece no relatório do mesmo dia"""
+        self.assertEqual(self.report('prevalence')['Sul']['has_patients'], 0)
+        HAS.objects.create(patient=self.joao)
+        self.assertEqual(self.report('prevalence')['Sul']['has_patients'], 1)
+
+    @override_settings(SHARED_CACHE=True)
+    def test_warm_reports_command(self):
+        """Testa que o comando warm_reports deixa em cache os relatórios de cada micro-área e o total"""
+        call_command('warm_reports', '--workers', '1', stdout=StringIO())
+        rows = cache.get(report_cache_key('control', 'micro_area', self.sul.pk, localdate()))
+        self.assertEqual([row['name'] for row in rows], ['Sul'])
+        with self.assertNumQueries(0):
+            self.report('control', micro_area=self.sul.pk)
+            self.report('control')
+
+    def test_warm_reports_requires_shared_cache(self):
+        """Testa que o comando recusa o cache local, que o servidor não enxerga"""
+        with self.assertRaises(CommandError):
+            call_command('warm_reports', '--workers', '1', stdout=StringIO())
+
+    def test_invalid_params(self):
+        """Testa agrupamento desconhecido e acesso de profissionais"""
+        self.assertEqual(self.client.get(f'{self.URL}prevalence/', {'group_by': 'cidade'}).status_code, 400)
+        professional = ProfessionalUser.objects.create(user=User.objects.create_user(username='prof'), role='Enfermeiro')
+        self.client.force_authenticate(professional.user)
+        self.assertEqual(self.client.get(f'{self.URL}prevalence/').status_code, 403)
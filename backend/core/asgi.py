@@ -14,3 +14,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_asgi_application()
+
+from apps.commons.jobs import start_server_scheduler  # noqa: E402 (depende do Django já configurado)
+
+start_server_scheduler()
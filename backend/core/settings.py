@@ -159,18 +159,59 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.accounts.api.v1.authentication.RoleClaimsJWTAuthentication',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_PAGINATION_CLASS': 'apps.commons.api.v1.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
 }
 
+API_MAX_PAGE_SIZE = 200  # Limite para ?page_size= nas listagens paginadas
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=120),  # 5 minutos para testes
     "REFRESH_TOKEN_LIFETIME": timedelta(minutes=500),
     "ROTATE_REFRESH_TOKENS": True,  # Gera novo refresh token a cada renovação
     "BLACKLIST_AFTER_ROTATION": True,  # Invalida o refresh token anterior
+    "TOKEN_REFRESH_SERIALIZER": "apps.accounts.api.v1.auth_serializers.RoleTokenRefreshSerializer",
 }
 
+# Cache
+# Local por padrão. Com vários workers, aponte CACHE_LOCATION para um diretório compartilhado
+# (FileBasedCache) para que a invalidação das claims de papel valha para todos os processos.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'rastreiamais'),
+    }
+}
+
+# True quando o cache é visto por todos os processos (arquivo, banco, memcached, redis). Com cache local,
+# uma invalidação só chega ao worker que fez a escrita, então o que depende dela é desligado
+SHARED_CACHE = CACHES['default']['BACKEND'] not in (
+    'django.core.cache.backends.locmem.LocMemCache', 'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Tempo (s) que a versão das claims de papel fica no cache; depois disso o token volta a ser conferido no banco.
+# As claims só dispensam o banco com SHARED_CACHE
+ROLE_CLAIMS_VERSION_TIMEOUT = 60 * 60
+
+# Versões por tabela usadas para invalidar resultados em cache (ver apps/commons/cache.py)
+TABLE_VERSION_TIMEOUT = 60 * 60 * 24
+REPORTS_KPI_CACHE_TIMEOUT = 60  # Segundos que os KPIs do painel do gestor ficam em cache
+RESPONSE_CACHE_TIMEOUT = 60 * 5  # Respostas das viewsets com cache_responses; limita o atraso entre processos com cache local
+REPORTS_STRATIFICATION_CACHE_TIMEOUT = 60 * 60 * 24  # Relatórios de estratificação: chave por dia e versões das tabelas (ver apps/reports/stratification.py)
+
+# Expediente usado para calcular os horários livres das agendas (ver apps/appointments/scheduling.py)
+AGENDA_OPENING_TIME = os.environ.get('AGENDA_OPENING_TIME', '07:00')
+AGENDA_CLOSING_TIME = os.environ.get('AGENDA_CLOSING_TIME', '17:00')
+AGENDA_WORKDAYS = [0, 1, 2, 3, 4]  # Segunda a sexta (date.weekday())
+AGENDA_CACHE_TIMEOUT = 60 * 5  # Limita o tempo de uma agenda desatualizada por exclusões em cascata
+
+# Jobs periódicos (ver apps/commons/jobs.py). Por padrão rodam via `manage.py run_jobs` (cron ou --loop);
+# com True, cada processo do servidor (core/wsgi.py, core/asgi.py) sobe o agendador em segundo plano
+PERIODIC_JOBS_IN_PROCESS = os.environ.get('PERIODIC_JOBS_IN_PROCESS', 'False') == 'True'
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'API Rastreia+',
     'DESCRIPTION': 'Documentação da API para auxiliar APS e UBS no gerenciamento de Pessoas com Doenças Crônicas não transmissiveis.',
@@ -191,6 +232,7 @@ SPECTACULAR_SETTINGS = {
         {"name": "Conditions - HAS", "description": "Gerenciamento de casos de Hipertensão Arterial Sistólica"},
         {"name": "Conditions - DM", "description": "Gerenciamento de casos de Diabetes Mellitus"},
         {"name": "Conditions - Other", "description": "Gerenciamento de outras doenças crônicas não transmissíveis (DCNTs)"},
+        {"name": "Conditions - Measurements", "description": "Histórico de aferições (PA, glicemia, HbA1c) e seus resumos por paciente"},
         
         {"name": "Locations - Address", "description": "Gerenciamento de endereços de pacientes e instituições"},
         {"name": "Locations - Micro-Area", "description": "Gerenciamento das microáreas de cobertura da APS"},
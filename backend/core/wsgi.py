@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+from apps.commons.jobs import start_server_scheduler  # noqa: E402 (depende do Django já configurado)
+
+start_server_scheduler()
@@ -17,7 +17,7 @@ import {
   ProfRow,
 } from "@/components/gestor/ProfissionaisTable";
 import { StatusChip } from "@/components/ui/StatusChip";
-import { apiGet } from "@/lib/api";
+import { apiGetAll } from "@/lib/api";
 import { KPI_ICONS } from "@/lib/gestor-kpis";
 import { useAlertsQuery } from "@/lib/hooks/alerts/useAlertsQuery";
 import { useGestorKpis } from "@/lib/hooks/gestor/useGestorKpis";
@@ -55,15 +55,9 @@ export default function GestorPage() {
   } = useQuery<ProfRow[]>({
     queryKey: ["professionals"],
     queryFn: async () => {
-      const resp = await apiGet<
-        ProfessionalApi[] | { results: ProfessionalApi[] }
-      >("/api/v1/accounts/professionals/");
-
-      const list: ProfessionalApi[] = Array.isArray(resp)
-        ? resp
-        : resp && "results" in resp && Array.isArray(resp.results)
-          ? resp.results
-          : [];
+      const list = await apiGetAll<ProfessionalApi>(
+        "/api/v1/accounts/professionals/",
+      );
 
       const mapped: ProfRow[] = list.map((p) => {
         const first = p.user?.first_name ?? "";
@@ -248,8 +242,7 @@ export default function GestorPage() {
                           </div>
                           <div className="flex flex-col items-start">
                             <p className="text-sm font-semibold text-gray-800 dark:text-gray-100">
-                              {a.patient?.user?.first_name ?? "—"}{" "}
-                              {a.patient?.user?.last_name ?? "—"}{" "}
+                              {a.patient?.name ?? "—"}{" "}
                               <span className="text-gray-500 dark:text-gray-400">
                                 {formatCpf(a.patient?.cpf)}
                               </span>
@@ -10,7 +10,7 @@ import {
   ShieldExclamationIcon,
 } from "@heroicons/react/24/outline";
 
-import { apiGet } from "@/lib/api";
+import { apiGetAll } from "@/lib/api";
 import { useHasData } from "@/lib/hooks/paciente/useHasData";
 import { useMedications } from "@/lib/hooks/paciente/useMedications";
 import { useMe } from "@/lib/hooks/me/useMe";
@@ -40,11 +40,7 @@ export default function MePage() {
   const { data, isLoading, isError } = useQuery({
     queryKey: ["appointments"],
     queryFn: async () => {
-      const resp = await apiGet<any>("/api/v1/appointments/appointments/");
-
-      if (Array.isArray(resp)) return resp;
-
-      return resp?.results ?? [];
+      return apiGetAll<any>("/api/v1/appointments/appointments/");
     },
     refetchOnWindowFocus: false,
     staleTime: 1000 * 60 * 2,
@@ -106,8 +102,7 @@ export default function MePage() {
     if (!data) return [];
 
     return data.map((a: any) => {
-      const profissional =
-        `${a.professional?.user?.first_name ?? ""} ${a.professional?.user?.last_name ?? ""}`.trim();
+      const profissional = a.professional?.name ?? "";
       const cargo = a.professional?.role ?? "—";
       const local = a.location?.name ?? a.local?.name ?? "—";
 
@@ -3,7 +3,7 @@
 import { useQuery } from "@tanstack/react-query";
 import { useRouter } from "next/navigation";
 
-import { apiGet } from "@/lib/api";
+import { apiGetAll } from "@/lib/api";
 import {
   PacientesTable,
   type PatientRow,
@@ -19,13 +19,7 @@ export default function Page() {
   } = useQuery<PatientRow[]>({
     queryKey: ["patients"],
     queryFn: async () => {
-      const resp = await apiGet<any>("/api/v1/accounts/patients/");
-
-      const list = Array.isArray(resp)
-        ? resp
-        : resp && Array.isArray((resp as any).results)
-          ? (resp as any).results
-          : [];
+      const list = await apiGetAll<any>("/api/v1/accounts/patients/");
 
       return list.map((p: any): PatientRow => {
         const addrFromAddress =
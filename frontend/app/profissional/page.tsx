@@ -19,7 +19,7 @@ import {
 } from "@/components/profissional/AgendaTable";
 import ProfessionalAppointmentDetailsModal from "@/components/profissional/ProfessionalAppointmentDetailsModal";
 import { StatusChip } from "@/components/ui/StatusChip";
-import { apiGet, apiPatch } from "@/lib/api";
+import { apiGetAll, apiPatch } from "@/lib/api";
 import { useAlertsQuery } from "@/lib/hooks/alerts/useAlertsQuery";
 import { useDeleteAlert } from "@/lib/hooks/alerts/useDeleteAlert";
 import { useProfissionalKpis } from "@/lib/hooks/profissional/useProfissionalKpis";
@@ -102,21 +102,9 @@ export default function ProfissionalPage() {
   } = useQuery<AppointmentResponse[]>({
     queryKey: ["appointments"],
     queryFn: async () => {
-      const resp = await apiGet<AppointmentResponse[]>(
-        "/api/v1/appointments/appointments/",
+      return apiGetAll<AppointmentResponse>(
+        "/api/v1/appointments/appointments/?expand=patient",
       );
-
-      if (Array.isArray(resp)) return resp;
-      if (
-        resp &&
-        typeof resp === "object" &&
-        "results" in resp &&
-        Array.isArray((resp as any).results)
-      ) {
-        return (resp as any).results as AppointmentResponse[];
-      }
-
-      return [];
     },
     refetchOnWindowFocus: false,
     staleTime: 1000 * 60 * 2,
@@ -343,8 +331,7 @@ export default function ProfissionalPage() {
                           </div>
                           <div className="flex flex-col items-start">
                             <p className="text-sm font-semibold text-gray-800 dark:text-gray-100">
-                              {a.patient?.user?.first_name ?? "—"}{" "}
-                              {a.patient?.user?.last_name ?? "—"}{" "}
+                              {a.patient?.name ?? "—"}{" "}
                               <span className="text-gray-500 dark:text-gray-400">
                                 {formatCpf(a.patient?.cpf)}
                               </span>
@@ -7,7 +7,7 @@ import { Input, Textarea, Select, SelectItem } from "@heroui/react";
 import { Spinner } from "@heroui/spinner";
 import { useQuery } from "@tanstack/react-query";
 
-import { apiGet } from "@/lib/api";
+import { apiGet, apiGetAll } from "@/lib/api";
 import { useAppointments } from "@/lib/hooks/appointments/useAppointments";
 
 function SuccessModal({
@@ -82,21 +82,13 @@ export default function CreateAppointmentsModal({
   const { data: professionals = [], isLoading: loadingProfessionals } =
     useQuery({
       queryKey: ["professionals"],
-      queryFn: async () => {
-        const resp = await apiGet<any>("/api/v1/accounts/professionals/");
-
-        return Array.isArray(resp) ? resp : resp?.results || [];
-      },
+      queryFn: () => apiGetAll<any>("/api/v1/accounts/professionals/"),
       enabled: open,
     });
 
   const { data: institutions = [], isLoading: loadingInstitutions } = useQuery({
     queryKey: ["institutions"],
-    queryFn: async () => {
-      const resp = await apiGet<any>("/api/v1/locations/institutions/");
-
-      return Array.isArray(resp) ? resp : resp?.results || [];
-    },
+    queryFn: () => apiGetAll<any>("/api/v1/locations/institutions/"),
     enabled: open,
   });
 
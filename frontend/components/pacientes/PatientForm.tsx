@@ -3,7 +3,7 @@
 
 import PatientWizard from "@/components/pacientes/PatientWizard";
 import { notifyError, notifySuccess, notifyWarn } from "@/components/ui/notify";
-import { apiGet } from "@/lib/api";
+import { apiGetAll } from "@/lib/api";
 import { createAppointment } from "@/lib/api/appointments";
 import {
   createAddress,
@@ -197,16 +197,9 @@ async function resolveProfessionalId(): Promise<number | null> {
       return null;
     }
 
-    const resp = await apiGet<
-      ProfessionalFromApi[] | { results?: ProfessionalFromApi[] }
-    >("/api/v1/accounts/professionals/");
-
-    const raw: any = resp;
-    const list: ProfessionalFromApi[] = Array.isArray(raw)
-      ? raw
-      : Array.isArray(raw?.results)
-        ? raw.results
-        : [];
+    const list = await apiGetAll<ProfessionalFromApi>(
+      "/api/v1/accounts/professionals/",
+    );
 
     const prof = list.find((p) => p.user && p.user.id === me.user.id);
 
@@ -299,3 +299,57 @@ export const apiPatch = <T = any>(
 
 export const apiDelete = <T = any>(path: string, init: RequestInit = {}) =>
   apiJSON<T>(path, { ...init, method: "DELETE" });
+
+// ─────────────────────────────────────────────────────────────
+// PAGINATION HELPERS
+// ─────────────────────────────────────────────────────────────
+
+// Formato das listagens da API (KeysetPagination); `count` só vem com ?count=true
+export type Paginated<T> = {
+  count?: number;
+  next: string | null;
+  previous: string | null;
+  results: T[];
+};
+
+// Maior página aceita pela API (API_MAX_PAGE_SIZE), para seguir o cursor com menos requisições
+const MAX_PAGE_SIZE = 200;
+
+function withPageSize(path: string) {
+  if (/[?&]page_size=/.test(path)) return path;
+
+  return `${path}${path.includes("?") ? "&" : "?"}page_size=${MAX_PAGE_SIZE}`;
+}
+
+// Lê todas as páginas de uma listagem seguindo o cursor `next`
+export async function apiGetAll<T = any>(
+  path: string,
+  init: RequestInit = {},
+): Promise<T[]> {
+  const items: T[] = [];
+  let url: string | null = withPageSize(path);
+
+  while (url) {
+    const page: Paginated<T> | T[] | null = await apiGet<
+      Paginated<T> | T[]
+    >(url, init);
+
+    if (Array.isArray(page)) return items.concat(page);
+
+    items.push(...(page?.results ?? []));
+    url = page?.next ?? null;
+  }
+
+  return items;
+}
+
+// Total de uma listagem sem baixar as linhas (?count=true com página de 1)
+export async function apiCount(path: string, init: RequestInit = {}) {
+  const sep = path.includes("?") ? "&" : "?";
+  const page = await apiGet<Paginated<unknown>>(
+    `${path}${sep}count=true&page_size=1`,
+    init,
+  );
+
+  return page?.count ?? 0;
+}
@@ -1,5 +1,5 @@
 // frontend/lib/api/locations.ts
-import { apiGet, apiPatch, apiPost } from "@/lib/api";
+import { apiGet, apiGetAll, apiPatch, apiPost } from "@/lib/api";
 
 export type AddressApiPayload = {
   uf: string; // ex.: "PB", "PE"
@@ -73,10 +73,5 @@ export type InstitutionApi = {
  * Lista instituições em `/api/v1/locations/institutions/`.
  */
 export async function listInstitutions(): Promise<InstitutionApi[]> {
-  const res = await apiGet<InstitutionApi[]>("/api/v1/locations/institutions/");
-
-  return ensureResponse(
-    res,
-    "Falha ao carregar instituições. A API retornou resposta vazia.",
-  );
+  return apiGetAll<InstitutionApi>("/api/v1/locations/institutions/");
 }
@@ -1,5 +1,5 @@
 // lib/api/medications.ts
-import { apiDelete, apiGet, apiPatch, apiPost } from "@/lib/api";
+import { apiDelete, apiGetAll, apiPatch, apiPost } from "@/lib/api";
 
 const BASE = "/api/v1/medications";
 const MEDICATIONS_URL = `${BASE}/medications/`;
@@ -18,27 +18,11 @@ export interface MedicationDto {
   [key: string]: any;
 }
 
-type MedicationsResponse =
-  | MedicationDto[]
-  | {
-      results: MedicationDto[];
-      count?: number;
-      next?: string | null;
-      previous?: string | null;
-    };
-
 /**
  * Lista medicações (para o usuário logado, o back já filtra se for paciente).
  */
 export async function listMedications(): Promise<MedicationDto[]> {
-  const resp = await apiGet<MedicationsResponse | null>(MEDICATIONS_URL);
-
-  if (Array.isArray(resp)) return resp;
-  if (resp && Array.isArray((resp as any).results)) {
-    return (resp as any).results;
-  }
-
-  return [];
+  return apiGetAll<MedicationDto>(MEDICATIONS_URL);
 }
 
 /**
@@ -1,4 +1,4 @@
-import { apiDelete, apiGet, apiPatch, apiPost } from "@/lib/api";
+import { apiDelete, apiGet, apiGetAll, apiPatch, apiPost } from "@/lib/api";
 
 /** Rota base da API de profissionais (ProfessionalUserViewSet). */
 const BASE = "/api/v1/accounts/professionals";
@@ -75,19 +75,15 @@ export async function getProfissional<T = ProfessionalApi>(
 }
 
 /**
- * Lista de profissionais.
- * `searchParams` pode ser algo como "page=1&page_size=20".
- *
- * Por padrão, consideramos que a API pode retornar:
- *   - um array de ProfessionalApi; ou
- *   - um objeto paginado com `results: ProfessionalApi[]`.
+ * Lista de profissionais (todas as páginas).
+ * `searchParams` pode ser algo como "role=ACS&search=maria".
  */
-export async function listProfissionais<
-  T = ProfessionalApi[] | { results: ProfessionalApi[] },
->(searchParams?: string): Promise<T | null> {
+export async function listProfissionais<T = ProfessionalApi>(
+  searchParams?: string,
+): Promise<T[]> {
   const suffix = searchParams ? `?${searchParams}` : "";
 
-  return apiGet<T>(`${BASE}/${suffix}`);
+  return apiGetAll<T>(`${BASE}/${suffix}`);
 }
 
 /**
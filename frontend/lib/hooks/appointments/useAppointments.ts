@@ -1,13 +1,13 @@
 import { useMutation, useQuery, useQueryClient } from "@tanstack/react-query";
 
-import { apiGet, apiPost, apiDelete } from "@/lib/api";
+import { apiGetAll, apiPost, apiDelete } from "@/lib/api";
 
 export function useAppointments() {
   const client = useQueryClient();
 
   const list = useQuery({
     queryKey: ["appointments"],
-    queryFn: () => apiGet("/api/v1/appointments/appointments/"),
+    queryFn: () => apiGetAll("/api/v1/appointments/appointments/"),
   });
 
   const create = useMutation({
@@ -4,43 +4,41 @@ import type { KpiItem } from "@/lib/profissional-kpis";
 
 import { useQuery } from "@tanstack/react-query";
 
-import { apiGet } from "@/lib/api";
+import { apiCount } from "@/lib/api";
 
+// Só os totais: cada KPI é um ?count=true filtrado no backend, sem baixar as listagens
 export function useProfissionalKpis() {
   const pacientesQuery = useQuery({
-    queryKey: ["pacientes"],
-    queryFn: async () => {
-      const resp = await apiGet("/api/v1/accounts/patients/");
-
-      return Array.isArray(resp) ? resp : (resp?.results ?? []);
-    },
+    queryKey: ["pacientes", "count"],
+    queryFn: () => apiCount("/api/v1/accounts/patients/"),
   });
 
   const appointmentsQuery = useQuery({
-    queryKey: ["appointments"],
-    queryFn: async () => {
-      const resp = await apiGet("/api/v1/appointments/appointments/");
+    queryKey: ["appointments", "count"],
+    queryFn: () => apiCount("/api/v1/appointments/appointments/"),
+  });
 
-      return Array.isArray(resp) ? resp : (resp?.results ?? []);
-    },
+  const riskAppointmentsQuery = useQuery({
+    queryKey: ["appointments", "count", "Crítico"],
+    queryFn: () =>
+      apiCount("/api/v1/appointments/appointments/?risk_level=Cr%C3%ADtico"),
   });
 
   const alertsQuery = useQuery({
-    queryKey: ["alerts"],
-    queryFn: async () => {
-      const resp = await apiGet("/api/v1/alerts/alerts/");
-
-      return Array.isArray(resp) ? resp : (resp?.results ?? []);
-    },
+    queryKey: ["alerts", "count", "critical"],
+    queryFn: () => apiCount("/api/v1/alerts/alerts/?risk_level=critical"),
   });
 
-  const isLoading =
-    pacientesQuery.isLoading ||
-    appointmentsQuery.isLoading ||
-    alertsQuery.isLoading;
+  const queries = [
+    pacientesQuery,
+    appointmentsQuery,
+    riskAppointmentsQuery,
+    alertsQuery,
+  ];
+
+  const isLoading = queries.some((query) => query.isLoading);
 
-  const isError =
-    pacientesQuery.isError || appointmentsQuery.isError || alertsQuery.isError;
+  const isError = queries.some((query) => query.isError);
 
   if (isLoading) {
     return { isLoading: true, isError: false, data: [] as KpiItem[] };
@@ -50,22 +48,11 @@ export function useProfissionalKpis() {
     return { isLoading: false, isError: true, data: [] as KpiItem[] };
   }
 
-  const pacientes = pacientesQuery.data ?? [];
-  const appointments = appointmentsQuery.data ?? [];
-  const alerts = alertsQuery.data ?? [];
-
   // === KPIs ===
-  const totalPatients = pacientes.length;
-
-  const riskPatients = appointments.filter(
-    (a: any) => a.risk_level === "Crítico",
-  ).length;
-
-  const appointmentsCount = appointments.length;
-
-  const criticalAlerts = alerts.filter(
-    (a: any) => a.risk_level === "critical",
-  ).length;
+  const totalPatients = pacientesQuery.data ?? 0;
+  const riskPatients = riskAppointmentsQuery.data ?? 0;
+  const appointmentsCount = appointmentsQuery.data ?? 0;
+  const criticalAlerts = alertsQuery.data ?? 0;
 
   const kpis: KpiItem[] = [
     {
@@ -1,7 +1,7 @@
-import { apiGet, apiPost, apiPatch, apiDelete, apiPut } from "../../lib/api";
+import { apiGet, apiGetAll, apiPost, apiPatch, apiDelete, apiPut } from "../../lib/api";
 
 export function getPatients() {
-  return apiGet("/api/v1/accounts/patients/");
+  return apiGetAll("/api/v1/accounts/patients/");
 }
 
 export function createPatient(data: any) {
@@ -23,3 +23,9 @@ export function deletePatient(id: number) {
 export function restorePatient(id: number) {
   return apiPatch(`/api/v1/accounts/patients/${id}/restore`, {});
 }
+
+export function searchPatients(q: string, limit = 10) {
+  const params = new URLSearchParams({ q, limit: String(limit) });
+
+  return apiGet(`/api/v1/accounts/patients/search/?${params}`);
+}
@@ -2,6 +2,8 @@
 export interface AlertProps {
   id: number;
   patient?: {
+    id?: number;
+    name?: string;
     user?: {
       first_name?: string;
       last_name?: string;